@@ -0,0 +1,89 @@
+"""
+Сравнение скорости состаривания строк: исходный попиксельный цикл против numpy-версии.
+
+    python benchmarks/bench_aging.py --fonts tesseract/tesstrain/kbd/fonts --lines 200
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dags"))
+
+from src.image_generator import AgeingFactorEnum, apply_aging_effect, draw_text, init_rng, load_fonts  # noqa: E402
+
+SAMPLE_TEXT = "Адыгэбзэр зэрызэхэлъыр къэпщIэн папщIэ, псалъэхэм я лъабжьэр къэгъуэтын хуейщ"
+
+
+def apply_aging_effect_loop(image, aging_factor=(0.5, 0.1, 0.005)):
+    """Исходная реализация с циклом по пикселям - эталон для сравнения."""
+    image = image.convert("L")
+    black_factor, gray_factor, white_factor = aging_factor
+
+    pixel_data = list(image.getdata())
+    for i in range(len(pixel_data)):
+        pixel_value = pixel_data[i]
+
+        if pixel_value < 85:
+            if random.random() > black_factor:
+                continue
+            new_value = pixel_value - random.randint(0, 15) * 10
+        elif pixel_value < 170:
+            if random.random() > gray_factor:
+                continue
+            new_value = pixel_value + random.randint(-15, 15) * 10
+        else:
+            if random.random() > white_factor:
+                continue
+            new_value = pixel_value - random.randint(0, 15) * 10
+
+        pixel_data[i] = new_value
+
+    image.putdata(pixel_data)
+    return image
+
+
+def _lines_per_second(func, images, aging_factor):
+    start = time.perf_counter()
+    results = [func(image, aging_factor) for image in images]
+    return len(images) / (time.perf_counter() - start), results
+
+
+def _changed_ratio(originals, results):
+    changed = total = 0
+    for original, result in zip(originals, results):
+        before = np.asarray(original.convert("L"), dtype=np.int16)
+        after = np.asarray(result, dtype=np.int16)
+        changed += np.count_nonzero(before != after)
+        total += before.size
+    return changed / total
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fonts", default="tesseract/tesstrain/kbd/fonts")
+    parser.add_argument("--lines", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    init_rng(args.seed)
+
+    fonts = load_fonts(args.fonts)
+    images = [draw_text(SAMPLE_TEXT, fonts[i % len(fonts)]) for i in range(args.lines)]
+
+    print(f"{'level':<8}{'loop, lines/s':>16}{'numpy, lines/s':>16}{'speedup':>10}{'changed loop/numpy':>22}")
+    for level in AgeingFactorEnum:
+        loop_lps, loop_results = _lines_per_second(apply_aging_effect_loop, images, level.value)
+        np_lps, np_results = _lines_per_second(apply_aging_effect, images, level.value)
+        print(
+            f"{level.name:<8}{loop_lps:>16.1f}{np_lps:>16.1f}{np_lps / loop_lps:>9.1f}x"
+            f"{_changed_ratio(images, loop_results):>13.4f}/{_changed_ratio(images, np_results):.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Микро-бенчмарк отрисовки строки: временный холст 1x1 + RGB против метрик шрифта + "L".
+
+    python benchmarks/bench_draw_text.py --fonts tesseract/tesstrain/kbd/fonts --lines 2000
+"""
+import argparse
+import os
+import sys
+import time
+
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dags"))
+
+from src.image_generator import draw_text, load_fonts  # noqa: E402
+
+SAMPLE_TEXTS = [
+    "Адыгэбзэр зэрызэхэлъыр къэпщIэн папщIэ",
+    "псалъэхэм я лъабжьэр къэгъуэтын хуейщ",
+    "«Iуащхьэмахуэ», – жиIащ абы 1978 гъэм",
+]
+
+
+def draw_text_temp_canvas(text, img_font, background=(255, 255, 255)):
+    """Исходная реализация: размер меряется на временном изображении 1x1, рисуется в RGB."""
+    temp_image = Image.new("RGB", (1, 1), color=(255, 255, 255))
+    temp_draw = ImageDraw.Draw(temp_image)
+    text_bbox = temp_draw.textbbox((0, 0), text, font=img_font)
+    text_width = text_bbox[2] - text_bbox[0]
+    text_height = text_bbox[3] - text_bbox[1]
+
+    padding = img_font.size // 2
+    image = Image.new("RGB", (text_width + padding, text_height + padding), color=background)
+    draw = ImageDraw.Draw(image)
+    draw.text((0, -img_font.size / 10), text, font=img_font, fill=(0, 0, 0))
+    return image.convert("L")
+
+
+def _bench(name, func, jobs):
+    start = time.perf_counter()
+    for text, img_font in jobs:
+        func(text, img_font)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<28}{len(jobs) / elapsed:>14.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fonts", default="tesseract/tesstrain/kbd/fonts")
+    parser.add_argument("--lines", type=int, default=2000)
+    args = parser.parse_args()
+
+    fonts = load_fonts(args.fonts)
+    jobs = [(SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)], fonts[i % len(fonts)]) for i in range(args.lines)]
+
+    print(f"{'variant':<28}{'lines/s':>14}")
+    _bench("temp canvas + RGB", draw_text_temp_canvas, jobs)
+    _bench("font metrics + L", lambda text, img_font: draw_text(text, img_font, mode="L"), jobs)
+
+
+if __name__ == "__main__":
+    main()
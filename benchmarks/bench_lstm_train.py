@@ -0,0 +1,49 @@
+"""
+Скорость подготовки lstmf (образцов в секунду) при разных размерах батча lstm.train.
+Образцы копируются во временную директорию для каждого размера батча, нужен tesseract в PATH.
+
+    python benchmarks/bench_lstm_train.py --ground-truth-dir data/ground_truth --samples 500 --batch-sizes 1,8,32,128
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dags"))
+
+from src.prepare_tessdata import get_wo_boxes, run_prepare  # noqa: E402
+
+
+def _copy_samples(ground_truth_dir, names, target_dir):
+    for name in names:
+        for ext in (".png", ".gt.txt"):
+            shutil.copy(os.path.join(ground_truth_dir, f"{name}{ext}"), os.path.join(target_dir, f"{name}{ext}"))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ground-truth-dir", required=True)
+    parser.add_argument("--samples", type=int, default=500)
+    parser.add_argument("--batch-sizes", default="1,8,32,128")
+    parser.add_argument("--par-factor", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    names = sorted(f[: -len(".png")] for f in os.listdir(args.ground_truth_dir) if f.endswith(".png"))
+    names = [name for name in names if os.path.exists(os.path.join(args.ground_truth_dir, f"{name}.gt.txt"))]
+    names = names[: args.samples]
+
+    results = []
+    for batch_size in [int(b) for b in args.batch_sizes.split(",")]:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            _copy_samples(args.ground_truth_dir, names, tmp_dir)
+            stats = run_prepare(get_wo_boxes(tmp_dir), tmp_dir, par_factor=args.par_factor, batch_size=batch_size)
+            results.append((batch_size, stats.throughput, len(stats.failed)))
+
+    print(f"{'batch size':>10}{'samples/s':>12}{'failed':>8}")
+    for batch_size, samples_per_second, failed in results:
+        print(f"{batch_size:>10}{samples_per_second:>12.1f}{failed:>8}")
+
+
+if __name__ == "__main__":
+    main()
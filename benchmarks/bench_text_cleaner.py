@@ -0,0 +1,112 @@
+"""
+Сравнение скорости очистки текста: исходная цепочка re.sub-проходов против clean_text.
+Результаты сверяются на каждом куске.
+Корпус обрабатывается кусками, поэтому память не зависит от его размера.
+
+    python benchmarks/bench_text_cleaner.py --size-mb 1024
+    python benchmarks/bench_text_cleaner.py --input corpus.txt
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dags"))
+
+from src import text_cleaner  # noqa: E402
+
+CHUNK_BYTES = 1024**2
+
+SAMPLE_LINES = [
+    "Адыгэбзэр зэрызэхэлъыр къэпщIэн папщIэ, псалъэхэм я лъабжьэр къэгъуэтын хуейщ.",
+    "Абы и IуэхукIэ,кхъыIэ... укъыщIэупщIэжмэ!!   сыт хуэдэ жэуап уиIэн?",
+    ", : I ? I I, I I! > I I I I. : «, .!» I I, . I, I, , I I, I., I I, , . I",
+    "Страница 12 (cid:3) <b>ГЛАВА ПЕРВАЯ</b>  Lorem ipsum 😀 × 1945 г.",
+    "к ъ э б ж ь э р   мыр   ЗЭРЫГЪЭЗЭНЫМ   щыщщ — «Iуэхум» теухуа тхылъ",
+    "",
+]
+
+
+def remove_garbage_legacy(text):
+    def _clean(line):
+        line = re.sub(r"^[ I.,×«»()\-–!№\d?:;]*$", "", line)
+        line = re.sub(r"^[^АаБбВвГгДдЕеЁёЖжЗзИиЙйКкЛлМмНнОоПпРрСсТтУуФфХхЦцЧчШшЩщЪъЫыЬьЭэЮюЯя]*$", "", line)
+        line = re.sub(r"\, \, ", "", line)
+        return line
+
+    return "\n".join(_clean(line) for line in text.split("\n"))
+
+
+def clean_text_legacy(text):
+    """Исходная реализация: все 14 шагов через re.sub с исходными выражениями - эталон для сравнения."""
+    text = re.sub(text_cleaner.NOT_IN_WHITELIST_REGEX, "", text)
+    text = re.sub(r"<[^>]+>", "", text)
+    text = re.sub(r"[\U00010000-\U0010ffff]", "", text)
+    text = re.sub(r"\(cid:.*\)", "", text)
+    text = re.sub(r"\b(?:[А-Яа-яI]\s){2,}[А-Яа-яI]\b", "", text)
+    text = re.sub(r"\b[А-ЯЁA-Z]{5,}\b", "", text)
+    text = re.sub(r"\n{2,}", "\n", text)
+    text = re.sub(r"\s+([.,!?;:])", r"\1", text)
+    text = re.sub(r"\b\w*II\w*\b", "", text)
+    text = re.sub(r",(\S)", r", \1", text)
+    text = re.sub(r"\s{2,}", " ", text)
+    text = re.sub(r"\.{3,}", ".", text)
+    text = re.sub(r"([,!?])\1+", r"\1", text)
+    return remove_garbage_legacy(text)
+
+
+def iter_synthetic_chunks(size_mb, seed):
+    rnd = random.Random(seed)
+    left = size_mb * 1024**2
+    while left > 0:
+        lines, chunk_size = [], 0
+        while chunk_size < min(CHUNK_BYTES, left):
+            line = rnd.choice(SAMPLE_LINES)
+            lines.append(line)
+            chunk_size += len(line.encode("utf-8")) + 1
+        left -= chunk_size
+        yield "\n".join(lines) + "\n", chunk_size
+
+
+def iter_file_chunks(path):
+    with open(path, "r", encoding="utf-8") as f:
+        while True:
+            lines = f.readlines(CHUNK_BYTES)
+            if not lines:
+                break
+            chunk = "".join(lines)
+            yield chunk, len(chunk.encode("utf-8"))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=int, default=64)
+    parser.add_argument("--input", default=None, help="текстовый файл вместо синтетического корпуса")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    chunks = iter_file_chunks(args.input) if args.input else iter_synthetic_chunks(args.size_mb, args.seed)
+
+    total_bytes = legacy_time = new_time = 0
+    for chunk, chunk_bytes in chunks:
+        start = time.perf_counter()
+        legacy = clean_text_legacy(chunk)
+        legacy_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        cleaned = text_cleaner.clean_text(chunk)
+        new_time += time.perf_counter() - start
+
+        if cleaned != legacy:
+            raise SystemExit(f"Результат отличается от эталона на куске после {total_bytes} байт")
+        total_bytes += chunk_bytes
+
+    mb = total_bytes / 1024**2
+    print(f"{'corpus, MB':<12}{'legacy, MB/s':>14}{'clean_text, MB/s':>18}{'speedup':>10}")
+    print(f"{mb:<12.1f}{mb / legacy_time:>14.2f}{mb / new_time:>18.2f}{legacy_time / new_time:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ import click
 # Image processing commands
 from cli import (
     apply_img_filters,
+    pipeline,
     rotate_img,
     smooth_img,
     standartize_img,
@@ -43,6 +44,7 @@ cli.add_command(box_processing.box_processing)
 cli.add_command(unpaper_img.unpaper_img)
 cli.add_command(apply_img_filters.apply_filters)
 cli.add_command(standartize_img.standartize_img)
+cli.add_command(pipeline.pipeline)
 
 
 if __name__ == "__main__":
@@ -2,6 +2,7 @@ import click
 
 from logic.apply_img_filters import apply_image_filters
 from logic.cli_utils import generic_file_processor, get_files_to_process, validate_input_file_path_and_dir_params
+from logic.executors import executor_options
 
 DEFAULT_PROCESS_STEPS = [
     ("Brightness", 1.4),
@@ -16,7 +17,8 @@ DEFAULT_PROCESS_STEPS = [
 @click.option("--output-dir", "-o", default=None, help="Output directory path for the HTML file")
 @click.option("--file-mask", "-m", default="*.jpg", help="File mask")
 @click.option("--group", "-g", default=1, help="Group files")
-def apply_filters(input_file_path, input_dir, output_dir, file_mask, group):
+@executor_options
+def apply_filters(input_file_path, input_dir, output_dir, file_mask, group, executor):
     if not validate_input_file_path_and_dir_params(input_file_path, input_dir):
         return
 
@@ -28,6 +30,7 @@ def apply_filters(input_file_path, input_dir, output_dir, file_mask, group):
         processing_steps=DEFAULT_PROCESS_STEPS,
         description_prefix=" ".join([f"{step[0]} {step[1]}" for step in DEFAULT_PROCESS_STEPS]),
         group_steps=group,
+        executor=executor,
     )
 
 
@@ -1,10 +1,18 @@
 import os
+
 import click
-from PIL import Image
-from pypdf import PdfWriter
-from io import BytesIO
 from tqdm import tqdm
 
+from logic.pdf_writer import StreamingPdfWriter
+
+
+def find_hocr_path(hocr_dir, image_file):
+    # run_tesseract_for_page пишет page_001.jpg -> page_001.hocr
+    if hocr_dir is None:
+        return None
+    hocr_path = os.path.join(hocr_dir, f"{os.path.splitext(image_file)[0]}.hocr")
+    return hocr_path if os.path.exists(hocr_path) else None
+
 
 @click.command()
 @click.option("--input-dir", "-d", help="Path to the input directory")
@@ -13,7 +21,9 @@ from tqdm import tqdm
     "-o",
     help="Output file path for the joined PDF",
 )
-def join_images_to_pdf(input_dir, output_file_path):
+@click.option("--hocr-dir", default=None, help="Directory with hOCR files for the invisible text layer")
+@click.option("--dpi", default=72, show_default=True, help="Image resolution, defines the page size")
+def join_images_to_pdf(input_dir, output_file_path, hocr_dir, dpi):
     if input_dir is None:
         click.echo("Please provide an input directory path.")
         return
@@ -22,33 +32,17 @@ def join_images_to_pdf(input_dir, output_file_path):
         click.echo("Please provide an output file path.")
         return
 
-    input_image_files = sorted([f for f in os.listdir(input_dir) if f.lower().endswith(('.png', '.jpg', '.jpeg'))])
-
-    pdf_writer = PdfWriter()
-
-    with tqdm(total=len(input_image_files), desc="Processing images") as pbar:
-        for image_file in input_image_files:
-            image_path = os.path.join(input_dir, image_file)
-
-            with Image.open(image_path) as img:
-                if img.mode != 'RGB':
-                    img = img.convert('RGB')
-
-                img_byte_arr = BytesIO()
-                img.save(img_byte_arr, format='PDF')
-                img_byte_arr.seek(0)
-
-                # Append the page bytes to the PDF
-                pdf_writer.append(img_byte_arr)
-
-            pbar.update(1)
+    input_image_files = sorted([f for f in os.listdir(input_dir) if f.lower().endswith((".png", ".jpg", ".jpeg"))])
 
-    # Write the PDF to the output file
-    with open(output_file_path, 'wb') as output_file:
-        pdf_writer.write(output_file)
+    # страницы пишутся на диск по мере добавления, JPEG встраиваются без пережатия
+    with StreamingPdfWriter(output_file_path) as pdf_writer:
+        for image_file in tqdm(input_image_files, desc="Processing images"):
+            pdf_writer.add_image_page(
+                os.path.join(input_dir, image_file), dpi=dpi, hocr_path=find_hocr_path(hocr_dir, image_file)
+            )
 
     click.echo(f"PDF created successfully: {output_file_path}")
 
 
 if __name__ == "__main__":
-    join_images_to_pdf()
\ No newline at end of file
+    join_images_to_pdf()
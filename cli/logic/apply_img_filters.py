@@ -42,6 +42,18 @@ def create_output_file_path(output_dir, steps_to_name_prefix, file_name, group_s
     return output_file_path
 
 
+def apply_processing_steps(image, processing_steps):
+    """:return: (итоговое изображение, [(изображение после шага, step_name, step_factor), ...])"""
+    processed_images = []
+
+    for step_name, step_factor in processing_steps:
+        processed_image = apply_enhancement(image, step_name, step_factor)
+        processed_images.append((processed_image.copy(), step_name, step_factor))
+        image = processed_image
+
+    return image, processed_images
+
+
 def apply_image_filters(
     file_path,
     output_dir,
@@ -59,12 +71,7 @@ def apply_image_filters(
     if not processing_steps:
         processing_steps = [("Contrast", 1.0), ("Brightness", 1.0), ("Sharpness", 1.0)]
 
-    processed_images = []
-
-    for step_name, step_factor in processing_steps:
-        processed_image = apply_enhancement(image, step_name, step_factor)
-        processed_images.append((processed_image.copy(), step_name, step_factor))
-        image = processed_image
+    image, processed_images = apply_processing_steps(image, processing_steps)
 
     if debug:
         debug_dir = f"{output_dir}__debug"
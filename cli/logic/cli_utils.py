@@ -1,10 +1,10 @@
-import concurrent
 import fnmatch
+import functools
 import os
-from concurrent.futures import ThreadPoolExecutor
 
 import click
-from tqdm import tqdm
+
+from .executors import get_executor_options, run_tasks
 
 
 def validate_input_file_path_and_dir_params(input_file_path, input_dir):
@@ -38,26 +38,36 @@ def get_files_to_process(input_file_path=None, input_dir=None, file_mask="*.jpg"
     return files_to_process
 
 
-def generic_file_processor(process_function, files, output_dir=None, description_prefix="", max_workers=None, **kwargs):
-    def process_file(file_path, index):
-        path, file_name = os.path.split(file_path)
-        ext = file_name.split(".")[-1]
-        if output_dir is None:
-            file_output_dir = file_path[: -len(ext) - 1]
-        else:
-            file_output_dir = output_dir
+def _process_file(process_function, output_dir, kwargs, file_path, index):
+    path, file_name = os.path.split(file_path)
+    ext = file_name.split(".")[-1]
+    if output_dir is None:
+        file_output_dir = file_path[: -len(ext) - 1]
+    else:
+        file_output_dir = output_dir
 
-        os.makedirs(file_output_dir, exist_ok=True)
-        process_function(file_path=file_path, output_dir=file_output_dir, page=index, **kwargs)
+    os.makedirs(file_output_dir, exist_ok=True)
+    process_function(file_path=file_path, output_dir=file_output_dir, page=index, **kwargs)
 
-    max_workers = max_workers or int(os.cpu_count() / 2)
 
-    sorted_files = sorted(files)
-    total_files = len(sorted_files)
+def generic_file_processor(
+    process_function, files, output_dir=None, description_prefix="", max_workers=None, executor=None, **kwargs
+):
+    """
+    :param executor: переопределения ExecutorOptions (dict, None - взять из профиля команды)
+    """
+    overrides = dict(executor or {})
+    if overrides.get("max_workers") is None:
+        overrides["max_workers"] = max_workers
+    options = get_executor_options(process_function, overrides)
 
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = [executor.submit(process_file, file_path, index) for index, file_path in enumerate(sorted_files)]
+    # module-level функция + partial, чтобы задачи можно было передать в процессы
+    process_file = functools.partial(_process_file, process_function, output_dir, kwargs)
+    tasks = [(file_path, index) for index, file_path in enumerate(sorted(files))]
 
-        for future in tqdm(concurrent.futures.as_completed(futures), total=total_files,
-                           desc=f"Processing with {process_function.__name__} {description_prefix}", unit="file"):
-            future.result()
+    run_tasks(
+        process_file,
+        tasks,
+        options,
+        description=f"Processing with {process_function.__name__} {description_prefix} [{options.backend.value}]",
+    )
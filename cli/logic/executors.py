@@ -0,0 +1,179 @@
+"""
+Исполнители для пакетной обработки файлов: потоки, процессы или последовательно в текущем процессе.
+
+Бэкенд по умолчанию выбирается по профилю команды (COMMAND_PROFILES): обработка на OpenCV/numpy
+с GIL масштабируется только процессами, а шаги, которые в основном ждут внешние программы
+(unpaper, tesseract) или PIL, освобождающий GIL, - потоками.
+"""
+import functools
+import itertools
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from enum import Enum
+
+import click
+import cv2
+from tqdm import tqdm
+
+
+class Backend(Enum):
+    THREAD = "thread"
+    PROCESS = "process"
+    INLINE = "inline"
+
+
+@dataclass(frozen=True)
+class ExecutorOptions:
+    backend: Backend = Backend.THREAD
+    max_workers: int = None
+    # сколько файлов отдается воркеру за раз: для процессов уменьшает накладные расходы на pickle
+    chunk_size: int = 1
+    # cv2.setNumThreads в каждом воркере; None - не трогать настройку OpenCV
+    cv_threads: int = 1
+
+    def get_max_workers(self):
+        if self.max_workers:
+            return self.max_workers
+        if self.backend == Backend.PROCESS:
+            return os.cpu_count()
+        return max(1, os.cpu_count() // 2)
+
+
+DEFAULT_OPTIONS = ExecutorOptions()
+
+# профили по имени функции обработки
+COMMAND_PROFILES = {
+    "rotate_image": ExecutorOptions(backend=Backend.PROCESS),
+    "smooth_contours": ExecutorOptions(backend=Backend.PROCESS),
+    "split_book_processing": ExecutorOptions(backend=Backend.PROCESS),
+    "apply_image_filters": ExecutorOptions(backend=Backend.PROCESS),
+    "standardize_img_width": ExecutorOptions(backend=Backend.THREAD),
+    "unpaper_processing": ExecutorOptions(backend=Backend.THREAD, cv_threads=None),
+    "extract_box_images": ExecutorOptions(backend=Backend.THREAD),
+    "pipeline_processing": ExecutorOptions(backend=Backend.PROCESS),
+}
+
+
+def get_executor_options(process_function, overrides=None):
+    """Профиль команды, поверх которого применяются заданные (не None) поля overrides."""
+    options = COMMAND_PROFILES.get(process_function.__name__, DEFAULT_OPTIONS)
+    if overrides:
+        options = replace(options, **{key: value for key, value in overrides.items() if value is not None})
+    return options
+
+
+def _init_worker(cv_threads):
+    if cv_threads is not None:
+        cv2.setNumThreads(cv_threads)
+
+
+@contextmanager
+def _local_cv_threads(cv_threads):
+    """cv_threads для потоков и INLINE: настройка OpenCV общая на процесс, поэтому после запуска она возвращается."""
+    if cv_threads is None:
+        yield
+        return
+
+    previous_cv_threads = cv2.getNumThreads()
+    cv2.setNumThreads(cv_threads)
+    try:
+        yield
+    finally:
+        cv2.setNumThreads(previous_cv_threads)
+
+
+def _run_chunk(fn, chunk):
+    return [fn(*item) for item in chunk]
+
+
+def _run_chunks(fn, chunks, options, pbar):
+    chunk_results = [None] * len(chunks)
+
+    if options.backend == Backend.INLINE:
+        with _local_cv_threads(options.cv_threads):
+            for chunk_i, chunk in enumerate(chunks):
+                chunk_results[chunk_i] = _run_chunk(fn, chunk)
+                pbar.update(len(chunk))
+        return chunk_results
+
+    if options.backend == Backend.PROCESS:
+        executor = ProcessPoolExecutor(
+            max_workers=options.get_max_workers(), initializer=_init_worker, initargs=(options.cv_threads,)
+        )
+        cv_threads = None
+    else:
+        # потоки делят одну настройку OpenCV
+        executor = ThreadPoolExecutor(max_workers=options.get_max_workers())
+        cv_threads = options.cv_threads
+
+    with _local_cv_threads(cv_threads), executor:
+        futures = {executor.submit(_run_chunk, fn, chunk): chunk_i for chunk_i, chunk in enumerate(chunks)}
+        for future in as_completed(futures):
+            chunk_i = futures[future]
+            chunk_results[chunk_i] = future.result()
+            pbar.update(len(chunks[chunk_i]))
+    return chunk_results
+
+
+def run_tasks(fn, tasks, options, description=""):
+    """
+    Вызывает fn(*task) для каждого task с прогресс-баром. Для бэкенда PROCESS fn и задачи должны сериализоваться pickle.
+    Исключение в любой задаче пробрасывается.
+
+    :return: результаты fn в порядке tasks
+    """
+    chunks = [tasks[i : i + options.chunk_size] for i in range(0, len(tasks), options.chunk_size)]
+
+    with tqdm(total=len(tasks), desc=description, unit="file") as pbar:
+        chunk_results = _run_chunks(fn, chunks, options, pbar)
+
+    return [result for results in chunk_results for result in results]
+
+
+def iter_bounded_ordered(executor, fn, items, max_in_flight):
+    """
+    Аналог executor.map, который читает items лениво и держит в работе не больше max_in_flight задач,
+    поэтому готовые, но еще не отданные результаты не копятся в памяти. Отдает результаты fn в порядке items.
+    """
+    items = iter(items)
+    in_flight = deque(executor.submit(fn, item) for item in itertools.islice(items, max_in_flight))
+
+    while in_flight:
+        future = in_flight.popleft()
+        for next_item in itertools.islice(items, 1):
+            in_flight.append(executor.submit(fn, next_item))
+        yield future.result()
+
+
+def executor_options(func):
+    """Добавляет к click-команде опции исполнителя и передает их в параметре executor (dict для overrides)."""
+
+    @click.option(
+        "--backend",
+        type=click.Choice([backend.value for backend in Backend]),
+        default=None,
+        help="Executor backend, by default chosen by the command profile",
+    )
+    @click.option("--max-workers", "-w", type=int, default=None, help="Number of workers")
+    @click.option("--chunk-size", type=int, default=None, help="Files per worker task")
+    @click.option(
+        "--cv-threads",
+        type=int,
+        default=None,
+        help="OpenCV threads (cv2.setNumThreads) per worker process; for thread/inline backends "
+        "set for the duration of the run and then restored",
+    )
+    @functools.wraps(func)
+    def wrapper(*args, backend, max_workers, chunk_size, cv_threads, **kwargs):
+        executor = {
+            "backend": Backend(backend) if backend else None,
+            "max_workers": max_workers,
+            "chunk_size": chunk_size,
+            "cv_threads": cv_threads,
+        }
+        return func(*args, executor=executor, **kwargs)
+
+    return wrapper
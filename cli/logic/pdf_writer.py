@@ -0,0 +1,245 @@
+"""
+Потоковая сборка PDF из изображений страниц: объекты пишутся в файл сразу, в памяти остаются только
+смещения для xref. JPEG встраиваются как есть (DCTDecode, без декодирования и пережатия), остальные
+форматы - несжатыми пикселями через FlateDecode.
+
+Текстовый слой из hOCR - невидимый текст (3 Tr) шрифтом Type0 с Identity-H, где код символа равен его
+коду Unicode, а ToUnicode отображает коды обратно - как в pdf-рендерере tesseract. Встраивается тот же
+шрифт GlyphLessFont из tesseract (tessdata/pdf.ttf): в нем один пустой глиф, на который отображаются все коды.
+"""
+import base64
+import os
+import re
+import zlib
+
+from lxml import etree
+from PIL import Image
+
+JPEG_COLOR_SPACES = {"L": "/DeviceGray", "RGB": "/DeviceRGB", "CMYK": "/DeviceCMYK"}
+BBOX_RE = re.compile(r"bbox (\d+) (\d+) (\d+) (\d+)")
+FONT_NAME = "/GlyphLessFont"
+# ширина глифа шрифта в тысячных кегля (DW), по ней подбирается горизонтальное масштабирование слова
+GLYPH_WIDTH = 500
+
+# tessdata/pdf.ttf из tesseract: .notdef и пустой глиф шириной 1024/2048 = GLYPH_WIDTH
+GLYPHLESS_FONT = base64.b64decode(
+    "AAEAAAAKAIAAAwAgT1MvMlbeyJQAAAEoAAAAYGNtYXAACgA0AAABkAAAAB5nbHlmFSJBJAAAAbgAAAAYaGVhZAt48WUAAACsAAAA"
+    "NmhoZWEMAgQCAAAA5AAAACRobXR4BAAAAAAAAYgAAAAIbG9jYQAMAAAAAAGwAAAABm1heHAABAAFAAABCAAAACBuYW1l8usW2gAA"
+    "AdAAAABLcG9zdAABAAEAAAIcAAAAIAABAAAAAQAAsJRxEF8PPPUEBwgAAAAAAM+a/G4AAAAA1MOn8gAAAAAEAAgAAAAAEAACAAAA"
+    "AAAAAAEAAAgA//8AAAQAAAAAAAQAAAEAAAAAAAAAAAAAAAAAAAACAAEAAAACAAQAAQAAAAAAAQAAAAAAAAAAAAAAAAAAAAAAAwAA"
+    "AZAABQAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAUAAQABAAAAAAAAAAAAAAAAAAAAAAAAAAAAR09PRwBAAAAAAAAB//8AAAABAAGA"
+    "AAAAAAAAAAAAAAAAAAABAAAAAAAABAAAAAAAAAIAAQAAAAAAFAADAAAAAAAUAAYACgAAAAAAAAAAAAAAAAAMAAAAAQAAAAAEAAgA"
+    "AAMAADEhESEEAPwACAAAAAADACoAAAADAAAABQAWAAAAAQAAAAAABQALABYAAwABBAkABQAWAAAAVgBlAHIAcwBpAG8AbgAgADEA"
+    "LgAwVmVyc2lvbiAxLjAAAAEAAAAAAAAAAAAAAAAAAQAAAAAAAAAAAAAAAAAAAAA="
+)
+# CID (код символа) -> GID 1 для всех 2^16 кодов
+CID_TO_GID_MAP = b"\x00\x01" * (1 << 16)
+
+TO_UNICODE_CMAP = b"""/CIDInit /ProcSet findresource begin
+12 dict begin
+begincmap
+/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def
+/CMapName /Adobe-Identity-UCS def
+/CMapType 2 def
+1 begincodespacerange
+<0000> <FFFF>
+endcodespacerange
+1 beginbfrange
+<0000> <FFFF> <0000>
+endbfrange
+endcmap
+CMapName currentdict /CMap defineresource pop
+end
+end
+"""
+
+
+def _get_bbox(element):
+    match = BBOX_RE.search(element.get("title") or "")
+    return tuple(int(v) for v in match.groups()) if match else None
+
+
+def read_hocr_words(hocr_path):
+    """
+    :return: (размер страницы (width, height) из ocr_page или None, [(текст, (x0, y0, x1, y1)), ...])
+    """
+    tree = etree.parse(hocr_path, etree.HTMLParser(encoding="utf-8"))
+    page_size, words = None, []
+    for element in tree.iter():
+        element_class = element.get("class")
+        if element_class == "ocr_page" and page_size is None:
+            bbox = _get_bbox(element)
+            if bbox:
+                page_size = (bbox[2] - bbox[0], bbox[3] - bbox[1])
+        elif element_class == "ocrx_word":
+            text = "".join(element.itertext()).strip()
+            bbox = _get_bbox(element)
+            if text and bbox:
+                words.append((text, bbox))
+    return page_size, words
+
+
+def _encode_text(text):
+    # символы вне BMP в двухбайтный Identity-H не помещаются
+    return "".join(f"{ord(c) if ord(c) <= 0xFFFF else ord('?'):04X}" for c in text)
+
+
+def _make_text_layer(words, scale, page_height):
+    """Операторы невидимого текста: каждое слово растягивается по ширине своего bbox."""
+    ops = ["BT", "3 Tr"]
+    for text, (x0, y0, x1, y1) in words:
+        font_size = max((y1 - y0) * scale, 1.0)
+        horizontal_scale = 100.0 * (x1 - x0) * scale / (len(text) * font_size * GLYPH_WIDTH / 1000)
+        ops.append(
+            f"/F1 {font_size:.2f} Tf {horizontal_scale:.2f} Tz "
+            f"1 0 0 1 {x0 * scale:.2f} {page_height - y1 * scale:.2f} Tm <{_encode_text(text)}> Tj"
+        )
+    ops.append("ET")
+    return "\n".join(ops)
+
+
+def _read_image(image_path):
+    """
+    :return: (width, height, словарь XObject без Length, данные потока)
+    """
+    with Image.open(image_path) as img:
+        width, height = img.size
+        if img.format == "JPEG" and img.mode in JPEG_COLOR_SPACES:
+            params = f"/ColorSpace {JPEG_COLOR_SPACES[img.mode]} /BitsPerComponent 8 /Filter /DCTDecode"
+            if img.mode == "CMYK":
+                # Adobe пишет CMYK JPEG инвертированным
+                params += " /Decode [1 0 1 0 1 0 1 0]"
+            with open(image_path, "rb") as f:
+                return width, height, params, f.read()
+
+        if img.mode not in ("L", "RGB"):
+            img = img.convert("L" if img.mode in ("1", "LA", "I", "I;16", "F") else "RGB")
+        params = f"/ColorSpace {JPEG_COLOR_SPACES[img.mode]} /BitsPerComponent 8 /Filter /FlateDecode"
+        return width, height, params, zlib.compress(img.tobytes(), 6)
+
+
+class StreamingPdfWriter:
+    """
+    Пишет PDF постранично во временный файл, при close() дописывает дерево страниц, xref и переименовывает
+    его в output_path. Используется как контекстный менеджер, при исключении временный файл удаляется.
+    """
+
+    CATALOG_ID = 1
+    PAGES_ID = 2
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self._tmp_path = f"{output_path}.tmp"
+        self._file = open(self._tmp_path, "wb")
+        self._offsets = {}
+        self._next_id = 3
+        self._page_ids = []
+        self._font_id = None
+        self._file.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+            os.remove(self._tmp_path)
+
+    @property
+    def page_count(self):
+        return len(self._page_ids)
+
+    def _new_id(self):
+        obj_id = self._next_id
+        self._next_id += 1
+        return obj_id
+
+    def _write_object(self, obj_id, body, stream=None):
+        self._offsets[obj_id] = self._file.tell()
+        if stream is None:
+            self._file.write(f"{obj_id} 0 obj\n{body}\nendobj\n".encode("ascii"))
+        else:
+            self._file.write(f"{obj_id} 0 obj\n<< {body} /Length {len(stream)} >>\nstream\n".encode("ascii"))
+            self._file.write(stream)
+            self._file.write(b"\nendstream\nendobj\n")
+
+    def _get_font_id(self):
+        if self._font_id is not None:
+            return self._font_id
+
+        self._font_id, cid_font_id, descriptor_id, to_unicode_id, cid_to_gid_id, font_file_id = (
+            self._new_id() for _ in range(6)
+        )
+        self._write_object(
+            self._font_id,
+            f"<< /Type /Font /Subtype /Type0 /BaseFont {FONT_NAME} /Encoding /Identity-H "
+            f"/DescendantFonts [{cid_font_id} 0 R] /ToUnicode {to_unicode_id} 0 R >>",
+        )
+        self._write_object(
+            cid_font_id,
+            f"<< /Type /Font /Subtype /CIDFontType2 /BaseFont {FONT_NAME} "
+            "/CIDSystemInfo << /Registry (Adobe) /Ordering (Identity) /Supplement 0 >> "
+            f"/FontDescriptor {descriptor_id} 0 R /DW {GLYPH_WIDTH} /CIDToGIDMap {cid_to_gid_id} 0 R >>",
+        )
+        self._write_object(
+            descriptor_id,
+            f"<< /Type /FontDescriptor /FontName {FONT_NAME} /Flags 5 /FontBBox [0 0 {GLYPH_WIDTH} 1000] "
+            f"/ItalicAngle 0 /Ascent 1000 /Descent 0 /CapHeight 1000 /StemV 80 /FontFile2 {font_file_id} 0 R >>",
+        )
+        self._write_object(to_unicode_id, "", TO_UNICODE_CMAP)
+        self._write_object(cid_to_gid_id, "/Filter /FlateDecode", zlib.compress(CID_TO_GID_MAP))
+        self._write_object(font_file_id, f"/Length1 {len(GLYPHLESS_FONT)}", GLYPHLESS_FONT)
+        return self._font_id
+
+    def add_image_page(self, image_path, dpi=72, hocr_path=None):
+        """
+        :param dpi: разрешение изображения, определяет размер страницы
+        :param hocr_path: hOCR этой страницы для текстового слоя
+        """
+        width, height, image_params, image_data = _read_image(image_path)
+        scale = 72.0 / dpi
+        page_width, page_height = width * scale, height * scale
+
+        image_id = self._new_id()
+        self._write_object(
+            image_id, f"/Type /XObject /Subtype /Image /Width {width} /Height {height} {image_params}", image_data
+        )
+        del image_data
+
+        content = f"q {page_width:.2f} 0 0 {page_height:.2f} 0 0 cm /Im0 Do Q"
+        resources = f"/XObject << /Im0 {image_id} 0 R >>"
+        if hocr_path is not None:
+            hocr_size, words = read_hocr_words(hocr_path)
+            if words:
+                # hOCR мог быть получен с изображения другого размера
+                word_scale = scale * width / hocr_size[0] if hocr_size else scale
+                content += "\n" + _make_text_layer(words, word_scale, page_height)
+                resources += f" /Font << /F1 {self._get_font_id()} 0 R >>"
+
+        content_id = self._new_id()
+        self._write_object(content_id, "/Filter /FlateDecode", zlib.compress(content.encode("ascii")))
+
+        page_id = self._new_id()
+        self._write_object(
+            page_id,
+            f"<< /Type /Page /Parent {self.PAGES_ID} 0 R /MediaBox [0 0 {page_width:.2f} {page_height:.2f}] "
+            f"/Resources << {resources} >> /Contents {content_id} 0 R >>",
+        )
+        self._page_ids.append(page_id)
+
+    def close(self):
+        kids = " ".join(f"{page_id} 0 R" for page_id in self._page_ids)
+        self._write_object(self.PAGES_ID, f"<< /Type /Pages /Kids [{kids}] /Count {len(self._page_ids)} >>")
+        self._write_object(self.CATALOG_ID, f"<< /Type /Catalog /Pages {self.PAGES_ID} 0 R >>")
+
+        xref_offset = self._file.tell()
+        xref = [f"xref\n0 {self._next_id}\n", "0000000000 65535 f \n"]
+        xref += [f"{self._offsets[obj_id]:010d} 00000 n \n" for obj_id in range(1, self._next_id)]
+        xref.append(
+            f"trailer\n<< /Size {self._next_id} /Root {self.CATALOG_ID} 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n"
+        )
+        self._file.write("".join(xref).encode("ascii"))
+        self._file.close()
+        os.replace(self._tmp_path, self.output_path)
@@ -0,0 +1,96 @@
+"""
+Цепочка шагов предобработки страницы в памяти: изображение читается один раз, между шагами передаются
+массивы NumPy, на диск пишется только результат (и промежуточные шаги при debug).
+
+Шаг - функция image -> [(суффикс имени, image), ...]: split_book делит разворот на две страницы,
+остальные шаги возвращают одно изображение с пустым суффиксом.
+"""
+import os
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from .apply_img_filters import apply_processing_steps
+from .config import DEFAULT_PROCESS_STEPS
+from .cv.io import load_image, save_image
+from .rotate_img import rotate_array
+from .smooth_img import smooth_array, unpaper_array
+from .split_book_layout import split_book_array
+from .standartize import standardize_array_width
+
+
+def to_grayscale(image):
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+
+
+def _split_step(image):
+    return split_book_array(image)
+
+
+def _rotate_step(image):
+    # страница без найденного контура остается как есть
+    rotated_image = rotate_array(image)
+    return [("", image if rotated_image is None else rotated_image)]
+
+
+def _smooth_step(image):
+    return [("", smooth_array(to_grayscale(image)))]
+
+
+def _unpaper_step(image):
+    return [("", unpaper_array(to_grayscale(image)))]
+
+
+def _standartize_step(image):
+    return [("", standardize_array_width(image))]
+
+
+def _filters_step(image):
+    filtered_image, _ = apply_processing_steps(Image.fromarray(to_grayscale(image)), DEFAULT_PROCESS_STEPS)
+    return [("", np.asarray(filtered_image))]
+
+
+PIPELINE_STEPS = {
+    "split": _split_step,
+    "unpaper": _unpaper_step,
+    "rotate": _rotate_step,
+    "smooth": _smooth_step,
+    "filters": _filters_step,
+    "standartize": _standartize_step,
+}
+
+
+def run_pipeline(image, steps, on_step=None):
+    """
+    :param steps: имена шагов из PIPELINE_STEPS по порядку
+    :param on_step: вызывается после каждого шага как on_step(номер шага, имя шага, суффикс, image)
+    :return: [(суффикс имени, image), ...]
+    """
+    images = [("", image)]
+    for step_num, step_name in enumerate(steps, start=1):
+        step = PIPELINE_STEPS[step_name]
+        images = [(suffix + step_suffix, result) for suffix, img in images for step_suffix, result in step(img)]
+        if on_step is not None:
+            for suffix, img in images:
+                on_step(step_num, step_name, suffix, img)
+    return images
+
+
+def pipeline_processing(file_path, output_dir, steps=(), debug=False, **kwargs):
+    """Прогоняет страницу через steps; результат - {name}{суффикс}{ext} в output_dir, шаги - в {output_dir}__debug."""
+    name, ext = os.path.splitext(os.path.basename(file_path))
+    on_step = None
+    if debug:
+        debug_dir = f"{output_dir}__debug"
+        os.makedirs(debug_dir, exist_ok=True)
+
+        def on_step(step_num, step_name, suffix, img):
+            save_image(img, filepath=os.path.join(debug_dir, f"{name}{suffix}_{step_num:02d}_{step_name}{ext}"))
+
+    output_paths = []
+    for suffix, img in run_pipeline(load_image(file_path), steps, on_step=on_step):
+        output_path = os.path.join(output_dir, f"{name}{suffix}{ext}")
+        save_image(img, filepath=output_path)
+        output_paths.append(output_path)
+    return output_paths
@@ -40,21 +40,30 @@ def draw_lines(image, box):
         cv2.line(image, tuple(box[idx1]), tuple(box[idx2]), color, 2)
 
 
-def rotate_image(file_path, output_dir, plot=False, **kwargs):
-    image = load_image(file_path)
+def rotate_array(image, plot=False):
+    """:return: выровненное по основному контуру изображение или None, если контур не найден"""
     blurred_image, binary_image = apply_gaussian_blur_and_threshold(
         gray_image=convert_to_grayscale(image), blur_size=ROTATE_GAUSSIAN_BLUR_SIZE
     )
     primary_contour = find_primary_contour(binary_image)
+    if primary_contour is None:
+        return None
 
-    if primary_contour is not None:
-        rotation_matrix, rect = determine_rotation_angle(primary_contour)
-        rotated_image, rotated_box = apply_rotate(image, rotation_matrix=rotation_matrix, rect=rect)
+    rotation_matrix, rect = determine_rotation_angle(primary_contour)
+    rotated_image, rotated_box = apply_rotate(image, rotation_matrix=rotation_matrix, rect=rect)
+
+    if plot:
         drawn_image = draw_lines_on_image(rotated_image, rotated_box)
+        show_rotation_steps(image, blurred_image, rotated_image, drawn_image)
+
+    return rotated_image
 
-        if plot:
-            show_rotation_steps(image, blurred_image, rotated_image, drawn_image)
 
+def rotate_image(file_path, output_dir, plot=False, **kwargs):
+    image = load_image(file_path)
+    rotated_image = rotate_array(image, plot=plot)
+
+    if rotated_image is not None:
         base_name = os.path.basename(file_path)
         name, ext = os.path.splitext(base_name)
         rotated_img_path = os.path.join(output_dir, f"{name}_rotated{ext}")
@@ -3,6 +3,7 @@ import os.path
 import shlex
 import shutil
 import subprocess
+import tempfile
 
 import cv2
 import numpy as np
@@ -43,8 +44,7 @@ UNPAPER_NI = 8
 #     save_image(output_image, filepath=os.path.join(debug_dir, f'04_f_output_image.{ext}'))
 
 
-def smooth_contours(file_path, output_dir, debug=True, **kwargs):
-    gray_image = load_grayscale_image(file_path)
+def smooth_array(gray_image):
     _, binary_image = apply_gaussian_blur_and_threshold(gray_image=gray_image, blur_size=SMOOTH_GAUSSIAN_BLUR_SIZE)
     outliers_contours = find_outliers_contours_on_image(binary_image)
 
@@ -53,7 +53,11 @@ def smooth_contours(file_path, output_dir, debug=True, **kwargs):
     inverted = cv2.bitwise_not(mask)
     inverted_contours = find_outliers_contours_on_image(inverted)
 
-    output_image = fill_contours_on_image(gray_image, inverted_contours, inplace=False)
+    return fill_contours_on_image(gray_image, inverted_contours, inplace=False)
+
+
+def smooth_contours(file_path, output_dir, debug=True, **kwargs):
+    output_image = smooth_array(load_grayscale_image(file_path))
 
     base_name = os.path.basename(file_path)
     name, ext = os.path.splitext(base_name)
@@ -63,19 +67,16 @@ def smooth_contours(file_path, output_dir, debug=True, **kwargs):
     return smoothed_img_path
 
 
-def unpaper_processing(file_path, output_dir, debug=False, **kwargs):
-    if output_dir:
-        os.makedirs(output_dir, exist_ok=True)
-        shutil.copy(file_path, output_dir)
-        file_path = os.path.join(output_dir, os.path.basename(file_path))
-
-    commands = [
+def _get_unpaper_commands(file_path):
+    # результат - {file_path}.unpaper.pnm
+    return [
         f"{IMAGE_MAGICK_CMD} -density {DENSITY} -resize {RESIZE_WIDTH}x{RESIZE_HEIGHT} -depth {DEPTH} -colorspace {COLORSPACE} -sharpen {SHARPEN_FACTOR} {file_path} {file_path}",
         f"{IMAGE_MAGICK_CMD} -black-threshold {BLACK_THRESHOLD_PERCENT} -white-threshold {WHITE_THRESHOLD_PERCENT} {file_path} {file_path}.pnm",
         f"{UNPAPER_CMD} --layout single --black-threshold {UNPAPER_BLACK_THRESHOLD} -ni {UNPAPER_NI} {file_path}.pnm {file_path}.unpaper.pnm",
-        f"{IMAGE_MAGICK_CMD} {file_path}.unpaper.pnm {file_path}"
     ]
 
+
+def _run_commands(commands, debug=False):
     for cmd in commands:
         try:
             if debug:
@@ -97,5 +98,23 @@ def unpaper_processing(file_path, output_dir, debug=False, **kwargs):
             logging.error(error_msg)
             raise Exception(error_msg)
 
+
+def unpaper_processing(file_path, output_dir, debug=False, **kwargs):
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+        shutil.copy(file_path, output_dir)
+        file_path = os.path.join(output_dir, os.path.basename(file_path))
+
+    _run_commands([*_get_unpaper_commands(file_path), f"{IMAGE_MAGICK_CMD} {file_path}.unpaper.pnm {file_path}"], debug)
+
     os.remove(f"{file_path}.pnm")
     os.remove(f"{file_path}.unpaper.pnm")
+
+
+def unpaper_array(gray_image, debug=False):
+    """unpaper и convert работают только с файлами: страница проходит через временный PGM без сжатия."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "page.pgm")
+        save_image(gray_image, filepath=file_path)
+        _run_commands(_get_unpaper_commands(file_path), debug)
+        return load_grayscale_image(f"{file_path}.unpaper.pnm")
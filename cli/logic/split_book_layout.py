@@ -30,19 +30,11 @@ def plot_images(original, detected_line, left, right):
     plt.show()
 
 
-def split_book_processing(file_path, output_dir=None, plot=False, **kwargs):
-    # Save the left and right images
-    base_name = os.path.basename(file_path)
-    name, ext = os.path.splitext(base_name)
-
-    # Load the image
-    img = load_image(file_path)
-
+def split_book_array(img, plot=False):
+    """:return: [(суффикс имени, изображение), ...] - разворот делится на левую и правую страницы"""
     width, height = img.shape[0], img.shape[1]
     if width > height:
-        orig_img_out_path = os.path.join(output_dir, base_name)
-        save_image(img, filepath=orig_img_out_path)
-        return
+        return [("", img)]
 
     # Preprocess the image
     edges = detect_edges(gray_image=convert_to_grayscale(img))
@@ -57,14 +49,23 @@ def split_book_processing(file_path, output_dir=None, plot=False, **kwargs):
     # Split the image into a left and right part based on the center line
     left_img, right_img = split_image(img, center_line)
 
-    left_img_path = os.path.join(output_dir, f"{name}_left{ext}")
-    right_img_path = os.path.join(output_dir, f"{name}_right{ext}")
-    save_image(left_img, filepath=left_img_path)
-    save_image(right_img, filepath=right_img_path)
-
     if plot:
         plot_images(img, edges, left_img, right_img)
 
+    return [("_left", left_img), ("_right", right_img)]
+
+
+def split_book_processing(file_path, output_dir=None, plot=False, **kwargs):
+    # Save the left and right images
+    base_name = os.path.basename(file_path)
+    name, ext = os.path.splitext(base_name)
+
+    # Load the image
+    img = load_image(file_path)
+
+    for suffix, part_img in split_book_array(img, plot=plot):
+        save_image(part_img, filepath=os.path.join(output_dir, f"{name}{suffix}{ext}"))
+
 
 # Example usage (uncomment and modify paths as needed):
 # if __name__ == "__main__":
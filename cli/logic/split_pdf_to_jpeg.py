@@ -0,0 +1,66 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import fitz
+from PIL import Image
+from tqdm import tqdm
+
+# формат -> (расширение, параметры PIL.Image.save); quality используется только для JPEG
+OUTPUT_FORMATS = {
+    "jpeg": ("jpg", {"format": "JPEG"}),
+    "png": ("png", {"format": "PNG", "compress_level": 1}),
+    "tiff": ("tif", {"format": "TIFF", "compression": "tiff_deflate"}),
+}
+
+
+def get_page_ranges(total_pages, workers, shards_per_worker=4):
+    """Делит страницы на непрерывные диапазоны, по несколько на процесс - чтобы прогресс-бар не стоял на месте."""
+    if total_pages <= 0:
+        return []
+    shard_count = max(1, min(total_pages, workers * shards_per_worker))
+    shard_size = -(-total_pages // shard_count)
+    return [(start, min(start + shard_size, total_pages)) for start in range(0, total_pages, shard_size)]
+
+
+def render_page_range(input_file_path, output_dir, page_range, dpi=300, output_format="jpeg", quality=100, gray=True):
+    """Рендерит страницы [start, end), документ открывается в каждом процессе отдельно."""
+    ext, save_kwargs = OUTPUT_FORMATS[output_format]
+    if output_format == "jpeg":
+        save_kwargs = {**save_kwargs, "quality": quality}
+    colorspace = fitz.csGRAY if gray else fitz.csRGB
+
+    with fitz.open(input_file_path) as pdf_document:
+        for page_number in range(*page_range):
+            pix = pdf_document.load_page(page_number).get_pixmap(dpi=dpi, colorspace=colorspace, alpha=False)
+
+            image = Image.frombytes("L" if gray else "RGB", [pix.width, pix.height], pix.samples)
+            image_path = os.path.join(output_dir, f"page_{page_number + 1:03d}.{ext}")
+            image.save(image_path, **save_kwargs)
+
+    return page_range[1] - page_range[0]
+
+
+def split_pdf_to_jpeg_processing(
+    input_file_path, output_dir, dpi=300, output_format="jpeg", quality=100, gray=True, max_workers=None
+):
+    os.makedirs(output_dir, exist_ok=True)
+
+    with fitz.open(input_file_path) as pdf_document:
+        total_pages = len(pdf_document)
+    if total_pages == 0:
+        print(f"No pages in {input_file_path}")
+        return
+
+    max_workers = max_workers or os.cpu_count()
+    page_ranges = get_page_ranges(total_pages, max_workers)
+
+    with tqdm(total=total_pages, desc="Converting PDF to images", unit="page") as pbar:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(
+                    render_page_range, input_file_path, output_dir, page_range, dpi, output_format, quality, gray
+                )
+                for page_range in page_ranges
+            ]
+            for future in as_completed(futures):
+                pbar.update(future.result())
@@ -1,5 +1,6 @@
 import os
 
+import numpy as np
 from PIL import Image
 
 STANDARD_WIDTH = 2481
@@ -32,3 +33,16 @@ def standardize_img_width(file_path, output_dir=None, standard_width=STANDARD_WI
 
     output_path = os.path.join(output_dir, os.path.basename(file_path))
     new_image.save(output_path)
+
+
+def standardize_array_width(image, standard_width=STANDARD_WIDTH):
+    """То же для массива: белые поля слева и справа или обрезка по центру."""
+    width = image.shape[1]
+    if width < standard_width:
+        offset = (standard_width - width) // 2
+        pad = [(0, 0), (offset, standard_width - width - offset)] + [(0, 0)] * (image.ndim - 2)
+        return np.pad(image, pad, constant_values=255)
+    if width > standard_width:
+        offset = (width - standard_width) // 2
+        return image[:, offset : offset + standard_width]
+    return image
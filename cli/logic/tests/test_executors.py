@@ -0,0 +1,131 @@
+import os
+import threading
+import time
+import unittest
+
+import click
+import cv2
+from click.testing import CliRunner
+
+from ..executors import (
+    COMMAND_PROFILES,
+    DEFAULT_OPTIONS,
+    Backend,
+    ExecutorOptions,
+    executor_options,
+    get_executor_options,
+    run_tasks,
+)
+
+
+def square_later(value, delay):
+    # первые задачи завершаются последними - порядок результатов не должен зависеть от порядка завершения
+    time.sleep(delay)
+    return value * value, os.getpid(), threading.get_ident()
+
+
+def fail_on(value, bad_value):
+    if value == bad_value:
+        raise ValueError(f"bad value {value}")
+    return value
+
+
+def get_cv_threads():
+    return cv2.getNumThreads()
+
+
+def rotate_image():
+    pass
+
+
+def unknown_processing():
+    pass
+
+
+class TestRunTasks(unittest.TestCase):
+    tasks = [(value, 0.01 * (8 - value)) for value in range(8)]
+
+    def run_backend(self, backend, chunk_size=1):
+        options = ExecutorOptions(backend=backend, max_workers=4, chunk_size=chunk_size)
+        return run_tasks(square_later, self.tasks, options)
+
+    def test_inline(self):
+        results = self.run_backend(Backend.INLINE, chunk_size=3)
+        self.assertEqual([square for square, _, _ in results], [value * value for value in range(8)])
+        self.assertEqual({(pid, thread_id) for _, pid, thread_id in results}, {(os.getpid(), threading.get_ident())})
+
+    def test_thread(self):
+        results = self.run_backend(Backend.THREAD)
+        self.assertEqual([square for square, _, _ in results], [value * value for value in range(8)])
+        self.assertEqual({pid for _, pid, _ in results}, {os.getpid()})
+        self.assertNotIn(threading.get_ident(), {thread_id for _, _, thread_id in results})
+
+    def test_process(self):
+        results = self.run_backend(Backend.PROCESS, chunk_size=3)
+        self.assertEqual([square for square, _, _ in results], [value * value for value in range(8)])
+        self.assertNotIn(os.getpid(), {pid for _, pid, _ in results})
+
+    def test_no_tasks(self):
+        self.assertEqual(run_tasks(square_later, [], ExecutorOptions()), [])
+
+    def test_error_is_raised(self):
+        for backend in Backend:
+            with self.subTest(backend=backend):
+                with self.assertRaisesRegex(ValueError, "bad value 3"):
+                    run_tasks(fail_on, [(value, 3) for value in range(5)], ExecutorOptions(backend=backend))
+
+    def test_cv_threads_restored(self):
+        cv_threads = cv2.getNumThreads()
+        for backend in (Backend.INLINE, Backend.THREAD):
+            with self.subTest(backend=backend):
+                options = ExecutorOptions(backend=backend, max_workers=2, cv_threads=cv_threads + 1)
+                self.assertEqual(run_tasks(get_cv_threads, [()] * 3, options), [cv_threads + 1] * 3)
+                self.assertEqual(cv2.getNumThreads(), cv_threads)
+
+    def test_cv_threads_in_worker_processes(self):
+        cv_threads = cv2.getNumThreads()
+        options = ExecutorOptions(backend=Backend.PROCESS, max_workers=2, cv_threads=cv_threads + 1)
+        self.assertEqual(run_tasks(get_cv_threads, [()] * 3, options), [cv_threads + 1] * 3)
+        self.assertEqual(cv2.getNumThreads(), cv_threads)
+
+
+class TestExecutorOptions(unittest.TestCase):
+    def test_profiles(self):
+        self.assertEqual(get_executor_options(rotate_image), COMMAND_PROFILES["rotate_image"])
+        self.assertEqual(get_executor_options(rotate_image).backend, Backend.PROCESS)
+        self.assertEqual(get_executor_options(unknown_processing), DEFAULT_OPTIONS)
+
+    def test_overrides(self):
+        options = get_executor_options(
+            rotate_image, {"backend": Backend.INLINE, "max_workers": None, "chunk_size": 4, "cv_threads": None}
+        )
+        self.assertEqual(options, ExecutorOptions(backend=Backend.INLINE, chunk_size=4, cv_threads=1))
+
+    def test_max_workers(self):
+        self.assertEqual(ExecutorOptions(max_workers=3).get_max_workers(), 3)
+        self.assertEqual(ExecutorOptions(backend=Backend.PROCESS).get_max_workers(), os.cpu_count())
+        self.assertEqual(ExecutorOptions(backend=Backend.THREAD).get_max_workers(), max(1, os.cpu_count() // 2))
+
+    def test_click_options(self):
+        @click.command()
+        @click.option("--input-dir", "-i", default=None)
+        @executor_options
+        def command(input_dir, executor):
+            click.echo(f"{input_dir} {get_executor_options(rotate_image, executor)}")
+
+        runner = CliRunner()
+        result = runner.invoke(command, ["-i", "pages"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(result.output, f"pages {COMMAND_PROFILES['rotate_image']}\n")
+
+        result = runner.invoke(command, ["--backend", "thread", "-w", "2", "--chunk-size", "5", "--cv-threads", "0"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        expected = ExecutorOptions(backend=Backend.THREAD, max_workers=2, chunk_size=5, cv_threads=0)
+        self.assertEqual(result.output, f"None {expected}\n")
+
+        result = runner.invoke(command, ["--backend", "gpu"])
+        self.assertEqual(result.exit_code, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
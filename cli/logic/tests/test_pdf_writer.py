@@ -0,0 +1,112 @@
+import os
+import tempfile
+import unittest
+
+import fitz
+from PIL import Image
+from pypdf import PdfReader
+
+from ..pdf_writer import GLYPHLESS_FONT, StreamingPdfWriter, read_hocr_words
+
+HOCR_PAGE = """<?xml version="1.0" encoding="UTF-8"?>
+<html xmlns="http://www.w3.org/1999/xhtml">
+ <head><title></title></head>
+ <body>
+  <div class='ocr_page' id='page_1' title='image "page.jpg"; bbox 0 0 {width} {height}; ppageno 0'>
+   <span class='ocr_line' id='line_1_1' title="bbox 20 20 280 60">
+    <span class='ocrx_word' id='word_1_1' title='bbox 20 20 120 60; x_wconf 96'>Адыгэ</span>
+    <span class='ocrx_word' id='word_1_2' title='bbox 140 20 280 60; x_wconf 91'>тхылъ</span>
+   </span>
+  </div>
+ </body>
+</html>
+"""
+
+
+class TestStreamingPdfWriter(unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.tmp_dir = self._tmp_dir.name
+        self.image = Image.linear_gradient("L").resize((300, 200))
+        fitz.TOOLS.mupdf_warnings()  # сбросить накопленные предупреждения
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def _write_pdf(self, pages):
+        output_path = os.path.join(self.tmp_dir, "book.pdf")
+        with StreamingPdfWriter(output_path) as writer:
+            for image_path, hocr_path in pages:
+                writer.add_image_page(image_path, dpi=150, hocr_path=hocr_path)
+        return output_path
+
+    def test_jpeg_pages_with_text_layer(self):
+        image_path = os.path.join(self.tmp_dir, "page.jpg")
+        self.image.save(image_path, format="JPEG", quality=90)
+        hocr_path = os.path.join(self.tmp_dir, "page.hocr")
+        with open(hocr_path, "w", encoding="utf-8") as f:
+            f.write(HOCR_PAGE.format(width=300, height=200))
+
+        output_path = self._write_pdf([(image_path, hocr_path), (image_path, None)])
+        self.assertFalse(os.path.exists(f"{output_path}.tmp"))
+
+        # strict: любая ошибка в xref или структуре - исключение, а не молчаливое восстановление
+        reader = PdfReader(output_path, strict=True)
+        self.assertEqual(len(reader.pages), 2)
+        self.assertEqual(reader.pages[0].extract_text().split(), ["Адыгэ", "тхылъ"])
+
+        with fitz.open(output_path) as doc, open(image_path, "rb") as f:
+            self.assertFalse(doc.is_repaired)
+            self.assertEqual(fitz.TOOLS.mupdf_warnings(), "")
+            self.assertEqual(doc.page_count, 2)
+
+            page = doc[0]
+            # 300x200 px при 150 dpi
+            self.assertEqual((page.rect.width, page.rect.height), (144, 96))
+            image_xref = page.get_images()[0][0]
+            self.assertEqual(doc.xref_get_key(image_xref, "Filter"), ("name", "/DCTDecode"))
+            self.assertEqual(doc.xref_stream_raw(image_xref), f.read())
+
+            # шрифт текстового слоя встроен: ext "ttf", а не "n/a"
+            [(font_xref, font_ext, font_type, font_name, _, _)] = page.get_fonts()
+            self.assertEqual((font_ext, font_type, font_name), ("ttf", "Type0", "GlyphLessFont"))
+            self.assertEqual(doc.extract_font(font_xref)[3], GLYPHLESS_FONT)
+
+            words = page.get_text("words")
+            self.assertEqual([word[4] for word in words], ["Адыгэ", "тхылъ"])
+            x0, y0, x1, y1 = words[0][:4]
+            self.assertAlmostEqual(x0, 20 * 72 / 150, delta=1)
+            self.assertAlmostEqual(x1, 120 * 72 / 150, delta=1)
+            self.assertEqual(doc[1].get_text().strip(), "")
+
+    def test_png_page_is_lossless(self):
+        image_path = os.path.join(self.tmp_dir, "page.png")
+        self.image.save(image_path)
+
+        with fitz.open(self._write_pdf([(image_path, None)])) as doc:
+            self.assertFalse(doc.is_repaired)
+            image_xref = doc[0].get_images()[0][0]
+            self.assertEqual(doc.xref_get_key(image_xref, "Filter"), ("name", "/FlateDecode"))
+            self.assertEqual(fitz.Pixmap(doc, image_xref).samples, self.image.tobytes())
+
+    def test_error_removes_tmp_file(self):
+        output_path = os.path.join(self.tmp_dir, "book.pdf")
+        with self.assertRaises(FileNotFoundError):
+            with StreamingPdfWriter(output_path) as writer:
+                writer.add_image_page(os.path.join(self.tmp_dir, "missing.jpg"))
+
+        self.assertEqual(os.listdir(self.tmp_dir), [])
+
+    def test_read_hocr_words(self):
+        hocr_path = os.path.join(self.tmp_dir, "page.hocr")
+        with open(hocr_path, "w", encoding="utf-8") as f:
+            f.write(HOCR_PAGE.format(width=600, height=400))
+
+        page_size, words = read_hocr_words(hocr_path)
+
+        self.assertEqual(page_size, (600, 400))
+        self.assertEqual(words, [("Адыгэ", (20, 20, 120, 60)), ("тхылъ", (140, 20, 280, 60))])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import cv2
+import numpy as np
+
+from ..pipeline import PIPELINE_STEPS, pipeline_processing, run_pipeline
+from ..standartize import STANDARD_WIDTH
+
+
+def fake_split(image):
+    half = image.shape[1] // 2
+    return [("_left", image[:, :half]), ("_right", image[:, half:])]
+
+
+def fake_invert(image):
+    return [("", 255 - image)]
+
+
+FAKE_STEPS = {"split": fake_split, "invert": fake_invert}
+
+
+class TestRunPipeline(unittest.TestCase):
+    def setUp(self):
+        self.image = np.zeros((20, 40), dtype=np.uint8)
+        self.image[:, 20:] = 100
+
+    def test_split_suffixes(self):
+        calls = []
+        with mock.patch.dict(PIPELINE_STEPS, FAKE_STEPS):
+            images = run_pipeline(
+                self.image,
+                ["split", "invert", "split"],
+                on_step=lambda step_num, step_name, suffix, img: calls.append((step_num, step_name, suffix)),
+            )
+
+        self.assertEqual([suffix for suffix, _ in images], ["_left_left", "_left_right", "_right_left", "_right_right"])
+        self.assertEqual([img.shape for _, img in images], [(20, 10)] * 4)
+        self.assertEqual([int(img[0, 0]) for _, img in images], [255, 255, 155, 155])
+        self.assertEqual(
+            calls,
+            [
+                (1, "split", "_left"),
+                (1, "split", "_right"),
+                (2, "invert", "_left"),
+                (2, "invert", "_right"),
+                (3, "split", "_left_left"),
+                (3, "split", "_left_right"),
+                (3, "split", "_right_left"),
+                (3, "split", "_right_right"),
+            ],
+        )
+
+    def test_no_steps(self):
+        self.assertEqual(run_pipeline(self.image, []), [("", self.image)])
+
+    def test_standartize(self):
+        [(suffix, image)] = run_pipeline(self.image, ["standartize"])
+        self.assertEqual(suffix, "")
+        self.assertEqual(image.shape, (20, STANDARD_WIDTH))
+
+
+class TestPipelineProcessing(unittest.TestCase):
+    def test_outputs_and_debug(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_path = os.path.join(tmp_dir, "page_001.png")
+            cv2.imwrite(file_path, np.full((20, 40), 200, dtype=np.uint8))
+            output_dir = os.path.join(tmp_dir, "processed")
+            os.makedirs(output_dir)
+
+            with mock.patch.dict(PIPELINE_STEPS, FAKE_STEPS):
+                output_paths = pipeline_processing(file_path, output_dir, steps=["split", "invert"], debug=True)
+
+            self.assertEqual(
+                output_paths,
+                [os.path.join(output_dir, "page_001_left.png"), os.path.join(output_dir, "page_001_right.png")],
+            )
+            self.assertEqual(
+                sorted(os.listdir(f"{output_dir}__debug")),
+                [
+                    "page_001_left_01_split.png",
+                    "page_001_left_02_invert.png",
+                    "page_001_right_01_split.png",
+                    "page_001_right_02_invert.png",
+                ],
+            )
+            result = cv2.imread(output_paths[0], cv2.IMREAD_GRAYSCALE)
+            self.assertEqual(result.shape, (20, 20))
+            self.assertEqual(int(result[0, 0]), 55)
+
+    def test_no_debug_dir(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_path = os.path.join(tmp_dir, "page_001.png")
+            cv2.imwrite(file_path, np.full((20, 40), 200, dtype=np.uint8))
+
+            with mock.patch.dict(PIPELINE_STEPS, FAKE_STEPS):
+                pipeline_processing(file_path, tmp_dir, steps=["invert"])
+
+            self.assertEqual(sorted(os.listdir(tmp_dir)), ["page_001.png"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+
+import fitz
+
+from ..split_pdf_to_jpeg import get_page_ranges, split_pdf_to_jpeg_processing
+
+
+class TestPageRanges(unittest.TestCase):
+    def assert_covers(self, page_ranges, total_pages):
+        pages = [page for start, end in page_ranges for page in range(start, end)]
+        self.assertEqual(pages, list(range(total_pages)))
+        self.assertTrue(all(start < end for start, end in page_ranges))
+
+    def test_no_pages(self):
+        self.assertEqual(get_page_ranges(0, 4), [])
+
+    def test_fewer_pages_than_shards(self):
+        page_ranges = get_page_ranges(3, 4)
+        self.assertEqual(page_ranges, [(0, 1), (1, 2), (2, 3)])
+
+    def test_shards_per_worker(self):
+        page_ranges = get_page_ranges(100, 2)
+        self.assert_covers(page_ranges, 100)
+        self.assertEqual(len(page_ranges), 8)
+        self.assertEqual({end - start for start, end in page_ranges}, {13, 9})
+
+    def test_uneven_split(self):
+        for total_pages in (1, 7, 33, 150):
+            for workers in (1, 3, 8):
+                with self.subTest(total_pages=total_pages, workers=workers):
+                    page_ranges = get_page_ranges(total_pages, workers)
+                    self.assert_covers(page_ranges, total_pages)
+                    self.assertLessEqual(len(page_ranges), workers * 4)
+
+
+class TestSplitPdfToJpeg(unittest.TestCase):
+    def test_render_pages(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pdf_path = os.path.join(tmp_dir, "book.pdf")
+            doc = fitz.open()
+            for page_num in range(3):
+                doc.new_page(width=144, height=72).insert_text((10, 40), f"page {page_num + 1}")
+            doc.save(pdf_path)
+            doc.close()
+
+            output_dir = os.path.join(tmp_dir, "pngs")
+            split_pdf_to_jpeg_processing(pdf_path, output_dir, dpi=72, output_format="png", max_workers=2)
+
+            self.assertEqual(sorted(os.listdir(output_dir)), ["page_001.png", "page_002.png", "page_003.png"])
+            self.assertEqual(fitz.Pixmap(os.path.join(output_dir, "page_003.png")).width, 144)
+
+
+if __name__ == "__main__":
+    unittest.main()
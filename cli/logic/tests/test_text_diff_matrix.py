@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from ..text_diff_matrix import PairDistanceCache, compute_error_rate_matrices, read_texts, write_matrix
+
+
+def write_texts(tmp_dir, contents):
+    file_paths = []
+    for name, content in contents.items():
+        file_path = os.path.join(tmp_dir, name)
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        file_paths.append(file_path)
+    return file_paths
+
+
+class TestPairDistanceCache(unittest.TestCase):
+    def test_key_does_not_depend_on_pair_order(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = PairDistanceCache(os.path.join(tmp_dir, "cache"))
+            self.assertIsNone(cache.get("aa", "bb"))
+
+            cache.put("bb", "aa", {"char_distance": 1, "word_distance": 2})
+
+            self.assertEqual(os.listdir(cache.cache_dir), ["v1_aa_bb.json"])
+            self.assertEqual(cache.get("aa", "bb"), {"char_distance": 1, "word_distance": 2})
+            self.assertEqual(cache.get("bb", "aa"), {"char_distance": 1, "word_distance": 2})
+
+
+class TestErrorRateMatrices(unittest.TestCase):
+    def test_read_texts_hash_by_content(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_paths = write_texts(tmp_dir, {"a.txt": "адыгэ тхылъ", "b.txt": "адыгэ тхылъ", "c.txt": "адыгэ"})
+            texts = read_texts(file_paths)
+
+        self.assertEqual([name for name, _, _ in texts], ["a.txt", "b.txt", "c.txt"])
+        self.assertEqual(texts[0][1], texts[1][1])
+        self.assertNotEqual(texts[0][1], texts[2][1])
+        self.assertEqual(texts[2][2], "адыгэ")
+
+    def test_matrix_values(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_paths = write_texts(tmp_dir, {"a.txt": "abcd ef", "b.txt": "abce ef gh", "c.txt": "abcd ef"})
+            cer_matrix, wer_matrix = compute_error_rate_matrices(
+                read_texts(file_paths), os.path.join(tmp_dir, "cache"), max_workers=1
+            )
+
+            output_file = os.path.join(tmp_dir, "cer_matrix.tsv")
+            write_matrix(output_file, ["a.txt", "b.txt", "c.txt"], cer_matrix)
+            with open(output_file, encoding="utf-8") as f:
+                lines = f.read().splitlines()
+
+        # a -> b: замена d/e и вставка " gh"; делится на длину эталона (строки)
+        self.assertEqual(cer_matrix[0][1], 4 / 7)
+        self.assertEqual(cer_matrix[1][0], 4 / 10)
+        self.assertEqual(wer_matrix[0][1], 2 / 2)
+        self.assertEqual(wer_matrix[1][0], 2 / 3)
+        # одинаковое содержимое и диагональ
+        self.assertEqual(cer_matrix[0][2], 0.0)
+        self.assertEqual(wer_matrix[2][0], 0.0)
+        self.assertEqual([cer_matrix[i][i] for i in range(3)], [0.0, 0.0, 0.0])
+        self.assertEqual(lines[0], "\ta.txt\tb.txt\tc.txt")
+        self.assertEqual(lines[1], "a.txt\t0.0000\t0.5714\t0.0000")
+
+    def test_cached_pairs_are_not_recomputed(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_dir = os.path.join(tmp_dir, "cache")
+            file_paths = write_texts(tmp_dir, {"a.txt": "abcd", "b.txt": "abce"})
+            compute_error_rate_matrices(read_texts(file_paths), cache_dir, max_workers=1)
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+            with mock.patch(f"{compute_error_rate_matrices.__module__}.ProcessPoolExecutor") as executor:
+                cer_matrix, _ = compute_error_rate_matrices(read_texts(file_paths), cache_dir, max_workers=1)
+            executor.assert_not_called()
+            self.assertEqual(cer_matrix[0][1], 1 / 4)
+
+            # текст с уже известным содержимым не добавляет пар, новый - только пары с ним
+            file_paths += write_texts(tmp_dir, {"c.txt": "abcd"})
+            with mock.patch(f"{compute_error_rate_matrices.__module__}.ProcessPoolExecutor") as executor:
+                compute_error_rate_matrices(read_texts(file_paths), cache_dir, max_workers=1)
+            executor.assert_not_called()
+
+            file_paths += write_texts(tmp_dir, {"d.txt": "abcf"})
+            compute_error_rate_matrices(read_texts(file_paths), cache_dir, max_workers=1)
+            self.assertEqual(len(os.listdir(cache_dir)), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
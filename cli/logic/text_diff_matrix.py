@@ -0,0 +1,114 @@
+"""
+Попарное сравнение текстов (например, результатов нескольких моделей для одной страницы).
+
+Каждый файл читается и разбивается на слова один раз, расстояния Левенштейна по символам и словам для пар
+считаются в пуле процессов и кэшируются на диске по хэшам содержимого, поэтому повторное сравнение
+с добавленной моделью считает только новые пары.
+
+Матрицы CER/WER несимметричны: в ячейке [i][j] расстояние делится на длину текста i (он считается эталоном).
+"""
+import hashlib
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import Levenshtein
+
+CACHE_VERSION = 1
+
+_worker_texts = {}
+
+
+def read_texts(file_paths):
+    """
+    :return: [(имя файла, хэш содержимого, текст)]
+    """
+    texts = []
+    for file_path in file_paths:
+        with open(file_path, "rb") as f:
+            content = f.read()
+        text_hash = hashlib.blake2b(content, digest_size=16).hexdigest()
+        texts.append((os.path.basename(file_path), text_hash, content.decode("utf-8")))
+    return texts
+
+
+class PairDistanceCache:
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    def _path(self, hash_1, hash_2):
+        hash_1, hash_2 = sorted([hash_1, hash_2])
+        return os.path.join(self.cache_dir, f"v{CACHE_VERSION}_{hash_1}_{hash_2}.json")
+
+    def get(self, hash_1, hash_2):
+        path = self._path(hash_1, hash_2)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def put(self, hash_1, hash_2, distances):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(hash_1, hash_2)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(distances, f)
+        os.replace(tmp_path, path)
+
+
+def _init_worker(tokens_by_hash):
+    _worker_texts.update(tokens_by_hash)
+
+
+def _pair_distances(hashes):
+    hash_1, hash_2 = hashes
+    (chars_1, words_1), (chars_2, words_2) = _worker_texts[hash_1], _worker_texts[hash_2]
+    distances = {
+        "char_distance": Levenshtein.distance(chars_1, chars_2),
+        "word_distance": Levenshtein.distance(words_1, words_2),
+    }
+    return hash_1, hash_2, distances
+
+
+def compute_error_rate_matrices(texts, cache_dir, max_workers=None):
+    """
+    :param texts: результат read_texts
+    :return: (матрица CER, матрица WER) в порядке texts
+    """
+    tokens_by_hash = {text_hash: (text, text.split()) for _, text_hash, text in texts}
+    cache = PairDistanceCache(cache_dir)
+
+    distances_by_pair = {}
+    pairs_to_compute = []
+    for hash_1, hash_2 in itertools.combinations(sorted(tokens_by_hash), 2):
+        distances = cache.get(hash_1, hash_2)
+        if distances is None:
+            pairs_to_compute.append((hash_1, hash_2))
+        else:
+            distances_by_pair[hash_1, hash_2] = distances
+
+    if pairs_to_compute:
+        with ProcessPoolExecutor(max_workers, initializer=_init_worker, initargs=(tokens_by_hash,)) as executor:
+            for hash_1, hash_2, distances in executor.map(_pair_distances, pairs_to_compute, chunksize=8):
+                cache.put(hash_1, hash_2, distances)
+                distances_by_pair[hash_1, hash_2] = distances
+
+    cer_matrix = [[0.0] * len(texts) for _ in texts]
+    wer_matrix = [[0.0] * len(texts) for _ in texts]
+    for (i, (_, hash_i, _)), (j, (_, hash_j, _)) in itertools.permutations(enumerate(texts), 2):
+        if hash_i == hash_j:
+            continue
+        distances = distances_by_pair[min(hash_i, hash_j), max(hash_i, hash_j)]
+        chars_i, words_i = tokens_by_hash[hash_i]
+        cer_matrix[i][j] = distances["char_distance"] / max(len(chars_i), 1)
+        wer_matrix[i][j] = distances["word_distance"] / max(len(words_i), 1)
+
+    return cer_matrix, wer_matrix
+
+
+def write_matrix(output_file, names, matrix):
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write("\t".join(["", *names]) + "\n")
+        for name, row in zip(names, matrix):
+            f.write("\t".join([name, *(f"{value:.4f}" for value in row)]) + "\n")
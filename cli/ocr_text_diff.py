@@ -1,56 +1,44 @@
 import glob
 import itertools
 import os
-from difflib import Differ, HtmlDiff
 
 import click
 
+from logic.html_diff_report import write_html_diff_report
+from logic.text_diff_matrix import compute_error_rate_matrices, read_texts, write_matrix
+
 
 @click.command()
 @click.option("--directory", "-d", default=".", help="Directory path containing the files")
 @click.option("--output-dir", "-o", default=None, help="Output directory path for the HTML file")
 @click.option("--file-mask", "-m", default="*.txt", help="File mask for selecting files")
-def compare_texts(directory, output_dir, file_mask):
-    texts = []
+@click.option("--max-workers", "-w", default=None, type=int, help="Number of processes building diffs")
+@click.option("--cache-dir", "-c", default=None, help="Pair distances cache dir, default: OUTPUT_DIR/.text_diff_cache")
+@click.option("--html/--no-html", default=True, help="Write merged_diff.html in addition to the CER/WER matrices")
+def compare_texts(directory, output_dir, file_mask, max_workers, cache_dir, html):
     path = os.path.join(os.getcwd(), directory)
     file_pattern = os.path.join(path, file_mask)
-    file_paths = glob.glob(file_pattern)
-
-    for file_path in file_paths:
-        with open(file_path) as f:
-            text_i = f.read()
-            texts.append((text_i, os.path.basename(file_path)))
-
-    text_combi = list(itertools.combinations(texts, 2))
-
-    d = Differ()
-    html_diff = HtmlDiff()
-    merged_text = ""
-    different_words = []
-
-    for (text_1, n1), (text_2, n2) in text_combi:
-        diff = list(d.compare(text_1.split(), text_2.split()))
-        for word_diff in diff:
-            if word_diff.startswith("- ") or word_diff.startswith("+ "):
-                word = word_diff[2:]
-                different_words.append(word)
-
-        merged_text += html_diff.make_file(
-            fromlines=text_1.splitlines(keepends=True),
-            tolines=text_2.splitlines(keepends=True),
-            fromdesc=n1,
-            todesc=n2,
-            context=True,
-        )
-        merged_text += ""
+    file_paths = sorted(glob.glob(file_pattern))
 
     if output_dir is None:
         output_dir = directory
 
     output_path = os.path.join(os.getcwd(), output_dir)
-    output_file = os.path.join(output_path, "merged_diff.html")
-    with open(output_file, "w", encoding="utf-8") as file:
-        file.write(merged_text)
+    cache_dir = cache_dir or os.path.join(output_path, ".text_diff_cache")
+
+    texts = read_texts(file_paths)
+    names = [name for name, _, _ in texts]
+    cer_matrix, wer_matrix = compute_error_rate_matrices(texts, cache_dir, max_workers=max_workers)
+    write_matrix(os.path.join(output_path, "cer_matrix.tsv"), names, cer_matrix)
+    write_matrix(os.path.join(output_path, "wer_matrix.tsv"), names, wer_matrix)
+
+    if html:
+        file_pairs = (
+            (path_1, path_2, os.path.basename(path_1), os.path.basename(path_2))
+            for path_1, path_2 in itertools.combinations(file_paths, 2)
+        )
+        output_file = os.path.join(output_path, "merged_diff.html")
+        write_html_diff_report(output_file, file_pairs, max_workers=max_workers)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,51 @@
+import click
+
+from logic.cli_utils import generic_file_processor, get_files_to_process, validate_input_file_path_and_dir_params
+from logic.executors import executor_options
+from logic.pipeline import PIPELINE_STEPS, pipeline_processing
+
+# порядок шагов как в cli/Makefile
+DEFAULT_STEPS = "split,unpaper,rotate,filters,standartize"
+
+
+def parse_steps(ctx, param, value):
+    steps = [step.strip() for step in value.split(",") if step.strip()]
+    unknown_steps = [step for step in steps if step not in PIPELINE_STEPS]
+    if unknown_steps or not steps:
+        raise click.BadParameter(f"unknown steps {unknown_steps}, available: {', '.join(PIPELINE_STEPS)}")
+    return steps
+
+
+@click.command()
+@click.option("--input-file-path", "-i", default=None, help="Path to the input file")
+@click.option("--input-dir", "-d", default=None, help="Path to the input directory")
+@click.option("--output-dir", "-o", default=None, help="Output directory path for the processed images")
+@click.option("--file-mask", "-m", default="*.jpg", help="File mask")
+@click.option(
+    "--steps",
+    "-s",
+    default=DEFAULT_STEPS,
+    show_default=True,
+    callback=parse_steps,
+    help=f"Comma-separated processing steps in order: {', '.join(PIPELINE_STEPS)}",
+)
+@click.option("--debug", is_flag=True, default=False, help="Save the image after every step to OUTPUT_DIR__debug")
+@executor_options
+def pipeline(input_file_path, input_dir, output_dir, file_mask, steps, debug, executor):
+    if not validate_input_file_path_and_dir_params(input_file_path, input_dir):
+        return
+
+    files_to_process = get_files_to_process(input_file_path, input_dir, file_mask)
+    generic_file_processor(
+        pipeline_processing,
+        files_to_process,
+        output_dir,
+        description_prefix=" -> ".join(steps),
+        steps=steps,
+        debug=debug,
+        executor=executor,
+    )
+
+
+if __name__ == "__main__":
+    pipeline()
@@ -1,29 +1,6 @@
-import os
-
 import click
-import fitz
-from PIL import Image
-from tqdm import tqdm
-
-
-def split_pdf_to_jpeg_processing(input_file_path, output_dir, dpi=300):
-    os.makedirs(output_dir, exist_ok=True)
-
-    pdf_document = fitz.open(input_file_path)
-    total_pages = len(pdf_document)
-
-    with tqdm(total=total_pages, desc="Converting PDF to JPEG", unit="page") as pbar:
-        for page_number in range(total_pages):
-            page = pdf_document.load_page(page_number)
-            pix = page.get_pixmap(matrix=fitz.Matrix(dpi / 72, dpi / 72))
 
-            image = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-            image_path = os.path.join(output_dir, f"page_{page_number + 1:03d}.jpg")
-            image.save(image_path, "JPEG", quality=100)
-
-            pbar.update(1)
-
-    pdf_document.close()
+from logic.split_pdf_to_jpeg import OUTPUT_FORMATS, split_pdf_to_jpeg_processing
 
 
 @click.command()
@@ -34,7 +11,19 @@ def split_pdf_to_jpeg_processing(input_file_path, output_dir, dpi=300):
     default=None,
     help="Output directory path for the processed images",
 )
-def split_pdf_to_jpeg(input_file_path, output_dir):
+@click.option("--dpi", default=300, show_default=True, help="Rendering resolution")
+@click.option(
+    "--output-format",
+    "-f",
+    type=click.Choice(list(OUTPUT_FORMATS)),
+    default="jpeg",
+    show_default=True,
+    help="Output image format",
+)
+@click.option("--quality", "-q", default=100, show_default=True, help="JPEG quality")
+@click.option("--gray/--color", default=True, show_default=True, help="Render pages in grayscale")
+@click.option("--max-workers", "-w", default=None, type=int, help="Number of rendering processes")
+def split_pdf_to_jpeg(input_file_path, output_dir, dpi, output_format, quality, gray, max_workers):
     if input_file_path is None:
         click.echo("Please provide an input file path.")
         return
@@ -43,7 +32,15 @@ def split_pdf_to_jpeg(input_file_path, output_dir):
         click.echo("Please provide an output directory path.")
         return
 
-    split_pdf_to_jpeg_processing(input_file_path, output_dir)
+    split_pdf_to_jpeg_processing(
+        input_file_path,
+        output_dir,
+        dpi=dpi,
+        output_format=output_format,
+        quality=quality,
+        gray=gray,
+        max_workers=max_workers,
+    )
 
 
 if __name__ == "__main__":
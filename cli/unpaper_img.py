@@ -2,6 +2,7 @@ import click
 
 from logic.smooth_img import unpaper_processing
 from logic.cli_utils import generic_file_processor, get_files_to_process, validate_input_file_path_and_dir_params
+from logic.executors import executor_options
 
 
 @click.command()
@@ -14,12 +15,13 @@ from logic.cli_utils import generic_file_processor, get_files_to_process, valida
     help="Output directory path for the split images",
 )
 @click.option("--file-mask", "-m", default="*.jpg", help="File mask")
-def unpaper_img(input_file_path, input_dir, output_dir, file_mask):
+@executor_options
+def unpaper_img(input_file_path, input_dir, output_dir, file_mask, executor):
     if not validate_input_file_path_and_dir_params(input_file_path, input_dir):
         return
 
     files_to_process = get_files_to_process(input_file_path, input_dir, file_mask)
-    generic_file_processor(unpaper_processing, files_to_process, output_dir)
+    generic_file_processor(unpaper_processing, files_to_process, output_dir, executor=executor)
 
 
 if __name__ == "__main__":
@@ -6,7 +6,8 @@ from airflow.operators.python import PythonOperator
 from airflow.operators.trigger_dagrun import TriggerDagRunOperator
 
 from src.const import TESSTRAIN_PROJECT_DIR
-from src.image_generator import generate_images
+from src.image_generator import OutputFormatEnum, generate_images
+from src.packed_corpus import export_samples, get_pack_dir
 from src.prepare_tessdata import prepare_box_lstmf
 
 DAG_ID = "image_generate"
@@ -32,6 +33,11 @@ dag = DAG(
         "GROUP_BY": 0,
         "GROUP_BY_FACTOR": 0,
         "PAR_FACTOR": 4,
+        "EXECUTOR": "thread",
+        "CHUNK_SIZE": 100,
+        "SEED": None,
+        "OUTPUT_FORMAT": "files",
+        "LSTMF_CACHE_DIR": os.getenv("LSTMF_CACHE_DIR"),
         "TESSTRAIN_MODEL_NAME": "",
         "TESSTRAIN_START_MODEL": "rus",
         "TESSTRAIN_MAX_ITERATIONS": "20000",
@@ -55,6 +61,11 @@ def push_variables(**kwargs):
     group_by = kwargs["dag_run"].conf.get("GROUP_BY")
     group_by_factor = kwargs["dag_run"].conf.get("GROUP_BY_FACTOR")
     par_factor = kwargs["dag_run"].conf.get("PAR_FACTOR")
+    executor = kwargs["dag_run"].conf.get("EXECUTOR")
+    chunk_size = kwargs["dag_run"].conf.get("CHUNK_SIZE")
+    seed = kwargs["dag_run"].conf.get("SEED")
+    output_format = kwargs["dag_run"].conf.get("OUTPUT_FORMAT")
+    lstmf_cache_dir = kwargs["dag_run"].conf.get("LSTMF_CACHE_DIR")
 
     # ground_truth_dir = kwargs['dag_run'].conf.get('TESSTRAIN_GROUND_TRUTH_DIR')
     ground_truth_dir = output_dir
@@ -84,6 +95,11 @@ def push_variables(**kwargs):
     kwargs["ti"].xcom_push(key="GROUP_BY", value=group_by)
     kwargs["ti"].xcom_push(key="GROUP_BY_FACTOR", value=group_by_factor)
     kwargs["ti"].xcom_push(key="PAR_FACTOR", value=par_factor)
+    kwargs["ti"].xcom_push(key="EXECUTOR", value=executor)
+    kwargs["ti"].xcom_push(key="CHUNK_SIZE", value=chunk_size)
+    kwargs["ti"].xcom_push(key="SEED", value=seed)
+    kwargs["ti"].xcom_push(key="OUTPUT_FORMAT", value=output_format)
+    kwargs["ti"].xcom_push(key="LSTMF_CACHE_DIR", value=lstmf_cache_dir)
 
     kwargs["ti"].xcom_push(key="START_MODEL", value=start_model)
     kwargs["ti"].xcom_push(key="MAX_ITERATIONS", value=max_iterations)
@@ -110,6 +126,10 @@ def run_image_generate(**kwargs):
     group_by = kwargs["ti"].xcom_pull(key="GROUP_BY")
     group_by_factor = kwargs["ti"].xcom_pull(key="GROUP_BY_FACTOR")
     par_factor = kwargs["ti"].xcom_pull(key="PAR_FACTOR")
+    executor = kwargs["ti"].xcom_pull(key="EXECUTOR")
+    chunk_size = kwargs["ti"].xcom_pull(key="CHUNK_SIZE")
+    seed = kwargs["ti"].xcom_pull(key="SEED")
+    output_format = kwargs["ti"].xcom_pull(key="OUTPUT_FORMAT")
 
     subdirs = generate_images(
         text_filepath=text_filepath,
@@ -120,6 +140,10 @@ def run_image_generate(**kwargs):
         group_by=group_by,
         group_by_factor=group_by_factor,
         par_factor=par_factor,
+        executor=executor,
+        chunk_size=chunk_size,
+        seed=seed,
+        output_format=output_format,
     )
     kwargs["ti"].xcom_push(key="SUBDIRS", value=subdirs)
 
@@ -132,11 +156,19 @@ t1_image_generate = PythonOperator(
 def run_prepare_tessdata(**kwargs):
     ground_truth_dir = kwargs["ti"].xcom_pull(key="GROUND_TRUTH_DIR")
     par_factor = kwargs["ti"].xcom_pull(key="PAR_FACTOR")
+    output_format = kwargs["ti"].xcom_pull(key="OUTPUT_FORMAT")
+    lstmf_cache_dir = kwargs["ti"].xcom_pull(key="LSTMF_CACHE_DIR")
+
+    if output_format == OutputFormatEnum.PACKED.value:
+        output_dir = kwargs["ti"].xcom_pull(key="OUTPUT_DIR")
+        exported = export_samples(get_pack_dir(output_dir), ground_truth_dir)
+        print(f"Exported from packed corpus: {exported}")
 
     prepare_box_lstmf(
         ground_truth_dir=ground_truth_dir,
         walk_subdirs=False,
         par_factor=par_factor,
+        cache_dir=lstmf_cache_dir,
     )
 
 
@@ -1,6 +1,6 @@
 import os
+import subprocess
 from datetime import datetime, timedelta
-from subprocess import PIPE, Popen
 
 from airflow import DAG
 from airflow.operators.bash import BashOperator
@@ -9,6 +9,7 @@ from airflow.operators.trigger_dagrun import TriggerDagRunOperator
 
 from src.const import BASE_DAG_RESULTS_DIR, BASE_PDF_DIR, TESSERACT_CONFIG
 from src.hocr_beatify import hocr_to_html
+from src.tesseract_pages import run_tesseract_pages, run_tesseract_pdf
 
 DAG_ID = "pdf_processing"
 
@@ -28,6 +29,11 @@ dag = DAG(
         "TESSERACT_LANG": "collected_3_from_oshamaho_new_font_0.193_4395_18400",
         "TESSERACT_LANG_COMPARE": "kbd_ng",
         "PDF_NAME": "dysche_zhyg.pdf",
+        "TESSERACT_WORKERS": None,
+        # True - страницы рендерятся в памяти без pdftoppm, JPG_DIR остается пустым (PNG туда пишутся только
+        # при SAVE_PAGE_IMAGES)
+        "IN_MEMORY_RASTER": False,
+        "SAVE_PAGE_IMAGES": False,
     },
 )
 
@@ -37,6 +43,9 @@ def push_variables(**kwargs):
     tesseract_lang = kwargs["dag_run"].conf.get("TESSERACT_LANG")
     pdf_name = kwargs["dag_run"].conf.get("PDF_NAME")
     tesseract_lang_compare = kwargs["dag_run"].conf.get("TESSERACT_LANG_COMPARE")
+    tesseract_workers = kwargs["dag_run"].conf.get("TESSERACT_WORKERS")
+    in_memory_raster = kwargs["dag_run"].conf.get("IN_MEMORY_RASTER", False)
+    save_page_images = kwargs["dag_run"].conf.get("SAVE_PAGE_IMAGES", False)
 
     book_results_dir = os.path.join(BASE_DAG_RESULTS_DIR, DAG_ID, pdf_name)
     book_model_results_dir = os.path.join(book_results_dir, f"rslt_{tesseract_lang}")
@@ -56,6 +65,9 @@ def push_variables(**kwargs):
     kwargs["ti"].xcom_push(key="HOCR_DIR", value=hocr_dir)
     kwargs["ti"].xcom_push(key="TSV_DIR", value=tsv_dir)
     kwargs["ti"].xcom_push(key="PDF_FILE", value=pdf_file)
+    kwargs["ti"].xcom_push(key="TESSERACT_WORKERS", value=tesseract_workers)
+    kwargs["ti"].xcom_push(key="IN_MEMORY_RASTER", value=in_memory_raster)
+    kwargs["ti"].xcom_push(key="SAVE_PAGE_IMAGES", value=save_page_images)
 
 
 t0_push_variables = PythonOperator(
@@ -75,9 +87,22 @@ t1_create_directories = BashOperator(
     dag=dag,
 )
 
-t2_convert_pdf_to_jpg = BashOperator(
+
+def convert_pdf_to_jpg(**kwargs):
+    # при растеризации в памяти страницы рендерятся прямо в tesseract_by_page
+    if kwargs["ti"].xcom_pull(key="IN_MEMORY_RASTER"):
+        print("IN_MEMORY_RASTER is set, skip pdftoppm")
+        return
+
+    pdf_file = kwargs["ti"].xcom_pull(key="PDF_FILE")
+    jpg_dir = kwargs["ti"].xcom_pull(key="JPG_DIR")
+    subprocess.run(["pdftoppm", "-jpeg", "-r", "300", pdf_file, os.path.join(jpg_dir, "page")], check=True)
+
+
+t2_convert_pdf_to_jpg = PythonOperator(
     task_id="convert_pdf_to_jpg",
-    bash_command='pdftoppm -jpeg -r 300 {{ti.xcom_pull(key="PDF_FILE")}} {{ti.xcom_pull(key="JPG_DIR")}}/page',
+    python_callable=convert_pdf_to_jpg,
+    provide_context=True,
     dag=dag,
 )
 
@@ -88,16 +113,21 @@ def run_tesseract_for_page(**kwargs):
     txt_dir = kwargs["ti"].xcom_pull(key="TXT_DIR")
     print(f"tesseract_lang: {tesseract_lang} jpg_dir: {jpg_dir} txt_dir: {txt_dir}")
 
-    jpgs = os.listdir(jpg_dir)
-    print(f"jpgs: {jpgs}")
-
-    for jpeg_file_name in jpgs:
-        jpg_path = os.path.join(jpg_dir, jpeg_file_name)
-        txt_path = os.path.join(txt_dir, jpeg_file_name.replace(".jpg", ".txt"))
-        command = ["tesseract", "-l", tesseract_lang, jpg_path, txt_path, TESSERACT_CONFIG]
-        p = Popen(command, stdin=PIPE, stdout=PIPE, stderr=PIPE)
-        output, err = p.communicate()
-        print(f"output: {output} err: {err}")
+    common_kwargs = dict(
+        txt_dir=txt_dir,
+        tesseract_lang=tesseract_lang,
+        config=TESSERACT_CONFIG,
+        done_dirs=[kwargs["ti"].xcom_pull(key="HOCR_DIR"), kwargs["ti"].xcom_pull(key="TSV_DIR")],
+        max_workers=kwargs["ti"].xcom_pull(key="TESSERACT_WORKERS"),
+    )
+    if kwargs["ti"].xcom_pull(key="IN_MEMORY_RASTER"):
+        run_tesseract_pdf(
+            pdf_path=kwargs["ti"].xcom_pull(key="PDF_FILE"),
+            image_dir=jpg_dir if kwargs["ti"].xcom_pull(key="SAVE_PAGE_IMAGES") else None,
+            **common_kwargs,
+        )
+    else:
+        run_tesseract_pages(image_dir=jpg_dir, **common_kwargs)
 
 
 t3_tesseract_by_page = PythonOperator(
@@ -109,13 +139,20 @@ t3_tesseract_by_page = PythonOperator(
 
 t4_move_hocr_files = BashOperator(
     task_id="move_hocr_files",
-    bash_command='mv {{ti.xcom_pull(key="TXT_DIR")}}/*.hocr {{ti.xcom_pull(key="HOCR_DIR")}}',
+    # find вместо glob: при полностью возобновленном запуске новых .hocr/.tsv в TXT_DIR нет, и mv по пустой маске упал бы
+    bash_command=(
+        'find {{ti.xcom_pull(key="TXT_DIR")}} -maxdepth 1 -name "*.hocr" '
+        '-exec mv -t {{ti.xcom_pull(key="HOCR_DIR")}} {} +'
+    ),
     dag=dag,
 )
 
 t5_move_tsv_files = BashOperator(
     task_id="move_tsv_files",
-    bash_command='mv {{ti.xcom_pull(key="TXT_DIR")}}/*.tsv {{ti.xcom_pull(key="TSV_DIR")}}',
+    bash_command=(
+        'find {{ti.xcom_pull(key="TXT_DIR")}} -maxdepth 1 -name "*.tsv" '
+        '-exec mv -t {{ti.xcom_pull(key="TSV_DIR")}} {} +'
+    ),
     dag=dag,
 )
 
@@ -123,7 +160,8 @@ t5_move_tsv_files = BashOperator(
 def join_page_hocr(**kwargs):
     hocr_dir = kwargs["ti"].xcom_pull(key="HOCR_DIR")
     output_path = os.path.join(hocr_dir, "..", "output.html")
-    hocr_to_html(hocr_dir, output_path)
+    conf_hist_path = os.path.join(hocr_dir, "..", "conf_hist_by_page.tsv")
+    hocr_to_html(hocr_dir, output_path, conf_hist_path=conf_hist_path)
 
 
 t6_join_page_hocr = PythonOperator(
@@ -27,6 +27,7 @@ dag = DAG(
         "PDF_NAME": "dysche_zhyg.pdf",
         "LANG_1": "kbd_0.229_2995_10800",
         "LANG_2": "kbd_0.009_4360_66700",
+        "PLOT": False,
     },
 )
 
@@ -36,6 +37,7 @@ def push_variables(**kwargs):
     PDF_NAME = kwargs["dag_run"].conf.get("PDF_NAME")
     LANG_1 = kwargs["dag_run"].conf.get("LANG_1")
     LANG_2 = kwargs["dag_run"].conf.get("LANG_2")
+    PLOT = kwargs["dag_run"].conf.get("PLOT", False)
 
     book_base_dir = path_utils.get_book_base_dir(PDF_NAME)
     book_lang_1_dir = path_utils.get_book_lang_dir(book_base_dir, LANG_1)
@@ -47,6 +49,7 @@ def push_variables(**kwargs):
     kwargs["ti"].xcom_push(key="COMPARE_RESULTS_DIR", value=compare_results_dir)
     kwargs["ti"].xcom_push(key="LANG_1", value=LANG_1)
     kwargs["ti"].xcom_push(key="LANG_2", value=LANG_2)
+    kwargs["ti"].xcom_push(key="PLOT", value=PLOT)
     kwargs["ti"].xcom_push(key="BOOK_LANG_1_DIR", value=book_lang_1_dir)
     kwargs["ti"].xcom_push(key="BOOK_LANG_2_DIR", value=book_lang_2_dir)
 
@@ -68,6 +71,7 @@ def run_compare_stats(**kwargs):
         lang_1=kwargs["ti"].xcom_pull(key="LANG_1"),
         lang_2=kwargs["ti"].xcom_pull(key="LANG_2"),
         output_dir=kwargs["ti"].xcom_pull(key="COMPARE_RESULTS_DIR"),
+        plot=kwargs["ti"].xcom_pull(key="PLOT"),
     )
 
 
@@ -0,0 +1,87 @@
+"""
+Потоковая очистка большого текстового корпуса через clean_text.
+
+Файл читается кусками из целых строк, куски очищаются в пуле процессов и пишутся в исходном порядке,
+поэтому в памяти одновременно не больше max_in_flight кусков. Граница куска работает как жесткий
+перевод строки: правила, захватывающие несколько строк (например, пробелы перед знаком препинания
+в начале следующей строки), через нее не действуют.
+
+    python -m dags.src.corpus_cleaner data/input/corpus.txt -o data/output/corpus.txt -w 8
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from tqdm import tqdm
+
+from .scheduling import iter_bounded_ordered
+from .text_cleaner import clean_text
+
+CHUNK_SIZE = 8 * 1024**2
+
+
+def iter_line_chunks(file, chunk_size=CHUNK_SIZE):
+    """Отдает куски из целых строк размером примерно chunk_size символов."""
+    while True:
+        lines = file.readlines(chunk_size)
+        if not lines:
+            return
+        yield "".join(lines)
+
+
+def clean_chunk(chunk):
+    """
+    :return: (очищенный кусок, размер исходного куска в байтах)
+    """
+    text = clean_text(chunk)
+    if text and not text.endswith("\n"):
+        text += "\n"
+    return text, len(chunk.encode("utf-8"))
+
+
+def clean_corpus(input_path, output_path=None, workers=None, chunk_size=CHUNK_SIZE, max_in_flight=None):
+    """
+    Очищает input_path в output_path (по умолчанию - на месте). Результат пишется во временный файл
+    и подменяет output_path только после успешного завершения.
+
+    :return: количество записанных символов
+    """
+    output_path = output_path or input_path
+    workers = workers or os.cpu_count()
+    max_in_flight = max_in_flight or 2 * workers
+    tmp_path = f"{output_path}.tmp"
+
+    written = 0
+    try:
+        with open(input_path, "r", encoding="utf-8") as input_file, open(
+            tmp_path, "w", encoding="utf-8"
+        ) as output_file:
+            with ProcessPoolExecutor(max_workers=workers) as executor, tqdm(
+                total=os.path.getsize(input_path), unit="B", unit_scale=True, desc="Cleaning"
+            ) as pgbar:
+                chunks = iter_line_chunks(input_file, chunk_size)
+                for text, chunk_bytes in iter_bounded_ordered(executor, clean_chunk, chunks, max_in_flight):
+                    written += output_file.write(text)
+                    pgbar.update(chunk_bytes)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    os.replace(tmp_path, output_path)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Потоковая очистка текстового корпуса")
+    parser.add_argument("input", help="текстовый файл в utf-8")
+    parser.add_argument("--output", "-o", default=None, help="куда записать результат, по умолчанию - на место input")
+    parser.add_argument("--workers", "-w", type=int, default=None, help="число процессов, по умолчанию - число ядер")
+    parser.add_argument("--chunk-size-mb", type=int, default=CHUNK_SIZE // 1024**2, help="размер куска, МБ")
+    args = parser.parse_args()
+
+    clean_corpus(args.input, args.output, workers=args.workers, chunk_size=args.chunk_size_mb * 1024**2)
+
+
+if __name__ == "__main__":
+    main()
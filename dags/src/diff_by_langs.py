@@ -1,74 +1,77 @@
+import csv
 import os
 import re
-from difflib import SequenceMatcher
+from concurrent.futures import ProcessPoolExecutor
 
-import pandas as pd
+import Levenshtein
 
+from .scheduling import iter_bounded_ordered
 
-def _get_text_by_lang(book_lang_txt_dir):
-    lang_text_by_page = []
-    for text_f in sorted(os.listdir(book_lang_txt_dir)):
-        with open(os.path.join(book_lang_txt_dir, text_f)) as f:
-            text = f.read()
-            lang_text_by_page.append(text)
+PUNCTUATION_RE = re.compile(r"[^\w\s]")
 
-    return lang_text_by_page
 
+def _get_page_paths(book_lang_txt_dir):
+    return [os.path.join(book_lang_txt_dir, text_f) for text_f in sorted(os.listdir(book_lang_txt_dir))]
 
-def _extract_diff_words(line_1, line_2):
-    line_1 = re.sub(r"[^\w\s]", "", line_1)
-    line_2 = re.sub(r"[^\w\s]", "", line_2)
 
-    words1 = line_1.split()
-    words2 = line_2.split()
+def _tokenize(line):
+    return PUNCTUATION_RE.sub("", line).split()
+
 
-    sequence_matcher = SequenceMatcher(None, words1, words2)
-    match = sequence_matcher.get_matching_blocks()
+def _extract_diff_words(line_1, line_2):
+    words1 = _tokenize(line_1)
+    words2 = _tokenize(line_2)
+    if words1 == words2:
+        return (), ()
 
     different_words_1 = []
     different_words_2 = []
 
-    start1 = 0
-    start2 = 0
-
-    for block in match:
-        different_words_1.extend(words1[start1 : block.a])
-        different_words_2.extend(words2[start2 : block.b])
-
-        start1 = block.a + block.size
-        start2 = block.b + block.size
+    # выравнивание по словам на C (rapidfuzz), вместо difflib.SequenceMatcher
+    for tag, start1, end1, start2, end2 in Levenshtein.opcodes(words1, words2):
+        if tag != "equal":
+            different_words_1.extend(words1[start1:end1])
+            different_words_2.extend(words2[start2:end2])
 
     return tuple(different_words_1), tuple(different_words_2)
 
 
-def _find_diff_words_by_lang(book_lang_1_txt_dir, book_lang_2_txt_dir):
-    lang_1_text_by_page = _get_text_by_lang(book_lang_1_txt_dir)
-    lang_2_text_by_page = _get_text_by_lang(book_lang_2_txt_dir)
-
-    if len(lang_1_text_by_page) != len(lang_2_text_by_page):
-        raise ValueError("Text lengths for both languages must be the same.")
+def _find_diff_words_by_page(page_paths):
+    """Строки страницы, в которых обе модели распознали разные слова: [(слова модели 1, слова модели 2)]."""
+    page_path_1, page_path_2 = page_paths
+    with open(page_path_1) as f:
+        page_text_1 = f.read()
+    with open(page_path_2) as f:
+        page_text_2 = f.read()
 
-    diff_words_1 = []
-    diff_words_2 = []
+    rows = []
+    for line_1, line_2 in zip(page_text_1.splitlines(), page_text_2.splitlines()):
+        diff_w_1, diff_w_2 = _extract_diff_words(line_1, line_2)
+        if diff_w_1 and diff_w_2:
+            rows.append((" ".join(diff_w_1), " ".join(diff_w_2)))
+    return rows
 
-    for page_i in range(len(lang_1_text_by_page)):
-        page_text_1 = lang_1_text_by_page[page_i]
-        page_text_2 = lang_2_text_by_page[page_i]
 
-        for line_1, line_2 in zip(page_text_1.splitlines(), page_text_2.splitlines()):
-            diff_w_1, diff_w_2 = _extract_diff_words(line_1, line_2)
-            diff_words_1.append(diff_w_1)
-            diff_words_2.append(diff_w_2)
+def get_diff_word(book_lang_1_txt_dir, book_lang_2_txt_dir, lang_1, lang_2, output_file, max_workers=None):
+    """
+    Страницы сравниваются в пуле процессов, строки пишутся в csv по мере готовности страниц в порядке страниц.
 
-    return diff_words_1, diff_words_2
+    :return: количество записанных строк
+    """
+    page_paths_1 = _get_page_paths(book_lang_1_txt_dir)
+    page_paths_2 = _get_page_paths(book_lang_2_txt_dir)
 
+    if len(page_paths_1) != len(page_paths_2):
+        raise ValueError("Text lengths for both languages must be the same.")
 
-def get_diff_word(book_lang_1_txt_dir, book_lang_2_txt_dir, lang_1, lang_2, output_file):
-    diff_words_1, diff_words_2 = _find_diff_words_by_lang(
-        book_lang_1_txt_dir=book_lang_1_txt_dir,
-        book_lang_2_txt_dir=book_lang_2_txt_dir,
-    )
-    df = pd.DataFrame([{lang_1: " ".join(w1), lang_2: " ".join(w2)} for w1, w2 in zip(diff_words_1, diff_words_2)])
-    df = df[df[lang_1] != ""][df[lang_2] != ""]
-    df.to_csv(output_file, index=False)
-    return df
+    max_workers = max_workers or os.cpu_count()
+    rows_count = 0
+    with open(output_file, "w", encoding="utf-8", newline="") as f, ProcessPoolExecutor(max_workers) as executor:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow([lang_1, lang_2])
+        pages = zip(page_paths_1, page_paths_2)
+        for rows in iter_bounded_ordered(executor, _find_diff_words_by_page, pages, max_in_flight=4 * max_workers):
+            writer.writerows(rows)
+            rows_count += len(rows)
+
+    return rows_count
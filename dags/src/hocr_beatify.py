@@ -1,55 +1,133 @@
 import os
+import re
 
-from bs4 import BeautifulSoup
-
-
-def _get_color(confidence):
-    confidence_color_map = {
-        (0, 10): "darkred",
-        (10, 20): "red",
-        (20, 30): "orangered",
-        (30, 40): "darkorange",
-        (40, 50): "gold",
-        (50, 60): "darkkhaki",
-        (60, 70): "olivedrab",
-        (70, 80): "green",
-        (80, 90): "darkgreen",
-        (90, 100): "black",
-    }
-    for (min_conf, max_conf), color in confidence_color_map.items():
-        if min_conf <= confidence < max_conf:
-            return color
-    return "black"
-
-
-def _conf_prettify(soup):
-    words = soup.find_all("span", class_="ocrx_word")
-    for word in words:
-        confidence = float(word["title"].split(";")[1].split()[1])
-        color = _get_color(confidence)
-        word["style"] = f"color: {color};"
-
-    return soup
-
-
-def hocr_to_html(hocr_dir, output_path):
-    soup = None
-    for page, filename in enumerate(sorted(os.listdir(hocr_dir))):
-        if filename.endswith(".hocr"):
-            file_path = os.path.join(hocr_dir, filename)
-            page_soup = BeautifulSoup(open(file_path, encoding="utf-8"), "html.parser")
-            page_soup = _conf_prettify(page_soup)
-            page_div = page_soup.find("div", class_="ocr_page")
-            page_div["id"] = f"page_{page}"  # Добавить id к div
-            if page == 0:
-                soup = page_soup
+from lxml import etree
+
+CONFIDENCE_COLOR_MAP = {
+    (0, 10): "darkred",
+    (10, 20): "red",
+    (20, 30): "orangered",
+    (30, 40): "darkorange",
+    (40, 50): "gold",
+    (50, 60): "darkkhaki",
+    (60, 70): "olivedrab",
+    (70, 80): "green",
+    (80, 90): "darkgreen",
+    (90, 100): "black",
+}
+DEFAULT_COLOR = "black"
+X_WCONF_RE = re.compile(r"x_wconf (-?\d+(?:\.\d+)?)")
+
+
+def _build_color_table():
+    colors = [DEFAULT_COLOR] * 101
+    for (min_conf, max_conf), color in CONFIDENCE_COLOR_MAP.items():
+        colors[min_conf:max_conf] = [color] * (max_conf - min_conf)
+    return tuple(colors)
+
+
+# цвет для каждой целой уверенности 0..100 считается один раз
+COLOR_BY_CONF = _build_color_table()
+STYLE_BY_CONF = tuple(f"color: {color};" for color in COLOR_BY_CONF)
+
+
+def get_conf_color(confidence):
+    if 0 <= confidence <= 100:
+        return COLOR_BY_CONF[int(confidence)]
+    return DEFAULT_COLOR
+
+
+def get_word_confidence(title):
+    """x_wconf из title слова hocr (например, "bbox 100 100 300 200; x_wconf 96") или None."""
+    match = X_WCONF_RE.search(title or "")
+    return float(match.group(1)) if match else None
+
+
+class ConfidenceStyler:
+    """
+    Раскрашивает слова страницы hocr по уверенности. Попутно считает гистограмму уверенности
+    по корзинам CONFIDENCE_COLOR_MAP для каждой страницы - отдельный проход по tsv для этого не нужен.
+    """
+
+    def __init__(self):
+        self.histograms = {}
+
+    def style_page(self, page_div, page_name):
+        histogram = [0] * len(CONFIDENCE_COLOR_MAP)
+        for word in page_div.iter("span"):
+            if word.get("class") != "ocrx_word":
+                continue
+            confidence = get_word_confidence(word.get("title"))
+            if confidence is None:
+                continue
+
+            if 0 <= confidence <= 100:
+                conf = int(confidence)
+                word.set("style", STYLE_BY_CONF[conf])
+                histogram[min(conf // 10, len(histogram) - 1)] += 1
             else:
-                # add horizontal line between pages
-                soup.body.append(soup.new_tag("hr"))
-                soup.body.append(page_div)
+                word.set("style", f"color: {DEFAULT_COLOR};")
+
+        self.histograms[page_name] = histogram
+        return page_div
+
+    def write_histograms(self, output_path):
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write("\t".join(["page", *(f"{low}_{high}" for low, high in CONFIDENCE_COLOR_MAP)]) + "\n")
+            for page_name, histogram in self.histograms.items():
+                f.write("\t".join([page_name, *map(str, histogram)]) + "\n")
+
+
+def _read_header(file_path):
+    """Все до открывающего <body> включительно - шапка итогового документа. Дальше <body> файл не читается."""
+    header = ""
+    with open(file_path, "r", encoding="utf-8") as f:
+        for line in f:
+            header += line
+            body_start = header.find("<body")
+            if body_start != -1 and ">" in header[body_start:]:
+                return header[: header.index(">", body_start) + 1] + "\n"
+    raise ValueError(f"No <body> in {file_path}")
+
 
+def _iter_page_divs(file_path):
+    """Потоково разбирает страницу и отдает div.ocr_page; разобранное дерево освобождается после обработки."""
+    for _, element in etree.iterparse(file_path, events=("end",), tag="div", html=True):
+        if element.get("class") == "ocr_page":
+            yield element
+            element.clear()
+
+
+def hocr_to_html(hocr_dir, output_path, conf_hist_path=None):
+    """
+    Склеивает hocr страниц в один html: шапка берется из первой страницы, затем div каждой страницы
+    с раскрашенными по уверенности словами сразу дописывается в файл, поэтому книга целиком в памяти не держится.
+
+    :param conf_hist_path: если задан, сюда пишется tsv с гистограммой уверенности слов по страницам
+    """
+    file_names = sorted(os.listdir(hocr_dir))
+    hocr_pages = [(page, f) for page, f in enumerate(file_names) if f.endswith(".hocr")]
+    if not hocr_pages:
+        print(f"No hocr files in {hocr_dir}")
+        return
+
+    styler = ConfidenceStyler()
     with open(output_path, "w", encoding="utf-8") as output_file:
-        output_file.write(soup.prettify())
+        output_file.write(_read_header(os.path.join(hocr_dir, hocr_pages[0][1])))
+        for i, (page, filename) in enumerate(hocr_pages):
+            for page_div in _iter_page_divs(os.path.join(hocr_dir, filename)):
+                page_div = styler.style_page(page_div, page_name=filename.split(".")[0])
+                page_div.set("id", f"page_{page}")  # Добавить id к div
+                if i > 0:
+                    # add horizontal line between pages
+                    output_file.write("<hr/>\n")
+                output_file.write(etree.tostring(page_div, encoding="unicode", method="html", with_tail=False))
+                output_file.write("\n")
+
+        output_file.write("</body>\n</html>\n")
+
+    if conf_hist_path is not None:
+        styler.write_histograms(conf_hist_path)
 
 
 if __name__ == "__main__":
@@ -1,36 +1,21 @@
 import os
-from difflib import HtmlDiff
 
+from .html_diff_report import write_html_diff_report
 
-def _get_text_by_lang(book_lang_txt_dir):
-    lang_text_by_page = []
-    for text_f in sorted(os.listdir(book_lang_txt_dir)):
-        with open(os.path.join(book_lang_txt_dir, text_f)) as f:
-            text = f.read()
-            lang_text_by_page.append(text)
 
-    return lang_text_by_page
+def _get_page_paths(book_lang_txt_dir):
+    return [os.path.join(book_lang_txt_dir, text_f) for text_f in sorted(os.listdir(book_lang_txt_dir))]
 
 
-def create_html_diff_by_lang(book_base_dir, lang_1, lang_2, output_file):
-    html_diff = HtmlDiff()
+def create_html_diff_by_lang(book_base_dir, lang_1, lang_2, output_file, max_workers=None):
+    lang_1_page_paths = _get_page_paths(book_lang_txt_dir=os.path.join(book_base_dir, f"rslt_{lang_1}", "txts"))
+    lang_2_page_paths = _get_page_paths(book_lang_txt_dir=os.path.join(book_base_dir, f"rslt_{lang_2}", "txts"))
 
-    lang_1_text_by_page = _get_text_by_lang(book_lang_txt_dir=os.path.join(book_base_dir, f"rslt_{lang_1}", "txts"))
-    lang_2_text_by_page = _get_text_by_lang(book_lang_txt_dir=os.path.join(book_base_dir, f"rslt_{lang_2}", "txts"))
-
-    merged_text = ""
-    for page_i in range(len(lang_2_text_by_page)):
-        diff = html_diff.make_file(
-            fromlines=lang_1_text_by_page[page_i].splitlines(keepends=True),
-            tolines=lang_2_text_by_page[page_i].splitlines(keepends=True),
-            fromdesc=f"page:{page_i} ({lang_1})",
-            todesc=f"page:{page_i} ({lang_1})",
-            context=True,
-        )
-        merged_text += diff
-
-    with open(output_file, "w", encoding="utf-8") as file:
-        file.write(merged_text)
+    file_pairs = (
+        (page_path_1, page_path_2, f"page:{page_i} ({lang_1})", f"page:{page_i} ({lang_2})")
+        for page_i, (page_path_1, page_path_2) in enumerate(zip(lang_1_page_paths, lang_2_page_paths))
+    )
+    write_html_diff_report(output_file, file_pairs, max_workers=max_workers)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,107 @@
+"""
+Потоковая запись html-отчета из таблиц difflib.HtmlDiff.make_table: заголовок со стилями пишется один раз,
+затем таблицы по одной прямо в файл, в конце - легенда. Таблицы строятся в пуле процессов, но пишутся
+в исходном порядке, поэтому в памяти держится лишь несколько таблиц, а не весь документ.
+"""
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from difflib import HtmlDiff
+
+from .scheduling import iter_bounded_ordered
+
+REPORT_HEADER = """<!DOCTYPE html>
+<html>
+<head>
+    <meta http-equiv="Content-Type" content="text/html; charset={charset}" />
+    <title></title>
+    <style type="text/css">
+        table.diff {{font-family:Courier; border:medium;}}
+        .diff_header {{background-color:#e0e0e0}}
+        td.diff_header {{text-align:right}}
+        .diff_next {{background-color:#c0c0c0}}
+        .diff_add {{background-color:#aaffaa}}
+        .diff_chg {{background-color:#ffff77}}
+        .diff_sub {{background-color:#ffaaaa}}
+    </style>
+</head>
+<body>
+"""
+
+REPORT_FOOTER = """
+    <table class="diff" summary="Legends">
+        <tr><th colspan="2"> Legends </th></tr>
+        <tr>
+            <td><table border="" summary="Colors">
+                <tr><th> Colors </th></tr>
+                <tr><td class="diff_add">&nbsp;Added&nbsp;</td></tr>
+                <tr><td class="diff_chg">Changed</td></tr>
+                <tr><td class="diff_sub">Deleted</td></tr>
+            </table></td>
+            <td><table border="" summary="Links">
+                <tr><th colspan="2"> Links </th></tr>
+                <tr><td>(f)irst change</td></tr>
+                <tr><td>(n)ext change</td></tr>
+                <tr><td>(t)op</td></tr>
+            </table></td>
+        </tr>
+    </table>
+</body>
+</html>
+"""
+
+# якоря и ссылки HtmlDiff.make_table: id="from3_1", href="#difflib_chg_to3__0" и т.п.
+ANCHOR_PREFIX_RE = re.compile(r'((?:id|href)="#?(?:difflib_chg_)?(?:from|to))\d+_')
+
+
+class HtmlDiffReportWriter:
+    def __init__(self, output_file, charset="utf-8"):
+        self.output_file = output_file
+        self.charset = charset
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.output_file, "w", encoding=self.charset, errors="xmlcharrefreplace")
+        self._file.write(REPORT_HEADER.format(charset=self.charset))
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._file.write(REPORT_FOOTER)
+        self._file.close()
+
+    def write_table(self, table):
+        self._file.write(table)
+
+
+def make_table(table_num, fromlines, tolines, fromdesc="", todesc="", context=True):
+    # HtmlDiff нумерует якоря таблиц счетчиком, общим только внутри процесса. Номер подставляется явно,
+    # иначе у таблиц из разных процессов якоря совпадут и ссылки "n" в отчете будут вести не туда.
+    table = HtmlDiff().make_table(fromlines, tolines, fromdesc, todesc, context=context)
+    return ANCHOR_PREFIX_RE.sub(lambda match: f"{match.group(1)}{table_num}_", table)
+
+
+def _read_lines(path):
+    with open(path) as f:
+        return f.read().splitlines(keepends=True)
+
+
+def _make_file_table(args):
+    table_num, path_1, path_2, fromdesc, todesc = args
+    return make_table(table_num, _read_lines(path_1), _read_lines(path_2), fromdesc, todesc)
+
+
+def write_html_diff_report(output_file, file_pairs, max_workers=None):
+    """
+    :param file_pairs: итерируемое (path_1, path_2, fromdesc, todesc), читается лениво
+    :return: количество записанных таблиц
+    """
+    max_workers = max_workers or os.cpu_count()
+    tasks = ((table_num, *file_pair) for table_num, file_pair in enumerate(file_pairs))
+
+    tables_count = 0
+    with HtmlDiffReportWriter(output_file) as report, ProcessPoolExecutor(max_workers) as executor:
+        for table in iter_bounded_ordered(executor, _make_file_table, tasks, max_in_flight=2 * max_workers):
+            report.write_table(table)
+            tables_count += 1
+
+    return tables_count
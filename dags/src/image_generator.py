@@ -1,61 +1,86 @@
 import concurrent
 import hashlib
+import heapq
 import os
 import random
-from concurrent.futures import ThreadPoolExecutor
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from enum import Enum
+from io import BytesIO
 
+import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 from tqdm import tqdm
 
 from .const import FONT_SIZE, TEXT_LINES_MAX_COUNT
+from .packed_corpus import PackWriter, get_pack_dir
 
+_worker_local = threading.local()
 
-def calculate_image_size(text, img_font):
-    temp_image = Image.new("RGB", (1, 1), color=(255, 255, 255))
-    temp_draw = ImageDraw.Draw(temp_image)
 
-    text_bbox = temp_draw.textbbox((0, 0), text, font=img_font)
+def calculate_image_size(text, img_font):
+    # метрики берутся у самого шрифта, без временного Image/ImageDraw 1x1
+    left, top, right, bottom = img_font.getbbox(text)
+    return right - left, bottom - top
 
-    text_width = text_bbox[2] - text_bbox[0]
-    text_height = text_bbox[3] - text_bbox[1]
-    return text_width, text_height
 
+def draw_text(text, img_font, background=None, mode="RGB"):
+    if background is None:
+        background = 255 if mode == "L" else (255, 255, 255)
+    fill = 0 if mode == "L" else (0, 0, 0)
 
-def draw_text(text, img_font, background=(255, 255, 255)):
     padding = img_font.size // 2
     text_width, text_height = calculate_image_size(text, img_font)
-    image = Image.new("RGB", (text_width + padding, text_height + padding), color=background)
+    image = Image.new(mode, (text_width + padding, text_height + padding), color=background)
     draw = ImageDraw.Draw(image)
-    draw.text((0, -img_font.size / 10), text, font=img_font, fill=(0, 0, 0))
+    draw.text((0, -img_font.size / 10), text, font=img_font, fill=fill)
     return image
 
 
-def apply_aging_effect(image, aging_factor=(0.5, 0.1, 0.005)):
+def init_rng(seed=None):
+    """Создает генератор случайных чисел для текущего воркера (потока или процесса)."""
+    _worker_local.rng = np.random.default_rng(seed)
+    return _worker_local.rng
+
+
+def get_rng():
+    rng = getattr(_worker_local, "rng", None)
+    if rng is None:
+        rng = init_rng()
+    return rng
+
+
+def apply_aging_effect(image, aging_factor=(0.5, 0.1, 0.005), rng=None):
+    """
+    Состаривает изображение: каждому пикселю с вероятностью, зависящей от его яркости
+    (черный < 85 <= серый < 170 <= белый), добавляется шум с шагом 10.
+
+    :param image: PIL.Image
+    :param aging_factor: вероятности изменения (черный, серый, белый) пикселей, см. AgeingFactorEnum
+    :param rng: numpy.random.Generator, по умолчанию генератор текущего воркера
+    :return: PIL.Image в режиме "L"
+    """
     image = image.convert("L")
     black_factor, gray_factor, white_factor = aging_factor
+    rng = rng or get_rng()
 
-    pixel_data = list(image.getdata())
-    for i in range(len(pixel_data)):
-        pixel_value = pixel_data[i]
-
-        if pixel_value < 85:
-            if random.random() > black_factor:
-                continue
-            new_value = pixel_value - random.randint(0, 15) * 10
-        elif pixel_value < 170:
-            if random.random() > gray_factor:
-                continue
-            new_value = pixel_value + random.randint(-15, 15) * 10
-        else:
-            if random.random() > white_factor:
-                continue
-            new_value = pixel_value - random.randint(0, 15) * 10
-
-        pixel_data[i] = new_value
-
-    image.putdata(pixel_data)
-    return image
+    pixels = np.asarray(image, dtype=np.int16).ravel()
+    black = pixels < 85
+    white = pixels >= 170
+
+    # вероятность изменения для каждого пикселя по его диапазону яркости
+    threshold = np.where(black, black_factor, np.where(white, white_factor, gray_factor))
+    changed = np.flatnonzero(rng.random(pixels.size) <= threshold)
+
+    # черные и белые пиксели темнеют на 0..150, серые сдвигаются на -150..150
+    is_gray = ~(black[changed] | white[changed])
+    darken = rng.integers(0, 16, size=changed.size, dtype=np.int16)
+    shift = rng.integers(-15, 16, size=changed.size, dtype=np.int16)
+    pixels[changed] += np.where(is_gray, shift, -darken) * 10
+
+    pixels = np.clip(pixels, 0, 255).astype(np.uint8).reshape(image.size[1], image.size[0])
+    return Image.fromarray(pixels)
 
 
 def generate_file_name(text, img_font):
@@ -77,6 +102,65 @@ class AgeingFactorEnum(Enum):
     HIGH = (0.5, 0.4, 0.05)
 
 
+class RenderManifest:
+    """
+    Манифест уже отрисованных образцов в {output_dir}/.manifest.
+
+    Каждый воркер дописывает ключи (prefix_dir/имя из generate_file_name) в свой файл-шард
+    одной операцией write после сохранения .png и .gt.txt, поэтому прерванный запуск
+    продолжается без os.path.exists на каждый файл. Недописанная последняя строка игнорируется.
+    """
+
+    DIR_NAME = ".manifest"
+
+    def __init__(self, output_dir, rendered=None):
+        self.output_dir = output_dir
+        self.rendered = set() if rendered is None else rendered
+        self._created_dirs = set()
+        self._fd = None
+
+    @classmethod
+    def load(cls, output_dir):
+        rendered = set()
+        manifest_dir = os.path.join(output_dir, cls.DIR_NAME)
+        if os.path.isdir(manifest_dir):
+            with os.scandir(manifest_dir) as entries:
+                for entry in entries:
+                    with open(entry.path, "r", encoding="utf-8") as f:
+                        rendered.update(line[:-1] for line in f if line.endswith("\n"))
+        return cls(output_dir, rendered)
+
+    def is_rendered(self, key):
+        return key in self.rendered
+
+    def ensure_dir(self, prefix_dir):
+        # директория шарда создается один раз на воркер
+        if prefix_dir not in self._created_dirs:
+            os.makedirs(os.path.join(self.output_dir, prefix_dir), exist_ok=True)
+            self._created_dirs.add(prefix_dir)
+
+    def add(self, key):
+        if self._fd is None:
+            manifest_dir = os.path.join(self.output_dir, self.DIR_NAME)
+            os.makedirs(manifest_dir, exist_ok=True)
+            shard_path = os.path.join(manifest_dir, f"{os.getpid()}_{threading.get_ident()}.txt")
+            self._fd = os.open(shard_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            weakref.finalize(self, os.close, self._fd)
+
+        os.write(self._fd, f"{key}\n".encode("utf-8"))
+        self.rendered.add(key)
+
+
+def get_prefix_dir(font_name, text_name, group_by=GroupByEnum.NO_GROUP, group_by_factor=0):
+    if group_by == GroupByEnum.FONT:
+        return f"by_font/{font_name}"
+    if group_by == GroupByEnum.TEXT:
+        if group_by_factor == 0:
+            return f"by_text/{text_name[0]}"
+        return str(int(text_name[0], 16) % group_by_factor)
+    return ""
+
+
 def generate_image(
     text,
     img_font,
@@ -84,30 +168,43 @@ def generate_image(
     group_by=GroupByEnum.NO_GROUP,
     group_by_factor=0,
     aging_factor=(0.3, 0.3, 0.01),
+    rng=None,
+    manifest=None,
+    pack_writer=None,
 ):
     file_name, font_name, text_name = generate_file_name(text, img_font)
-
-    if group_by == GroupByEnum.FONT:
-        prefix_dir = f"by_font/{font_name}"
-    elif group_by == GroupByEnum.TEXT:
-        if group_by_factor == 0:
-            prefix_dir = f"by_text/{text_name[0]}"
-        else:
-            prefix_dir = str(int(text_name[0], 16) % group_by_factor)
+    prefix_dir = get_prefix_dir(font_name, text_name, group_by=group_by, group_by_factor=group_by_factor)
+
+    if manifest is not None:
+        manifest_key = os.path.join(prefix_dir, file_name)
+        if manifest.is_rendered(manifest_key):
+            return
+        if pack_writer is None:
+            manifest.ensure_dir(prefix_dir)
     else:
-        prefix_dir = ""
-
-    os.makedirs(os.path.join(output_dir, prefix_dir), exist_ok=True)
-    if os.path.exists(os.path.join(output_dir, prefix_dir, f"{file_name}.png")):
-        return
+        os.makedirs(os.path.join(output_dir, prefix_dir), exist_ok=True)
+        if os.path.exists(os.path.join(output_dir, prefix_dir, f"{file_name}.png")):
+            return
+
+    # рисуем сразу в "L": результат тот же, что и RGB -> L в apply_aging_effect, но без лишнего холста
+    image = draw_text(text, img_font, mode="L")
+    image = apply_aging_effect(image, aging_factor, rng=rng)
+
+    if pack_writer is not None:
+        png_buffer = BytesIO()
+        image.save(png_buffer, format="PNG")
+        pack_writer.add(os.path.join(prefix_dir, file_name), png_buffer.getvalue(), text)
+        result_dir = pack_writer.pack_dir
+    else:
+        image.save(os.path.join(output_dir, prefix_dir, f"{file_name}.png"))
+        with open(os.path.join(output_dir, prefix_dir, f"{file_name}.gt.txt"), "w") as f:
+            f.write(text)
+        result_dir = os.path.join(output_dir, prefix_dir)
 
-    image = draw_text(text, img_font)
-    image = apply_aging_effect(image, aging_factor)
-    image.save(os.path.join(output_dir, prefix_dir, f"{file_name}.png"))
-    with open(os.path.join(output_dir, prefix_dir, f"{file_name}.gt.txt"), "w") as f:
-        f.write(text)
+    if manifest is not None:
+        manifest.add(manifest_key)
 
-    return os.path.join(output_dir, prefix_dir)
+    return result_dir
 
 
 def load_fonts(font_dir, font_size=FONT_SIZE):
@@ -124,16 +221,110 @@ def load_fonts(font_dir, font_size=FONT_SIZE):
     return fonts
 
 
-def load_text(text_filepath, max_lines=TEXT_LINES_MAX_COUNT, min_line_len=20, max_line_len=120):
+def _iter_text_lines(text_filepath, min_line_len=20, max_line_len=120):
     with open(text_filepath, "r") as f:
-        lines = f.read().split("\n")
+        for line in f:
+            line = line.rstrip("\n")
+            if min_line_len < len(line) < max_line_len:
+                yield line
+
+
+def load_text(text_filepath, max_lines=TEXT_LINES_MAX_COUNT, min_line_len=20, max_line_len=120, seed=None):
+    """
+    Читает корпус построчно и выбирает max_lines случайных уникальных строк.
+
+    Каждой строке назначается приоритет - 64-битный хэш с солью из seed, в выборку попадают строки
+    с наименьшими приоритетами (reservoir sampling по хэшу). Повторы строки получают тот же
+    приоритет, поэтому выборка равномерна по уникальным строкам, а память ограничена max_lines.
+    """
+    salt = random.Random(seed).getrandbits(64).to_bytes(8, "little")
+
+    reservoir = []  # max-heap по приоритету: (-priority, line)
+    priorities = set()
+    for line in _iter_text_lines(text_filepath, min_line_len=min_line_len, max_line_len=max_line_len):
+        digest = hashlib.blake2b(line.encode("utf-8"), digest_size=8, key=salt).digest()
+        priority = int.from_bytes(digest, "little")
+        if priority in priorities:
+            continue
 
-    text_lines = list(set([line for line in lines if min_line_len < len(line) < max_line_len]))
-    text_lines = text_lines[:max_lines]
-    random.shuffle(text_lines)
+        if len(reservoir) < max_lines:
+            heapq.heappush(reservoir, (-priority, line))
+            priorities.add(priority)
+        elif reservoir and priority < -reservoir[0][0]:
+            removed_priority, _ = heapq.heapreplace(reservoir, (-priority, line))
+            priorities.discard(-removed_priority)
+            priorities.add(priority)
+
+    text_lines = [line for _, line in reservoir]
+    random.Random(seed).shuffle(text_lines)
     return text_lines
 
 
+class ExecutorEnum(Enum):
+    THREAD = "thread"
+    PROCESS = "process"
+
+
+class OutputFormatEnum(Enum):
+    FILES = "files"
+    PACKED = "packed"
+
+
+def _init_worker(font_dir, font_size, output_dir, rendered, output_format=OutputFormatEnum.FILES):
+    """Шрифты и манифест загружаются один раз на воркер, а не передаются с каждой задачей."""
+    _worker_local.fonts = load_fonts(font_dir, font_size=font_size)
+    _worker_local.manifest = RenderManifest(output_dir, rendered)
+    _worker_local.pack_writer = (
+        PackWriter(get_pack_dir(output_dir)) if OutputFormatEnum(output_format) == OutputFormatEnum.PACKED else None
+    )
+    init_rng()
+
+
+def _generate_chunk(
+    chunk_index,
+    text_lines,
+    output_dir,
+    group_by=GroupByEnum.NO_GROUP,
+    group_by_factor=0,
+    font_per_line=5,
+    seed=None,
+):
+    # генератор зависит от номера чанка, а не от воркера - при заданном seed результат воспроизводим
+    rng = get_rng() if seed is None else np.random.default_rng((seed, chunk_index))
+    fonts = _worker_local.fonts
+
+    # шрифты выбираются заранее, чтобы пропуск уже отрисованных строк не сдвигал выбор для остальных
+    font_ids = rng.integers(len(fonts), size=(len(text_lines), font_per_line))
+
+    output_subdirs = set()
+    pack_writer = _worker_local.pack_writer
+    try:
+        for text_line, line_font_ids in zip(text_lines, font_ids):
+            for font_i in line_font_ids:
+                try:
+                    result = generate_image(
+                        text=text_line,
+                        img_font=fonts[font_i],
+                        output_dir=output_dir,
+                        group_by=group_by,
+                        group_by_factor=group_by_factor,
+                        rng=rng,
+                        manifest=_worker_local.manifest,
+                        pack_writer=pack_writer,
+                    )
+                    if result:
+                        output_subdirs.add(result)
+                except Exception as e:
+                    print(f"Ошибка: {e}")
+    finally:
+        # шард закрывается после каждого чанка: у воркера пула нет хука на завершение,
+        # а следующий чанк этого воркера допишет в тот же шард
+        if pack_writer is not None:
+            pack_writer.close()
+
+    return output_subdirs, len(text_lines) * font_per_line
+
+
 def generate_images(
     text_filepath,
     font_dir,
@@ -144,35 +335,44 @@ def generate_images(
     group_by=GroupByEnum.NO_GROUP,
     group_by_factor=0,
     font_per_line=5,
+    executor=ExecutorEnum.THREAD.value,
+    chunk_size=100,
+    seed=None,
+    output_format=OutputFormatEnum.FILES.value,
 ):
-    text_lines = load_text(text_filepath, max_lines=max_lines)
-    fonts = load_fonts(font_dir, font_size=font_size)
+    text_lines = load_text(text_filepath, max_lines=max_lines, seed=seed)
+    chunks = [text_lines[i : i + chunk_size] for i in range(0, len(text_lines), chunk_size)]
+
+    rendered = RenderManifest.load(output_dir).rendered
+    print(f"Already rendered: {len(rendered)}")
+
+    executor_cls = ProcessPoolExecutor if ExecutorEnum(executor) == ExecutorEnum.PROCESS else ThreadPoolExecutor
 
     output_subdirs = set()
 
-    with tqdm(total=font_per_line * len(text_lines)) as pbar, ThreadPoolExecutor(max_workers=par_factor) as executor:
+    with tqdm(total=font_per_line * len(text_lines)) as pbar, executor_cls(
+        max_workers=par_factor,
+        initializer=_init_worker,
+        initargs=(font_dir, font_size, output_dir, rendered, output_format),
+    ) as pool:
         futures = [
-            executor.submit(
-                generate_image,
-                text=text_line,
-                img_font=random.choice(fonts),
+            pool.submit(
+                _generate_chunk,
+                chunk_index=chunk_index,
+                text_lines=chunk,
                 output_dir=output_dir,
                 group_by=group_by,
                 group_by_factor=group_by_factor,
+                font_per_line=font_per_line,
+                seed=seed,
             )
-            for text_line in text_lines
-            for _ in range(font_per_line)
+            for chunk_index, chunk in enumerate(chunks)
         ]
-        count = 0
         for future in concurrent.futures.as_completed(futures):
-            if count % 100 == 0:
-                pbar.update(100)
             try:
-                result = future.result()
-                if result:
-                    output_subdirs.add(result)
-
-                count += 1
+                chunk_subdirs, processed = future.result()
+                output_subdirs.update(chunk_subdirs)
+                pbar.update(processed)
             except Exception as e:
                 print(f"Ошибка: {e}")
 
@@ -1,8 +1,10 @@
 import csv
 import os
+from concurrent.futures import ProcessPoolExecutor
 
 import matplotlib
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 import seaborn as sns
 
@@ -11,33 +13,105 @@ from . import path_utils
 matplotlib.use("Agg")
 
 
-def get_book_df(book_lang_tsv_dir):
-    book_df = pd.DataFrame()
-    for filename in sorted(os.listdir(book_lang_tsv_dir)):
-        if filename.endswith(".tsv"):
-            try:
-                page_df = pd.read_csv(
-                    os.path.join(book_lang_tsv_dir, filename),
-                    sep="\t",
-                    header=0,
-                    quoting=csv.QUOTE_NONE,
-                )
-            except pd.errors.ParserError as e:
-                print(f"Error while parsing {book_lang_tsv_dir} {filename}: {e}")
-                raise
-            page_df["page"] = filename.split(".")[0]
-            book_df = pd.concat([book_df, page_df], ignore_index=True)
+# колонки tsv tesseract: структурные номера помещаются в int16, координаты - в int32
+TSV_DTYPES = {
+    "level": "int16",
+    "page_num": "int16",
+    "block_num": "int16",
+    "par_num": "int16",
+    "line_num": "int16",
+    "word_num": "int16",
+    "left": "int32",
+    "top": "int32",
+    "width": "int32",
+    "height": "int32",
+    "conf": "float32",
+    "text": "object",
+}
+PARALLEL_MIN_PAGES = 500
+CONF_THRESHOLDS = [30, 60, 90]
+
+
+def _read_page_tsv(tsv_path):
+    try:
+        return pd.read_csv(tsv_path, sep="\t", header=0, quoting=csv.QUOTE_NONE, dtype=TSV_DTYPES)
+    except pd.errors.ParserError as e:
+        print(f"Error while parsing {tsv_path}: {e}")
+        raise
+
+
+def _is_cache_fresh(cache_path, book_lang_tsv_dir, tsv_file_names):
+    """Кэш свежий, если он новее самой директории (добавление/удаление файлов) и каждого tsv в ней."""
+    if not os.path.exists(cache_path):
+        return False
+
+    cache_mtime = os.path.getmtime(cache_path)
+    mtimes = [os.path.getmtime(book_lang_tsv_dir)]
+    mtimes.extend(os.path.getmtime(os.path.join(book_lang_tsv_dir, f)) for f in tsv_file_names)
+    return cache_mtime > max(mtimes)
+
+
+def _read_cache(cache_path):
+    try:
+        return pd.read_parquet(cache_path).astype({"text": TSV_DTYPES["text"]})
+    except ImportError as e:
+        print(f"Parquet cache is disabled: {e}")
+        return None
+
+
+def _write_cache(book_df, cache_path):
+    tmp_path = f"{cache_path}.tmp"
+    try:
+        book_df.to_parquet(tmp_path, index=False)
+    except ImportError as e:
+        print(f"Parquet cache is disabled: {e}")
+        return
+    os.replace(tmp_path, cache_path)
+
+
+def get_book_df(book_lang_tsv_dir, use_cache=True, max_workers=None):
+    """
+    Собирает tsv всех страниц в один DataFrame с компактными типами и категориальной колонкой page.
+    Книги от PARALLEL_MIN_PAGES страниц разбираются в пуле процессов. Результат кэшируется в parquet
+    рядом с директорией tsvs и переиспользуется, пока tsv не менялись.
+    """
+    tsv_file_names = sorted(f for f in os.listdir(book_lang_tsv_dir) if f.endswith(".tsv"))
+    cache_path = path_utils.get_book_df_cache_path(book_lang_tsv_dir)
+    if use_cache and _is_cache_fresh(cache_path, book_lang_tsv_dir, tsv_file_names):
+        book_df = _read_cache(cache_path)
+        if book_df is not None:
+            return book_df
+
+    tsv_paths = [os.path.join(book_lang_tsv_dir, f) for f in tsv_file_names]
+    if len(tsv_paths) >= PARALLEL_MIN_PAGES:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            page_dfs = list(executor.map(_read_page_tsv, tsv_paths, chunksize=16))
+    else:
+        page_dfs = [_read_page_tsv(tsv_path) for tsv_path in tsv_paths]
+
+    if page_dfs:
+        book_df = pd.concat(page_dfs, ignore_index=True)
+    else:
+        book_df = pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in TSV_DTYPES.items()})
+
+    page_codes, pages = pd.factorize(pd.Index([f.split(".")[0] for f in tsv_file_names]))
+    page_codes = np.repeat(page_codes, [len(page_df) for page_df in page_dfs])
+    book_df["page"] = pd.Categorical.from_codes(page_codes, categories=pages)
+
+    if use_cache:
+        _write_cache(book_df, cache_path)
     return book_df
 
 
 def _plot_conf_dist(book_df, lang, output_dir, conf_min=0, conf_max=100):
     plt.figure(figsize=(10, 6))
-    sns.histplot(book_df["conf"][book_df["conf"] >= conf_min][book_df["conf"] <= conf_max], bins=20)
+    sns.histplot(book_df["conf"][book_df["conf"].between(conf_min, conf_max)], bins=20)
     plt.title(f"Гистограмма уровней уверенности ({lang})")
     plt.xlabel("Уровень уверенности")
     plt.ylabel("Количество")
     # plt.show()
     plt.savefig(os.path.join(output_dir, f"conf_dist_{lang}_{conf_min}_{conf_max}.png"))
+    plt.close()
 
 
 def _plot_filtered_conf_dist_by_page(filtered_df, lang, output_dir, conf_min=0, conf_max=100):
@@ -49,15 +123,62 @@ def _plot_filtered_conf_dist_by_page(filtered_df, lang, output_dir, conf_min=0,
     plt.xticks(rotation=90)
     # plt.show()
     plt.savefig(os.path.join(output_dir, f"filtered_conf_dist_by_page_{lang}_{conf_min}_{conf_max}.png"))
-
-
-def _filter_by_conf(book_df, lang, output_dir, conf_min=0, conf_max=100):
-    filtered_df = book_df[book_df["conf"] >= conf_min][book_df["conf"] <= conf_max]
-    _plot_filtered_conf_dist_by_page(filtered_df, lang, output_dir, conf_max=conf_max)
-    filtered_df.to_csv(os.path.join(output_dir, f"filtered_{conf_min}_{conf_max}_book_df_{lang}.tsv"), sep="\t")
-
-
-def compare_stats(book_base_dir, lang_1, lang_2, output_dir, conf_threshold=90):
+    plt.close()
+
+
+def get_conf_buckets(conf, thresholds=CONF_THRESHOLDS):
+    """
+    Номер корзины для каждого conf за один проход: i - conf <= thresholds[i] (и больше предыдущего порога),
+    len(thresholds) - выше всех порогов, -1 - conf < 0 (строки без текста).
+    """
+    conf = np.asarray(conf)
+    buckets = np.searchsorted(thresholds, conf, side="left")
+    buckets[conf < 0] = -1
+    return buckets
+
+
+def _filter_by_conf(book_df, lang, output_dir, thresholds=CONF_THRESHOLDS, plot=False):
+    buckets = get_conf_buckets(book_df["conf"].to_numpy(), thresholds)
+
+    labels = [f"{low}_{high}" for low, high in zip([0] + thresholds, thresholds + [100])]
+    counts = pd.crosstab(book_df["page"], pd.Categorical.from_codes(buckets, categories=labels), dropna=False)
+    counts.to_csv(os.path.join(output_dir, f"conf_buckets_by_page_{lang}.tsv"), sep="\t")
+
+    for i, conf_max in enumerate(thresholds):
+        filtered_df = book_df[(buckets >= 0) & (buckets <= i)]
+        if plot:
+            _plot_filtered_conf_dist_by_page(filtered_df, lang, output_dir, conf_max=conf_max)
+        filtered_df.to_csv(os.path.join(output_dir, f"filtered_0_{conf_max}_book_df_{lang}.tsv"), sep="\t")
+
+
+def _merge_books(book_df_1, book_df_2, join_by):
+    """
+    Один outer merge с индикатором вместо отдельных inner/left/right. Порядок строк и индекс как у
+    соответствующих merge: inner и left - по первой книге, right - по второй; индекс left/right -
+    номер строки в результате merge how="left"/"right", как в прежних tsv.
+    """
+    merged_df = pd.merge(
+        book_df_1.assign(_order_1=np.arange(len(book_df_1))),
+        book_df_2.assign(_order_2=np.arange(len(book_df_2))),
+        on=join_by,
+        how="outer",
+        suffixes=("_1", "_2"),
+        indicator=True,
+    )
+
+    inner_df = merged_df[merged_df["_merge"] == "both"].sort_values(["_order_1", "_order_2"], kind="stable")
+    left_merge_df = merged_df[merged_df["_merge"] != "right_only"].sort_values(["_order_1", "_order_2"], kind="stable")
+    right_merge_df = merged_df[merged_df["_merge"] != "left_only"].sort_values(["_order_2", "_order_1"], kind="stable")
+
+    inner_df = inner_df.reset_index(drop=True)
+    left_merge_df = left_merge_df.reset_index(drop=True)
+    right_merge_df = right_merge_df.reset_index(drop=True)
+    left_df = left_merge_df[left_merge_df["_merge"] == "left_only"]
+    right_df = right_merge_df[right_merge_df["_merge"] == "right_only"]
+    return inner_df, left_df, right_df
+
+
+def compare_stats(book_base_dir, lang_1, lang_2, output_dir, conf_threshold=90, plot=False):
     book_lang_1_tsv_dir = path_utils.get_book_lang_tsv_dir(book_base_dir, lang_1)
     book_lang_2_tsv_dir = path_utils.get_book_lang_tsv_dir(book_base_dir, lang_2)
 
@@ -66,8 +187,9 @@ def compare_stats(book_base_dir, lang_1, lang_2, output_dir, conf_threshold=90):
 
     book_df_1 = book_df_1.dropna()
     book_df_2 = book_df_2.dropna()
-    _plot_conf_dist(book_df_1, lang_1, output_dir, conf_max=90)
-    _plot_conf_dist(book_df_2, lang_2, output_dir, conf_max=90)
+    if plot:
+        _plot_conf_dist(book_df_1, lang_1, output_dir, conf_max=90)
+        _plot_conf_dist(book_df_2, lang_2, output_dir, conf_max=90)
 
     book_df_1.to_csv(os.path.join(output_dir, f"book_df_{lang_1}.tsv"), sep="\t")
     book_df_2.to_csv(os.path.join(output_dir, f"book_df_{lang_2}.tsv"), sep="\t")
@@ -76,28 +198,20 @@ def compare_stats(book_base_dir, lang_1, lang_2, output_dir, conf_threshold=90):
     book_df_2.describe().to_csv(os.path.join(output_dir, f"book_df_{lang_2}_describe.tsv"), sep="\t")
 
     join_by = ["page", "text", "level", "page_num", "block_num", "par_num", "line_num"]
-    inner_df = pd.merge(book_df_1, book_df_2, on=join_by, suffixes=("_1", "_2"))
+    inner_df, left_df, right_df = _merge_books(book_df_1, book_df_2, join_by)
 
     inner_show_cols = ["text", "conf_1", "conf_2"]
-    inner_df = inner_df[inner_show_cols]
-    inner_df.to_csv(os.path.join(output_dir, f"inner_df.tsv"), sep="\t")
+    inner_df[inner_show_cols].to_csv(os.path.join(output_dir, f"inner_df.tsv"), sep="\t")
 
     left_show_cols = ["page", "text", "conf_1", "conf_2"]
-    left_df = pd.merge(book_df_1, book_df_2, on=join_by, how="left", suffixes=("_1", "_2"))
-    left_df = left_df[left_df["conf_2"].isna()]
-    left_df = left_df[left_show_cols]
-    left_df.to_csv(os.path.join(output_dir, f"left_{lang_1}_df.tsv"), sep="\t")
+    left_df[left_show_cols].to_csv(os.path.join(output_dir, f"left_{lang_1}_df.tsv"), sep="\t")
 
     right_show_cols = ["page", "text", "conf_1", "conf_2"]
-    right_df = pd.merge(book_df_1, book_df_2, on=join_by, how="right", suffixes=("_1", "_2"))
-    right_df = right_df[right_df["conf_1"].isna()]
-    right_df = right_df[right_show_cols]
-    right_df.to_csv(os.path.join(output_dir, f"right_{lang_2}_df.tsv"), sep="\t")
+    right_df[right_show_cols].to_csv(os.path.join(output_dir, f"right_{lang_2}_df.tsv"), sep="\t")
 
     # filter by conf
-    for max_conf in [30, 60, 90]:
-        _filter_by_conf(book_df_1, lang_1, output_dir, conf_max=max_conf)
-        _filter_by_conf(book_df_2, lang_2, output_dir, conf_max=max_conf)
+    _filter_by_conf(book_df_1, lang_1, output_dir, plot=plot)
+    _filter_by_conf(book_df_2, lang_2, output_dir, plot=plot)
 
 
 if __name__ == "__main__":
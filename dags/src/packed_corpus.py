@@ -0,0 +1,133 @@
+"""
+Упакованный формат синтетического корпуса: вместо пары .png/.gt.txt на каждый образец
+образцы дописываются в шарды {pack_dir}/{writer}_{n}.pack, а смещения - в соседний .idx.
+
+Строка индекса: key<TAB>offset<TAB>png_size<TAB>gt_size, где key - относительный путь
+образца без расширения (как в RenderManifest). Данные пишутся до строки индекса,
+поэтому при прерывании в шарде может остаться лишь "осиротевший" хвост без записи в индексе.
+"""
+import os
+import threading
+import weakref
+
+PACK_DIR_NAME = "packed"
+PACK_EXT = ".pack"
+INDEX_EXT = ".idx"
+MAX_SHARD_BYTES = 1024**3
+
+
+def get_pack_dir(output_dir):
+    return os.path.join(output_dir, PACK_DIR_NAME)
+
+
+class PackWriter:
+    def __init__(self, pack_dir, max_shard_bytes=MAX_SHARD_BYTES):
+        self.pack_dir = pack_dir
+        self.max_shard_bytes = max_shard_bytes
+        self._writer_name = f"{os.getpid()}_{threading.get_ident()}"
+        self._shard_num = 0
+        self._data_fd = None
+        self._index_fd = None
+        self._finalizers = []
+        self._offset = 0
+
+    def _open_shard(self):
+        os.makedirs(self.pack_dir, exist_ok=True)
+        while True:
+            shard_name = f"{self._writer_name}_{self._shard_num:05d}"
+            data_path = os.path.join(self.pack_dir, f"{shard_name}{PACK_EXT}")
+            if not os.path.exists(data_path) or os.path.getsize(data_path) < self.max_shard_bytes:
+                break
+            self._shard_num += 1
+
+        self._data_fd = os.open(data_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._index_fd = os.open(
+            os.path.join(self.pack_dir, f"{shard_name}{INDEX_EXT}"), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644
+        )
+        self._offset = os.fstat(self._data_fd).st_size
+        # на случай, если close() не будет вызван: дескрипторы закроются при сборке мусора
+        self._finalizers = [weakref.finalize(self, os.close, fd) for fd in (self._data_fd, self._index_fd)]
+
+    def close(self):
+        for finalizer in self._finalizers:
+            finalizer()
+        self._finalizers = []
+        self._data_fd = self._index_fd = None
+
+    def add(self, key, png_bytes, text):
+        if self._data_fd is None or self._offset >= self.max_shard_bytes:
+            if self._data_fd is not None:
+                self.close()
+                self._shard_num += 1
+            self._open_shard()
+
+        gt_bytes = text.encode("utf-8")
+        os.write(self._data_fd, png_bytes + gt_bytes)
+        os.write(self._index_fd, f"{key}\t{self._offset}\t{len(png_bytes)}\t{len(gt_bytes)}\n".encode("utf-8"))
+        self._offset += len(png_bytes) + len(gt_bytes)
+
+
+def iter_index(pack_dir):
+    """Возвращает (путь шарда, key, offset, png_size, gt_size) по всем индексам, шард за шардом."""
+    if not os.path.isdir(pack_dir):
+        return
+
+    for index_name in sorted(f for f in os.listdir(pack_dir) if f.endswith(INDEX_EXT)):
+        data_path = os.path.join(pack_dir, index_name[: -len(INDEX_EXT)] + PACK_EXT)
+        with open(os.path.join(pack_dir, index_name), "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    continue
+                key, offset, png_size, gt_size = line[:-1].split("\t")
+                yield data_path, key, int(offset), int(png_size), int(gt_size)
+
+
+def iter_samples(pack_dir):
+    """Последовательно читает образцы: (key, png_bytes, text). Повторы ключа отдаются один раз."""
+    seen = set()
+    data_path, data_file = None, None
+    try:
+        for path, key, offset, png_size, gt_size in iter_index(pack_dir):
+            if key in seen:
+                continue
+            seen.add(key)
+
+            if path != data_path:
+                if data_file is not None:
+                    data_file.close()
+                data_path, data_file = path, open(path, "rb")
+
+            data_file.seek(offset)
+            sample = data_file.read(png_size + gt_size)
+            yield key, sample[:png_size], sample[png_size:].decode("utf-8")
+    finally:
+        if data_file is not None:
+            data_file.close()
+
+
+def export_samples(pack_dir, ground_truth_dir):
+    """
+    Выгружает из упакованного корпуса то, что нужно tesstrain: {key}.png и {key}.gt.txt.
+    Уже выгруженные образцы пропускаются.
+
+    :return: количество выгруженных образцов
+    """
+    exported = 0
+    created_dirs = set()
+    for key, png_bytes, text in iter_samples(pack_dir):
+        png_path = os.path.join(ground_truth_dir, f"{key}.png")
+        if os.path.exists(png_path):
+            continue
+
+        sample_dir = os.path.dirname(png_path)
+        if sample_dir not in created_dirs:
+            os.makedirs(sample_dir, exist_ok=True)
+            created_dirs.add(sample_dir)
+
+        with open(png_path, "wb") as f:
+            f.write(png_bytes)
+        with open(os.path.join(ground_truth_dir, f"{key}.gt.txt"), "w", encoding="utf-8") as f:
+            f.write(text)
+        exported += 1
+
+    return exported
@@ -19,6 +19,10 @@ def get_book_lang_tsv_dir(book_base_dir, lang):
     return os.path.join(get_book_lang_dir(book_base_dir, lang), "tsvs")
 
 
+def get_book_df_cache_path(book_lang_tsv_dir):
+    return os.path.join(os.path.dirname(os.path.normpath(book_lang_tsv_dir)), "book_df.parquet")
+
+
 def get_best_traineddata_dir(model_name):
     return os.path.join(TESSTRAIN_PROJECT_DIR, "data", model_name, "tessdata_best")
 
@@ -0,0 +1,106 @@
+"""
+Растеризация страниц PDF в памяти (PyMuPDF) для распознавания без промежуточных JPEG.
+
+Страница рендерится в процессе-рендерере в оттенках серого и кладется в блок multiprocessing.shared_memory
+в виде готового PGM (заголовок P5 + пиксели), поэтому потребитель может и смотреть на нее как на массив NumPy
+(RenderedPage.array), и без копирования отдать ее в stdin tesseract. Блок удаляет потребитель.
+"""
+import os
+from multiprocessing import resource_tracker, shared_memory
+
+import fitz
+import numpy as np
+
+DEFAULT_DPI = 300
+
+_worker_doc = None
+
+
+def get_page_count(pdf_path):
+    with fitz.open(pdf_path) as doc:
+        return doc.page_count
+
+
+def get_page_names(page_count, prefix="page"):
+    """Имена как у pdftoppm: page-1..page-9 для 9 страниц, page-001..page-150 для 150."""
+    digits = len(str(page_count))
+    return [f"{prefix}-{page_num:0{digits}d}" for page_num in range(1, page_count + 1)]
+
+
+def init_render_worker(pdf_path):
+    """Initializer пула рендереров: документ открывается один раз на процесс."""
+    global _worker_doc
+    _worker_doc = fitz.open(pdf_path)
+
+
+def render_page(page_index, dpi=DEFAULT_DPI, image_path=None):
+    """
+    Рендерит страницу в новый блок shared memory.
+
+    :param image_path: если задан, страница дополнительно сохраняется без потерь (формат по расширению, напр. .png)
+    :return: (имя блока shared memory, (height, width))
+    """
+    pix = _worker_doc[page_index].get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+    if image_path is not None:
+        pix.save(image_path)
+
+    header = f"P5\n{pix.width} {pix.height}\n255\n".encode("ascii")
+    shm = shared_memory.SharedMemory(create=True, size=len(header) + pix.width * pix.height)
+    try:
+        shm.buf[: len(header)] = header
+        pixels = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.stride)[:, : pix.width]
+        np.ndarray((pix.height, pix.width), dtype=np.uint8, buffer=shm.buf, offset=len(header))[:] = pixels
+    except BaseException:
+        shm.close()
+        shm.unlink()
+        raise
+
+    # блоком дальше владеет потребитель: он и удалит его, а трекер рендерера не должен удалять его при выходе
+    resource_tracker.unregister(shm._name, "shared_memory")
+    shm.close()
+    return shm.name, (pix.height, pix.width)
+
+
+class RenderedPage:
+    """Страница из render_page. Используется как контекстный менеджер: на выходе блок shared memory удаляется."""
+
+    def __init__(self, shm_name, shape):
+        self.shape = shape
+        self._shm = shared_memory.SharedMemory(name=shm_name)
+        self._size = self._header_size + shape[0] * shape[1]
+
+    @property
+    def _header_size(self):
+        height, width = self.shape
+        return len(f"P5\n{width} {height}\n255\n")
+
+    @property
+    def array(self):
+        return np.ndarray(self.shape, dtype=np.uint8, buffer=self._shm.buf, offset=self._header_size)
+
+    @property
+    def pgm(self):
+        return self._shm.buf[: self._size]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+    def release(self):
+        # сначала unlink: если close упадет, блок все равно не останется в /dev/shm
+        self._shm.unlink()
+        try:
+            self._shm.close()
+        except BufferError:
+            # снаружи еще держат array/pgm (например, при исключении в теле with) - отображение освободится
+            # вместе с последней ссылкой, а BufferError не должен подменять исходную ошибку
+            pass
+
+
+def get_image_path(image_dir, page_name, image_format="png"):
+    if image_dir is None:
+        return None
+    os.makedirs(image_dir, exist_ok=True)
+    return os.path.join(image_dir, f"{page_name}.{image_format}")
@@ -1,79 +1,425 @@
-import concurrent
+import functools
+import hashlib
+import itertools
 import os
+import shutil
+import struct
 import subprocess
+import time
+import unicodedata
 from concurrent.futures import ThreadPoolExecutor
-from subprocess import list2cmdline
+from dataclasses import dataclass, field
 
+from PIL import Image
 from tqdm import tqdm
 
 from .const import TESSTRAIN_PROJECT_DIR
+from .scheduling import iter_bounded
 
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+BATCH_DIR_NAME = "batches"
+LSTM_TRAIN_PSM = 13
+CACHE_STATE_FILE_NAME = ".lstmf_cache_state.tsv"
+FAILED_FILE_NAME = "lstm_train_failed.txt"
 
-def _run_prepare(name, ground_truth_dir, tesstrain_dir=TESSTRAIN_PROJECT_DIR):
-    with open(os.path.join(ground_truth_dir, f"{name}.box"), "w") as box_file:
-        cmd1 = [
-            "PYTHONIOENCODING=utf-8",
-            "python3",
-            os.path.join(tesstrain_dir, "generate_line_box.py"),
-            "-i",
-            os.path.join(ground_truth_dir, f"{name}.png"),
-            "-t",
-            os.path.join(ground_truth_dir, f"{name}.gt.txt"),
-        ]
-        cmd1 = list2cmdline(cmd1)
-        subprocess.run(cmd1, shell=True, stdout=box_file, text=True)
-
-    cmd2 = [
+
+def read_image_size(image_path):
+    """Размер изображения по заголовку: для PNG читается только IHDR, остальное - лениво через PIL."""
+    with open(image_path, "rb") as f:
+        header = f.read(24)
+    if header[:8] == PNG_SIGNATURE and header[12:16] == b"IHDR":
+        width, height = struct.unpack(">II", header[16:24])
+        return width, height
+
+    with Image.open(image_path) as image:
+        return image.size
+
+
+def generate_line_box(width, height, text):
+    """
+    Box-файл для одной строки, как в tesstrain generate_line_box.py:
+    каждый символ (вместе с комбинируемыми знаками) занимает всю строку, в конце - табуляция.
+    """
+    line = unicodedata.normalize("NFC", text.strip())
+    if not line:
+        return ""
+
+    boxes = []
+    for i in range(1, len(line)):
+        char, prev_char = line[i], line[i - 1]
+        if unicodedata.combining(char):
+            boxes.append(f"{prev_char + char} 0 0 {width} {height} 0")
+        elif not unicodedata.combining(prev_char):
+            boxes.append(f"{prev_char} 0 0 {width} {height} 0")
+    if not unicodedata.combining(line[-1]):
+        boxes.append(f"{line[-1]} 0 0 {width} {height} 0")
+    boxes.append(f"\t {width} {height} {width + 1} {height + 1} 0")
+    return "\n".join(boxes) + "\n"
+
+
+def write_line_box(name, ground_truth_dir):
+    with open(os.path.join(ground_truth_dir, f"{name}.gt.txt"), "r", encoding="utf-8") as f:
+        lines = f.read().strip().split("\n")
+    if len(lines) != 1:
+        raise ValueError(f"{name}.gt.txt: ground truth text file should contain exactly one line, not {len(lines)}")
+
+    width, height = read_image_size(os.path.join(ground_truth_dir, f"{name}.png"))
+    with open(os.path.join(ground_truth_dir, f"{name}.box"), "w", encoding="utf-8") as box_file:
+        box_file.write(generate_line_box(width, height, lines[0]))
+
+
+def _lstm_train(input_path, output_base):
+    cmd = [
         "tesseract",
-        os.path.join(ground_truth_dir, f"{name}.png"),
-        os.path.join(ground_truth_dir, f"{name}"),
+        input_path,
+        output_base,
         "--psm",
-        "13",
+        str(LSTM_TRAIN_PSM),
         "lstm.train",
     ]
-    cmd2 = list2cmdline(cmd2)
-    subprocess.run(cmd2, shell=True, text=True)
-
-
-def run_prepare(boxes, ground_truth_dir, tesstrain_dir=TESSTRAIN_PROJECT_DIR, par_factor=4):
-    with tqdm(total=len(boxes)) as pbar, ThreadPoolExecutor(max_workers=par_factor) as executor:
-        futures = [
-            executor.submit(
-                _run_prepare,
-                b,
-                ground_truth_dir,
-                tesstrain_dir,
-            )
-            for b in boxes
-        ]
-        count = 0
-        for future in concurrent.futures.as_completed(futures):
-            try:
-                future.result()
-                count += 1
-                if count % 100 == 0:
-                    pbar.update(1)
-            except Exception as e:
-                raise e
+    result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    if result.returncode == 0 and os.path.exists(f"{output_base}.lstmf"):
+        return None
+    return result.stderr.strip() or f"exit code {result.returncode}"
+
+
+def _run_prepare(name, ground_truth_dir, tesstrain_dir=TESSTRAIN_PROJECT_DIR):
+    try:
+        write_line_box(name, ground_truth_dir)
+    except ValueError as e:
+        print(f"Error while writing box for {name}: {e}")
+        return [name]
+
+    error = _lstm_train(os.path.join(ground_truth_dir, f"{name}.png"), os.path.join(ground_truth_dir, f"{name}"))
+    if error:
+        print(f"lstm.train failed for {name}: {error}")
+        return [name]
+    return []
+
+
+def _lstm_train_batch(names, ground_truth_dir):
+    """
+    Один запуск tesseract на список файлов: все строки батча попадают в один многостраничный
+    batches/{md5}.lstmf, а batches/{md5}.txt хранит входной список.
+    tesseract прерывает весь список на первой ошибке, поэтому неудачный батч делится пополам
+    и перезапускается, пока ошибки не будут сопоставлены отдельным образцам.
+
+    :return: список имен образцов, для которых lstm.train завершился ошибкой
+    """
+    batch_dir = os.path.join(ground_truth_dir, BATCH_DIR_NAME)
+    batch_name = hashlib.md5("\n".join(names).encode("utf-8")).hexdigest()
+    list_path = os.path.join(batch_dir, f"{batch_name}.txt")
+    output_base = os.path.join(batch_dir, batch_name)
+
+    with open(list_path, "w", encoding="utf-8") as f:
+        f.write("".join(f"{os.path.join(ground_truth_dir, name)}.png\n" for name in names))
+
+    error = _lstm_train(list_path, output_base)
+    if not error:
+        return []
+
+    for path in (list_path, f"{output_base}.lstmf"):
+        if os.path.exists(path):
+            os.remove(path)
+
+    if len(names) == 1:
+        print(f"lstm.train failed for {names[0]}: {error}")
+        return list(names)
+
+    middle = len(names) // 2
+    return _lstm_train_batch(names[:middle], ground_truth_dir) + _lstm_train_batch(names[middle:], ground_truth_dir)
+
+
+def _run_prepare_batch(names, ground_truth_dir, tesstrain_dir=TESSTRAIN_PROJECT_DIR):
+    if len(names) == 1:
+        return _run_prepare(names[0], ground_truth_dir, tesstrain_dir)
+
+    failed = []
+    with_boxes = []
+    for name in names:
+        try:
+            write_line_box(name, ground_truth_dir)
+            with_boxes.append(name)
+        except ValueError as e:
+            print(f"Error while writing box for {name}: {e}")
+            failed.append(name)
+
+    if with_boxes:
+        os.makedirs(os.path.join(ground_truth_dir, BATCH_DIR_NAME), exist_ok=True)
+        failed.extend(_lstm_train_batch(with_boxes, ground_truth_dir))
+    return failed
+
+
+@dataclass
+class PrepareStats:
+    total: int = 0
+    done: int = 0
+    failed: list = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def throughput(self):
+        return self.done / self.elapsed if self.elapsed else 0.0
+
+
+def _iter_batches(boxes, batch_size):
+    boxes = iter(boxes)
+    while batch := list(itertools.islice(boxes, batch_size)):
+        yield batch
+
+
+def run_prepare(
+    boxes,
+    ground_truth_dir,
+    tesstrain_dir=TESSTRAIN_PROJECT_DIR,
+    par_factor=4,
+    batch_size=1,
+    max_in_flight=None,
+):
+    """
+    Готовит .box/.lstmf для образцов boxes. В работе одновременно не больше max_in_flight батчей
+    (по умолчанию 4 * par_factor), так что память не зависит от числа образцов.
+    Имена образцов с ошибкой дописываются в {ground_truth_dir}/lstm_train_failed.txt.
+
+    :return: PrepareStats
+    """
+    max_in_flight = max_in_flight or 4 * par_factor
+    total = len(boxes) if hasattr(boxes, "__len__") else None
+    stats = PrepareStats(total=total or 0)
+    failed_path = os.path.join(ground_truth_dir, FAILED_FILE_NAME)
+
+    start = time.perf_counter()
+    with tqdm(total=total, unit="sample") as pbar, ThreadPoolExecutor(max_workers=par_factor) as executor:
+        results = iter_bounded(
+            executor,
+            functools.partial(_run_prepare_batch, ground_truth_dir=ground_truth_dir, tesstrain_dir=tesstrain_dir),
+            _iter_batches(boxes, batch_size),
+            max_in_flight=max_in_flight,
+        )
+        for batch, future in results:
+            batch_failed = future.result()
+            if batch_failed:
+                stats.failed.extend(batch_failed)
+                with open(failed_path, "a", encoding="utf-8") as f:
+                    f.write("".join(f"{name}\n" for name in batch_failed))
+
+            stats.done += len(batch)
+            pbar.update(len(batch))
+            pbar.set_postfix(failed=len(stats.failed), refresh=False)
+    stats.elapsed = time.perf_counter() - start
+
+    print(
+        f"Prepared {stats.done} samples in {ground_truth_dir}: {stats.throughput:.1f} samples/s, "
+        f"failed {len(stats.failed)}"
+    )
+    return stats
+
+
+def _get_batched_names(ground_truth_dir):
+    batch_dir = os.path.join(ground_truth_dir, BATCH_DIR_NAME)
+    if not os.path.isdir(batch_dir):
+        return set()
+
+    names = set()
+    for list_name in os.listdir(batch_dir):
+        if not list_name.endswith(".txt") or not os.path.exists(os.path.join(batch_dir, f"{list_name[:-4]}.lstmf")):
+            continue
+        with open(os.path.join(batch_dir, list_name), "r", encoding="utf-8") as f:
+            names.update(os.path.basename(line.rstrip("\n"))[: -len(".png")] for line in f if line.strip())
+    return names
+
+
+def _scan_ground_truth(ground_truth_dir):
+    """Один проход os.scandir: {имя образца: {".png"|".gt.txt"|".lstmf": DirEntry}}."""
+    samples = {}
+    with os.scandir(ground_truth_dir) as entries:
+        for entry in entries:
+            for ext in (".png", ".gt.txt", ".lstmf"):
+                if entry.name.endswith(ext):
+                    samples.setdefault(entry.name[: -len(ext)], {})[ext] = entry
+                    break
+    return samples
 
 
 def get_wo_boxes(ground_truth_dir):
-    png = [f for f in os.listdir(ground_truth_dir) if f.endswith(".png")]
-    lstmf = [f for f in os.listdir(ground_truth_dir) if f.endswith(".lstmf")]
+    samples = _scan_ground_truth(ground_truth_dir)
+    wo_boxes = {name for name, entries in samples.items() if ".png" in entries and ".lstmf" not in entries}
+    return wo_boxes.difference(_get_batched_names(ground_truth_dir))
+
+
+def write_lstmf_list(ground_truth_dir, list_path):
+    """
+    Список всех .lstmf (по образцам и батчевых) для lstmtraining --train_listfile.
+    Makefile tesstrain строит all-lstmf по .gt.txt и о батчах не знает: для каждого .gt.txt без своего .lstmf
+    он заново запустит lstm.train. Поэтому batch_size > 1 имеет смысл только при запуске lstmtraining
+    напрямую со списком отсюда, DAG обучения (gmake training) работает с batch_size=1.
+    """
+    lstmf_paths = [
+        os.path.join(ground_truth_dir, f) for f in sorted(os.listdir(ground_truth_dir)) if f.endswith(".lstmf")
+    ]
+    batch_dir = os.path.join(ground_truth_dir, BATCH_DIR_NAME)
+    if os.path.isdir(batch_dir):
+        lstmf_paths.extend(os.path.join(batch_dir, f) for f in sorted(os.listdir(batch_dir)) if f.endswith(".lstmf"))
+
+    with open(list_path, "w", encoding="utf-8") as f:
+        f.write("".join(f"{path}\n" for path in lstmf_paths))
+    return len(lstmf_paths)
+
+
+def get_tesseract_version():
+    result = subprocess.run(["tesseract", "--version"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    return result.stdout.splitlines()[0].strip() if result.stdout else ""
+
+
+class LstmfCache:
+    """
+    Кэш .lstmf с адресацией по содержимому: ключ - sha256 от байтов изображения, текста
+    ground truth, версии tesseract и psm. Файлы лежат в {cache_dir}/{key[:2]}/{key}.lstmf
+    и подкладываются в ground truth жесткой ссылкой (или копией на другом разделе).
+    """
+
+    def __init__(self, cache_dir, psm=LSTM_TRAIN_PSM):
+        self.cache_dir = cache_dir
+        self.psm = psm
+        self.tesseract_version = get_tesseract_version()
+
+    def key(self, png_path, gt_path):
+        digest = hashlib.sha256()
+        for part in (self.tesseract_version.encode("utf-8"), str(self.psm).encode("utf-8")):
+            digest.update(part)
+            digest.update(b"\0")
+        for path in (png_path, gt_path):
+            with open(path, "rb") as f:
+                digest.update(f.read())
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.lstmf")
+
+    @staticmethod
+    def _link(src, dst):
+        if os.path.exists(dst):
+            os.remove(dst)
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copyfile(src, dst)
+
+    def restore(self, key, lstmf_path):
+        cached_path = self.path(key)
+        if not os.path.exists(cached_path):
+            return False
+        self._link(cached_path, lstmf_path)
+        return True
+
+    def store(self, key, lstmf_path):
+        cached_path = self.path(key)
+        if not os.path.exists(cached_path):
+            os.makedirs(os.path.dirname(cached_path), exist_ok=True)
+            self._link(lstmf_path, cached_path)
+
+
+def _load_cache_state(ground_truth_dir):
+    state = {}
+    state_path = os.path.join(ground_truth_dir, CACHE_STATE_FILE_NAME)
+    if os.path.exists(state_path):
+        with open(state_path, "r", encoding="utf-8") as f:
+            for line in f:
+                name, key, *fingerprint = line.rstrip("\n").split("\t")
+                state[name] = (key, tuple(int(v) for v in fingerprint))
+    return state
+
+
+def _save_cache_state(ground_truth_dir, state):
+    state_path = os.path.join(ground_truth_dir, CACHE_STATE_FILE_NAME)
+    with open(f"{state_path}.tmp", "w", encoding="utf-8") as f:
+        for name, (key, fingerprint) in state.items():
+            f.write("\t".join([name, key, *map(str, fingerprint)]) + "\n")
+    os.replace(f"{state_path}.tmp", state_path)
+
+
+def get_stale_samples(ground_truth_dir, cache):
+    """
+    Находит образцы, для которых .lstmf отсутствует или собран из другого png/gt.txt.
+    Ключ пересчитывается только если изменились размер или mtime файлов,
+    подходящие .lstmf из кэша подкладываются сразу. Если файла состояния еще нет (кэш включен для
+    уже подготовленного корпуса), существующие .lstmf считаются актуальными и добавляются в кэш.
+
+    :return: ({имя: ключ} устаревших образцов, состояние для _save_cache_state, число попаданий)
+    """
+    has_state = os.path.exists(os.path.join(ground_truth_dir, CACHE_STATE_FILE_NAME))
+    old_state = _load_cache_state(ground_truth_dir)
+    state = {}
+    stale = {}
+    hits = 0
+
+    for name, entries in _scan_ground_truth(ground_truth_dir).items():
+        png_entry, gt_entry = entries.get(".png"), entries.get(".gt.txt")
+        if png_entry is None or gt_entry is None:
+            continue
+
+        png_stat, gt_stat = png_entry.stat(), gt_entry.stat()
+        fingerprint = (png_stat.st_mtime_ns, png_stat.st_size, gt_stat.st_mtime_ns, gt_stat.st_size)
+        old_key, old_fingerprint = old_state.get(name, (None, None))
+        key = old_key if old_fingerprint == fingerprint else cache.key(png_entry.path, gt_entry.path)
+
+        lstmf_path = os.path.join(ground_truth_dir, f"{name}.lstmf")
+        if ".lstmf" in entries and key == old_key:
+            hits += 1
+        elif ".lstmf" in entries and not has_state:
+            cache.store(key, lstmf_path)
+            hits += 1
+        elif cache.restore(key, lstmf_path):
+            hits += 1
+        else:
+            # старый .lstmf может быть жесткой ссылкой на запись кэша - tesseract не должен ее перезаписать
+            if ".lstmf" in entries:
+                os.remove(lstmf_path)
+            stale[name] = key
+            continue
+        state[name] = (key, fingerprint)
+
+    return stale, state, hits
+
+
+def _prepare_dir_with_cache(ground_truth_dir, cache, par_factor=4):
+    stale, state, hits = get_stale_samples(ground_truth_dir, cache)
+    failed = set(run_prepare(list(stale), ground_truth_dir, par_factor=par_factor).failed)
+
+    for name, key in stale.items():
+        if name in failed:
+            continue
+        png_path = os.path.join(ground_truth_dir, f"{name}.png")
+        gt_path = os.path.join(ground_truth_dir, f"{name}.gt.txt")
+        png_stat, gt_stat = os.stat(png_path), os.stat(gt_path)
+        cache.store(key, os.path.join(ground_truth_dir, f"{name}.lstmf"))
+        state[name] = (key, (png_stat.st_mtime_ns, png_stat.st_size, gt_stat.st_mtime_ns, gt_stat.st_size))
+
+    _save_cache_state(ground_truth_dir, state)
+    print(f"lstmf cache {ground_truth_dir}: hits {hits}, misses {len(stale)}, failed {len(failed)}")
+    return {"hits": hits, "misses": len(stale), "failed": len(failed)}
+
+
+def _prepare_dir(ground_truth_dir, par_factor=4, batch_size=1, cache=None):
+    if cache is not None:
+        return _prepare_dir_with_cache(ground_truth_dir, cache, par_factor=par_factor)
+
+    wo_boxes = get_wo_boxes(ground_truth_dir)
+    run_prepare(wo_boxes, ground_truth_dir, par_factor=par_factor, batch_size=batch_size)
 
-    wo_boxes = set([f.replace(".png", "") for f in png]).difference([f.replace(".lstmf", "") for f in lstmf])
-    return wo_boxes
 
+def prepare_box_lstmf(ground_truth_dir, walk_subdirs=False, par_factor=4, batch_size=1, cache_dir=None):
+    if cache_dir is not None and batch_size != 1:
+        raise ValueError("lstmf cache works with per-sample lstm.train only (batch_size=1)")
+    cache = LstmfCache(cache_dir) if cache_dir is not None else None
 
-def prepare_box_lstmf(ground_truth_dir, walk_subdirs=False, par_factor=4):
     if walk_subdirs:
         for dir_name in os.listdir(ground_truth_dir):
             ground_truth_dir_sub = os.path.join(ground_truth_dir, dir_name)
             if not os.path.isdir(os.path.join(ground_truth_dir, dir_name)):
                 continue
 
-            wo_boxes = get_wo_boxes(ground_truth_dir_sub)
-            run_prepare(wo_boxes, ground_truth_dir_sub, par_factor=par_factor)
+            _prepare_dir(ground_truth_dir_sub, par_factor=par_factor, batch_size=batch_size, cache=cache)
     else:
-        wo_boxes = get_wo_boxes(ground_truth_dir)
-        run_prepare(wo_boxes, ground_truth_dir, par_factor=par_factor)
+        _prepare_dir(ground_truth_dir, par_factor=par_factor, batch_size=batch_size, cache=cache)
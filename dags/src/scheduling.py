@@ -0,0 +1,35 @@
+import itertools
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+
+
+def iter_bounded(executor, fn, items, max_in_flight):
+    """
+    Аналог executor.map, который держит в работе не больше max_in_flight задач и читает items лениво,
+    поэтому память не растет с размером входа. Отдает (item, future) в порядке завершения.
+    """
+    items = iter(items)
+    in_flight = {executor.submit(fn, item): item for item in itertools.islice(items, max_in_flight)}
+
+    while in_flight:
+        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+            item = in_flight.pop(future)
+            for next_item in itertools.islice(items, 1):
+                in_flight[executor.submit(fn, next_item)] = next_item
+            yield item, future
+
+
+def iter_bounded_ordered(executor, fn, items, max_in_flight):
+    """
+    То же, что iter_bounded, но отдает результаты fn в порядке items. Следующая задача ставится в работу
+    до того, как отдан очередной результат, поэтому пока потребитель пишет результат, пул не простаивает.
+    """
+    items = iter(items)
+    in_flight = deque(executor.submit(fn, item) for item in itertools.islice(items, max_in_flight))
+
+    while in_flight:
+        future = in_flight.popleft()
+        for next_item in itertools.islice(items, 1):
+            in_flight.append(executor.submit(fn, next_item))
+        yield future.result()
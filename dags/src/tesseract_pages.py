@@ -0,0 +1,196 @@
+"""
+Распознавание страниц книги tesseract: по процессу tesseract на страницу, не больше max_workers одновременно.
+Каждый процесс tesseract запускается с OMP_THREAD_LIMIT=1 - параллелизм дают страницы, а не потоки OpenMP,
+которые при нескольких процессах только конкурируют за ядра.
+
+Результат каждой страницы (статус, время, ошибка) дописывается в manifest, страницы, для которых уже есть
+txt/hocr/tsv, пропускаются - перезапуск задачи продолжает с места остановки.
+
+run_tesseract_pdf распознает страницы прямо из PDF: страница рендерится в память (pdf_raster) и отдается
+tesseract через stdin в виде PGM, без промежуточных JPEG на диске.
+"""
+import os
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from tqdm import tqdm
+
+from . import pdf_raster
+from .const import TESSERACT_CONFIG
+from .scheduling import iter_bounded
+
+TESSERACT_CMD = "tesseract"
+MANIFEST_FILE_NAME = "tesseract_manifest.tsv"
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".tif", ".tiff")
+OUTPUT_EXTS = (".txt", ".hocr", ".tsv")
+
+
+@dataclass
+class TesseractStats:
+    total: int = 0
+    done: int = 0
+    skipped: int = 0
+    failed: list = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def throughput(self):
+        return self.done / self.elapsed if self.elapsed else 0.0
+
+
+def get_output_base(txt_dir, image_name):
+    # как и раньше: page-001.jpg -> page-001.txt.{txt,hocr,tsv}
+    return os.path.join(txt_dir, f"{os.path.splitext(image_name)[0]}.txt")
+
+
+def has_outputs(output_name, output_dirs):
+    """Для каждого из txt/hocr/tsv есть файл хотя бы в одной из output_dirs (после переноса hocr/tsv)."""
+    return all(any(os.path.exists(os.path.join(d, f"{output_name}{ext}")) for d in output_dirs) for ext in OUTPUT_EXTS)
+
+
+def _tesseract_page(image_path, output_base, tesseract_lang, config, image_data=None, dpi=None):
+    """
+    :param image_data: содержимое изображения для stdin, тогда image_path не используется
+    :param dpi: разрешение для tesseract, если его нет в самом изображении (PGM)
+    :return: (ошибка или None, время в секундах)
+    """
+    cmd = [TESSERACT_CMD, "-l", tesseract_lang]
+    if dpi:
+        cmd += ["--dpi", str(dpi)]
+    cmd += ["stdin" if image_data is not None else image_path, output_base, config]
+    env = {**os.environ, "OMP_THREAD_LIMIT": "1"}
+
+    start = time.perf_counter()
+    result = subprocess.run(cmd, input=image_data, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, env=env)
+    elapsed = time.perf_counter() - start
+
+    if result.returncode == 0:
+        return None, elapsed
+    return result.stderr.decode("utf-8", errors="replace").strip() or f"exit code {result.returncode}", elapsed
+
+
+def _write_manifest_row(manifest_path, image_name, status, elapsed, error=""):
+    error = " ".join(error.split())
+    with open(manifest_path, "a", encoding="utf-8") as f:
+        f.write(f"{image_name}\t{status}\t{elapsed:.3f}\t{error}\n")
+
+
+def _get_manifest_path(txt_dir, manifest_path):
+    return manifest_path or os.path.join(os.path.dirname(os.path.normpath(txt_dir)), MANIFEST_FILE_NAME)
+
+
+def _run_pages(names, process, txt_dir, done_dirs, manifest_path, max_workers, source):
+    """
+    Общий цикл: пропуск готовых страниц, пул потоков, manifest и статистика.
+
+    :param process: name -> (ошибка или None, время в секундах)
+    """
+    output_dirs = [txt_dir, *done_dirs]
+    stats = TesseractStats(total=len(names))
+
+    to_process = []
+    for name in names:
+        if has_outputs(os.path.basename(get_output_base(txt_dir, name)), output_dirs):
+            stats.skipped += 1
+            _write_manifest_row(manifest_path, name, "skipped", 0.0)
+        else:
+            to_process.append(name)
+
+    start = time.perf_counter()
+    with tqdm(total=len(to_process), unit="page") as pbar, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for name, future in iter_bounded(executor, process, to_process, max_in_flight=2 * max_workers):
+            error, elapsed = future.result()
+            if error:
+                print(f"tesseract failed for {name}: {error}")
+                stats.failed.append(name)
+                _write_manifest_row(manifest_path, name, "failed", elapsed, error)
+            else:
+                stats.done += 1
+                _write_manifest_row(manifest_path, name, "ok", elapsed)
+            pbar.update(1)
+            pbar.set_postfix(failed=len(stats.failed), refresh=False)
+    stats.elapsed = time.perf_counter() - start
+
+    print(
+        f"Recognized {stats.done} pages in {source}: {stats.throughput:.2f} pages/s, "
+        f"skipped {stats.skipped}, failed {len(stats.failed)}"
+    )
+    return stats
+
+
+def run_tesseract_pages(
+    image_dir,
+    txt_dir,
+    tesseract_lang,
+    config=TESSERACT_CONFIG,
+    done_dirs=(),
+    manifest_path=None,
+    max_workers=None,
+):
+    """
+    :param done_dirs: куда уже могли быть перенесены hocr/tsv прошлых запусков, кроме txt_dir
+    :param manifest_path: tsv image_name/status/seconds/error, по умолчанию - рядом с txt_dir
+    :return: TesseractStats
+    """
+    max_workers = max_workers or os.cpu_count()
+    image_names = sorted(f for f in os.listdir(image_dir) if f.lower().endswith(IMAGE_EXTS))
+
+    def process(image_name):
+        return _tesseract_page(
+            os.path.join(image_dir, image_name), get_output_base(txt_dir, image_name), tesseract_lang, config
+        )
+
+    return _run_pages(
+        image_names, process, txt_dir, done_dirs, _get_manifest_path(txt_dir, manifest_path), max_workers, image_dir
+    )
+
+
+def run_tesseract_pdf(
+    pdf_path,
+    txt_dir,
+    tesseract_lang,
+    config=TESSERACT_CONFIG,
+    done_dirs=(),
+    manifest_path=None,
+    max_workers=None,
+    dpi=pdf_raster.DEFAULT_DPI,
+    image_dir=None,
+):
+    """
+    Как run_tesseract_pages, но страницы берутся прямо из PDF. Рендеринг идет в отдельном пуле процессов
+    (PyMuPDF держит GIL), в памяти одновременно не больше max_workers страниц.
+
+    :param image_dir: если задан, страницы дополнительно сохраняются туда в PNG (без потерь)
+    :return: TesseractStats
+    """
+    max_workers = max_workers or os.cpu_count()
+    page_names = pdf_raster.get_page_names(pdf_raster.get_page_count(pdf_path))
+    page_index_by_name = {name: i for i, name in enumerate(page_names)}
+
+    with ProcessPoolExecutor(
+        max_workers=max_workers, initializer=pdf_raster.init_render_worker, initargs=(pdf_path,)
+    ) as render_executor:
+
+        def process(page_name):
+            start = time.perf_counter()
+            try:
+                shm_name, shape = render_executor.submit(
+                    pdf_raster.render_page,
+                    page_index_by_name[page_name],
+                    dpi,
+                    pdf_raster.get_image_path(image_dir, page_name),
+                ).result()
+            except Exception as e:
+                return f"render failed: {e}", time.perf_counter() - start
+
+            with pdf_raster.RenderedPage(shm_name, shape) as page:
+                error, _ = _tesseract_page(
+                    None, get_output_base(txt_dir, page_name), tesseract_lang, config, image_data=page.pgm, dpi=dpi
+                )
+            return error, time.perf_counter() - start
+
+        return _run_pages(
+            page_names, process, txt_dir, done_dirs, _get_manifest_path(txt_dir, manifest_path), max_workers, pdf_path
+        )
@@ -0,0 +1,40 @@
+import io
+import os
+import tempfile
+import unittest
+
+from ..corpus_cleaner import clean_corpus, iter_line_chunks
+from ..text_cleaner import clean_text
+
+LINES = [
+    "Адыгэбзэр зэрызэхэлъыр къэпщIэн папщIэ,псалъэхэм я лъабжьэр къэгъуэтын хуейщ!!",
+    "1945 : I ? I I, I I! > I I I I.",
+    "Страница <b>12</b> Lorem ГЛАВА уэркъ...",
+]
+
+
+class TestCorpusCleaner(unittest.TestCase):
+    def test_chunks_are_line_aligned(self):
+        text = "".join(f"{line}\n" for line in LINES * 10)
+        chunks = list(iter_line_chunks(io.StringIO(text), chunk_size=100))
+
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), text)
+        self.assertTrue(all(chunk.endswith("\n") for chunk in chunks))
+
+    def test_same_as_clean_text(self):
+        text = "".join(f"{line}\n" for line in LINES * 50)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            input_path = os.path.join(tmp_dir, "corpus.txt")
+            with open(input_path, "w", encoding="utf-8") as f:
+                f.write(text)
+
+            clean_corpus(input_path, workers=2, chunk_size=300)
+
+            with open(input_path, "r", encoding="utf-8") as f:
+                self.assertEqual(f.read(), clean_text(text))
+            self.assertEqual(os.listdir(tmp_dir), ["corpus.txt"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import csv
+import os
+import tempfile
+import unittest
+
+from ..diff_by_langs import _extract_diff_words, get_diff_word
+
+
+class TestDiffByLangs(unittest.TestCase):
+    def test_extract_diff_words(self):
+        self.assertEqual(_extract_diff_words("Адыгэ, хъыбархэр!", "Адыгэ хъыбархэр"), ((), ()))
+        self.assertEqual(
+            _extract_diff_words("сыт хуэдэ жэуап уиIэн", "сыт хуэлэ жэуап унIэн"),
+            (("хуэдэ", "уиIэн"), ("хуэлэ", "унIэн")),
+        )
+
+    def test_get_diff_word(self):
+        pages_1 = ["сыт хуэдэ жэуап\nАдыгэ хъыбархэр\n", "тхылъ\nуэркъ\n"]
+        pages_2 = ["сыт хуэлэ жэуап\nАдыгэ хъыбархэр\n", "тхылъ\nуэркь\n"]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for lang, pages in [("lang_1", pages_1), ("lang_2", pages_2)]:
+                os.makedirs(os.path.join(tmp_dir, lang))
+                for page_i, text in enumerate(pages):
+                    with open(os.path.join(tmp_dir, lang, f"page_{page_i:03d}.txt"), "w") as f:
+                        f.write(text)
+
+            output_file = os.path.join(tmp_dir, "diff_words.csv")
+            rows_count = get_diff_word(
+                os.path.join(tmp_dir, "lang_1"), os.path.join(tmp_dir, "lang_2"), "lang_1", "lang_2", output_file, 2
+            )
+
+            with open(output_file, encoding="utf-8") as f:
+                rows = list(csv.reader(f))
+
+        self.assertEqual(rows_count, 2)
+        self.assertEqual(rows, [["lang_1", "lang_2"], ["хуэдэ", "хуэлэ"], ["уэркъ", "уэркь"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+
+from ..hocr_beatify import _read_header, get_conf_color, get_word_confidence, hocr_to_html
+
+HOCR_PAGE = """<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN"
+    "http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">
+<html xmlns="http://www.w3.org/1999/xhtml" xml:lang="en" lang="en">
+ <head>
+  <title></title>
+  <meta name='ocr-system' content='tesseract 5.3.0' />
+ </head>
+ <body>
+  <div class='ocr_page' id='page_1' title='image "page.jpg"; bbox 0 0 2480 3508; ppageno 0'>
+   <p class='ocr_par' id='par_1_1' lang='kbd' title="bbox 100 100 900 200">
+    <span class='ocr_line' id='line_1_1' title="bbox 100 100 900 200; baseline 0 -5">
+     <span class='ocrx_word' id='word_1_1' title='bbox 100 100 300 200; x_wconf {conf_1}'>Адыгэ</span>
+     <span class='ocrx_word' id='word_1_2' title='bbox 320 100 600 200; x_wconf {conf_2}'>&lt;тхылъ&gt;</span>
+    </span>
+   </p>
+  </div>
+ </body>
+</html>
+"""
+
+
+class TestHocrToHtml(unittest.TestCase):
+    def test_merge_pages(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            hocr_dir = os.path.join(tmp_dir, "hocrs")
+            os.makedirs(hocr_dir)
+            for page, (conf_1, conf_2) in enumerate([(96, 45), (5, 100)]):
+                with open(os.path.join(hocr_dir, f"page_{page:03d}.hocr"), "w", encoding="utf-8") as f:
+                    f.write(HOCR_PAGE.format(conf_1=conf_1, conf_2=conf_2))
+
+            output_path = os.path.join(tmp_dir, "output.html")
+            conf_hist_path = os.path.join(tmp_dir, "conf_hist_by_page.tsv")
+            hocr_to_html(hocr_dir, output_path, conf_hist_path=conf_hist_path)
+
+            with open(output_path, encoding="utf-8") as f:
+                html = f.read()
+            with open(conf_hist_path, encoding="utf-8") as f:
+                conf_hist = [line.rstrip("\n").split("\t") for line in f]
+
+        self.assertEqual(html.count("<head>"), 1)
+        self.assertEqual(html.count("<hr/>"), 1)
+        self.assertTrue(html.rstrip().endswith("</body>\n</html>"))
+        self.assertLess(html.index('id="page_0"'), html.index('id="page_1"'))
+        self.assertIn("&lt;тхылъ&gt;", html)
+        styles = [line.split('style="')[1].split('"')[0] for line in html.splitlines() if "ocrx_word" in line]
+        self.assertEqual(styles, ["color: black;", "color: gold;", "color: darkred;", "color: black;"])
+        self.assertEqual(
+            conf_hist[0],
+            ["page", "0_10", "10_20", "20_30", "30_40", "40_50", "50_60", "60_70", "70_80", "80_90", "90_100"],
+        )
+        self.assertEqual(conf_hist[1], ["page_000", "0", "0", "0", "0", "1", "0", "0", "0", "0", "1"])
+        self.assertEqual(conf_hist[2], ["page_001", "1", "0", "0", "0", "0", "0", "0", "0", "0", "1"])
+
+
+class TestReadHeader(unittest.TestCase):
+    def test_stops_at_body(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_path = os.path.join(tmp_dir, "page.hocr")
+            header, body = HOCR_PAGE.split(" <body>\n")
+            with open(file_path, "wb") as f:
+                f.write(f"{header} <body>\n".encode("utf-8"))
+                f.write(" ".encode("utf-8") * 256 * 1024)
+                # дальше <body> файл не читается, поэтому битый utf-8 в конце не мешает
+                f.write(b"\xff\xfe")
+
+            self.assertEqual(_read_header(file_path), f"{header} <body>\n")
+
+
+class TestConfidenceColor(unittest.TestCase):
+    def test_get_conf_color(self):
+        cases = [(0, "darkred"), (9.99, "darkred"), (10, "red"), (45, "gold"), (89, "darkgreen"), (95, "black")]
+        cases += [(100, "black"), (-1, "black"), (101, "black")]
+        for confidence, color in cases:
+            self.assertEqual(get_conf_color(confidence), color, confidence)
+
+    def test_get_word_confidence(self):
+        self.assertEqual(get_word_confidence("bbox 100 100 300 200; x_wconf 96"), 96)
+        self.assertEqual(get_word_confidence("x_wconf 45.5; bbox 1 2 3 4"), 45.5)
+        self.assertIsNone(get_word_confidence("bbox 100 100 300 200"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import os
+import re
+import tempfile
+import unittest
+
+from ..html_diff_report import make_table, write_html_diff_report
+
+
+class TestHtmlDiffReport(unittest.TestCase):
+    def test_one_document_with_tables_in_order(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_pairs = []
+            for page_i in range(5):
+                paths = []
+                for lang in ("lang_1", "lang_2"):
+                    path = os.path.join(tmp_dir, f"{lang}_{page_i}.txt")
+                    with open(path, "w") as f:
+                        f.write(f"адыгэ {page_i}\nтхылъ {lang}\n")
+                    paths.append(path)
+                file_pairs.append((*paths, f"page:{page_i} (lang_1)", f"page:{page_i} (lang_2)"))
+
+            output_file = os.path.join(tmp_dir, "merged_diff.html")
+            self.assertEqual(write_html_diff_report(output_file, iter(file_pairs), max_workers=2), 5)
+
+            with open(output_file, encoding="utf-8") as f:
+                report = f.read()
+
+        self.assertEqual(report.count("<html>"), 1)
+        self.assertEqual(report.count("</html>"), 1)
+        self.assertEqual(re.findall(r"page:(\d) \(lang_1\)", report), ["0", "1", "2", "3", "4"])
+        anchors = re.findall(r'id="(difflib_chg_to\d+__0)"', report)
+        self.assertEqual(len(anchors), len(set(anchors)))
+
+    def test_anchors_use_table_num(self):
+        table = make_table(7, ["адыгэ\n", "тхылъ\n"], ["адыгэ\n", "тхыль\n"])
+
+        self.assertIn('id="difflib_chg_to7__0"', table)
+        self.assertIn('href="#difflib_chg_to7__top"', table)
+        self.assertIn('id="from7_2"', table)
+        self.assertIn('id="to7_2"', table)
+        self.assertIsNone(re.search(r"(?:from|to)(?!7_)\d+_", table))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,198 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from .. import image_generator
+from ..image_generator import (
+    AgeingFactorEnum,
+    ExecutorEnum,
+    OutputFormatEnum,
+    RenderManifest,
+    _generate_chunk,
+    _init_worker,
+    apply_aging_effect,
+    generate_images,
+    load_text,
+)
+from ..packed_corpus import PackWriter, get_pack_dir, iter_samples
+
+FONT_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "..",
+    "..",
+    "..",
+    "tesseract",
+    "tesstrain",
+    "kbd",
+    "fonts",
+    "DejaVuSerif.ttf",
+)
+
+
+class TestApplyAgingEffect(unittest.TestCase):
+    def test_same_seed_same_image(self):
+        image = Image.new("L", (200, 40), color=128)
+        image_1 = apply_aging_effect(image, AgeingFactorEnum.MEDIUM.value, rng=np.random.default_rng(42))
+        image_2 = apply_aging_effect(image, AgeingFactorEnum.MEDIUM.value, rng=np.random.default_rng(42))
+        self.assertEqual(image_1.tobytes(), image_2.tobytes())
+
+    def test_changed_ratio_by_band(self):
+        rng = np.random.default_rng(0)
+        for level in AgeingFactorEnum:
+            for color, factor in zip((60, 128, 255), level.value):
+                image = Image.new("L", (400, 100), color=color)
+                pixels = np.asarray(apply_aging_effect(image, level.value, rng=rng), dtype=np.int16)
+                changed = np.count_nonzero(pixels != color) / pixels.size
+                # шаг 0 тоже выпадает (1/16 и 1/31), поэтому сравниваем с поправкой
+                expected = factor * (1 - 1 / 31 if color == 128 else 1 - 1 / 16)
+                self.assertAlmostEqual(changed, expected, delta=0.02)
+
+    def test_black_and_white_only_darken(self):
+        rng = np.random.default_rng(0)
+        for color in (40, 220):
+            image = Image.new("L", (200, 40), color=color)
+            pixels = np.asarray(apply_aging_effect(image, (1.0, 1.0, 1.0), rng=rng), dtype=np.int16)
+            self.assertTrue((pixels <= color).all())
+
+
+class TestLoadText(unittest.TestCase):
+    def setUp(self):
+        lines = [f"строка для генерации номер {i % 300}" for i in range(1000)] + ["коротко", "x" * 200]
+        fd, self.text_filepath = tempfile.mkstemp(suffix=".txt")
+        with os.fdopen(fd, "w") as f:
+            f.write("\n".join(lines))
+
+    def tearDown(self):
+        os.remove(self.text_filepath)
+
+    def test_sample_is_unique_and_bounded(self):
+        text_lines = load_text(self.text_filepath, max_lines=100, seed=1)
+        self.assertEqual(len(text_lines), 100)
+        self.assertEqual(len(set(text_lines)), 100)
+        self.assertTrue(all(20 < len(line) < 120 for line in text_lines))
+
+    def test_all_unique_lines_when_max_lines_is_large(self):
+        text_lines = load_text(self.text_filepath, max_lines=1000, seed=1)
+        self.assertEqual(len(text_lines), 300)
+
+    def test_seed_is_reproducible(self):
+        self.assertEqual(load_text(self.text_filepath, 50, seed=7), load_text(self.text_filepath, 50, seed=7))
+        self.assertNotEqual(
+            set(load_text(self.text_filepath, 50, seed=7)), set(load_text(self.text_filepath, 50, seed=8))
+        )
+
+
+class TestRenderManifest(unittest.TestCase):
+    def test_resume_from_shards(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            manifest = RenderManifest(output_dir)
+            manifest.ensure_dir("by_text/a")
+            manifest.add("by_text/a/key_1")
+            manifest.add("key_2")
+
+            # прерванная запись в другом шарде
+            with open(os.path.join(output_dir, RenderManifest.DIR_NAME, "broken.txt"), "w") as f:
+                f.write("key_3\nkey_4")
+
+            loaded = RenderManifest.load(output_dir)
+            self.assertEqual(loaded.rendered, {"by_text/a/key_1", "key_2", "key_3"})
+            self.assertTrue(os.path.isdir(os.path.join(output_dir, "by_text/a")))
+
+
+class TestWorkers(unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.font_dir = os.path.join(self._tmp_dir.name, "fonts")
+        os.makedirs(self.font_dir)
+        shutil.copy(FONT_PATH, self.font_dir)
+        open(os.path.join(self.font_dir, "broken.ttf"), "w").close()
+
+        self.text_filepath = os.path.join(self._tmp_dir.name, "lines.txt")
+        with open(self.text_filepath, "w") as f:
+            f.write("\n".join(f"строка для генерации изображений {i}" for i in range(7)))
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def test_init_worker(self):
+        output_dir = os.path.join(self._tmp_dir.name, "out")
+        _init_worker(self.font_dir, 20, output_dir, {"key"}, OutputFormatEnum.PACKED.value)
+        worker = image_generator._worker_local
+        self.assertEqual([os.path.basename(font.path) for font in worker.fonts], ["DejaVuSerif.ttf"])
+        self.assertTrue(worker.manifest.is_rendered("key"))
+        self.assertIsInstance(worker.pack_writer, PackWriter)
+
+        _init_worker(self.font_dir, 20, output_dir, set())
+        self.assertIsNone(image_generator._worker_local.pack_writer)
+
+    def _generate(self, executor, output_format=OutputFormatEnum.FILES.value):
+        output_dir = os.path.join(self._tmp_dir.name, f"{executor}_{output_format}")
+        generate_images(
+            self.text_filepath,
+            self.font_dir,
+            output_dir,
+            font_size=20,
+            max_lines=7,
+            par_factor=2,
+            font_per_line=1,
+            executor=executor,
+            chunk_size=3,
+            seed=5,
+            output_format=output_format,
+        )
+        return output_dir, sorted(f for f in os.listdir(output_dir) if f.endswith(".png"))
+
+    def test_process_executor_matches_thread_executor(self):
+        process_dir, process_files = self._generate(ExecutorEnum.PROCESS.value)
+        thread_dir, thread_files = self._generate(ExecutorEnum.THREAD.value)
+        self.assertEqual(len(process_files), 7)
+        self.assertEqual(process_files, thread_files)
+        # при заданном seed состаривание зависит от чанка, а не от воркера
+        for file_name in process_files:
+            with Image.open(os.path.join(process_dir, file_name)) as p, Image.open(
+                os.path.join(thread_dir, file_name)
+            ) as t:
+                self.assertEqual(p.tobytes(), t.tobytes())
+        self.assertEqual(len(RenderManifest.load(process_dir).rendered), 7)
+
+    def test_chunk_closes_pack_shard(self):
+        output_dir = os.path.join(self._tmp_dir.name, "out")
+        pack_dir = get_pack_dir(output_dir)
+        _init_worker(self.font_dir, 20, output_dir, set(), OutputFormatEnum.PACKED.value)
+
+        for chunk_index, text_lines in enumerate([["строка для генерации номер 1"], ["строка для генерации номер 2"]]):
+            _generate_chunk(chunk_index, text_lines, output_dir, font_per_line=1, seed=5)
+            # воркер живет дальше, но шард после чанка уже закрыт
+            open_paths = set()
+            for fd in os.listdir("/proc/self/fd"):
+                try:
+                    open_paths.add(os.readlink(os.path.join("/proc/self/fd", fd)))
+                except OSError:
+                    continue
+            self.assertFalse({path for path in open_paths if path.startswith(pack_dir)})
+
+        # второй чанк дописал в тот же шард
+        self.assertEqual(len([f for f in os.listdir(pack_dir) if f.endswith(".pack")]), 1)
+        self.assertEqual(
+            [text for _, _, text in iter_samples(pack_dir)],
+            ["строка для генерации номер 1", "строка для генерации номер 2"],
+        )
+
+    def test_packed_output_read_back(self):
+        output_dir, _ = self._generate(ExecutorEnum.THREAD.value, OutputFormatEnum.PACKED.value)
+
+        samples = list(iter_samples(get_pack_dir(output_dir)))
+        self.assertEqual(len(samples), 7)
+        self.assertEqual(
+            sorted(text for _, _, text in samples), [f"строка для генерации изображений {i}" for i in range(7)]
+        )
+        for _, png_bytes, _ in samples:
+            self.assertTrue(png_bytes.startswith(b"\x89PNG"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from .. import lang_compare
+from ..lang_compare import _merge_books, get_book_df, get_conf_buckets
+from ..path_utils import get_book_df_cache_path
+
+TSV_HEADER = "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext\n"
+
+
+def write_page_tsv(tsv_dir, page, words):
+    with open(os.path.join(tsv_dir, f"{page}.tsv"), "w", encoding="utf-8") as f:
+        f.write(TSV_HEADER)
+        f.write("1\t1\t0\t0\t0\t0\t0\t0\t2480\t3508\t-1\t\n")
+        for word_num, (word, conf) in enumerate(words, start=1):
+            f.write(f"5\t1\t1\t1\t1\t{word_num}\t{word_num * 10}\t10\t8\t8\t{conf}\t{word}\n")
+
+
+class TestGetBookDf(unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.tsv_dir = os.path.join(self._tmp_dir.name, "rslt_kbd", "tsvs")
+        os.makedirs(self.tsv_dir)
+        write_page_tsv(self.tsv_dir, "page_002", [("уэркъ", 91.5), ("12", 40)])
+        write_page_tsv(self.tsv_dir, "page_001", [("адыгэ", 96.25)])
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def test_dtypes_and_pages(self):
+        book_df = get_book_df(self.tsv_dir, use_cache=False)
+
+        self.assertEqual(book_df["page_num"].dtype, "int16")
+        self.assertEqual(book_df["left"].dtype, "int32")
+        self.assertEqual(book_df["conf"].dtype, "float32")
+        self.assertEqual(list(book_df["page"].cat.categories), ["page_001", "page_002"])
+        self.assertEqual(list(book_df["page"]), ["page_001"] * 2 + ["page_002"] * 3)
+        self.assertEqual(list(book_df["text"].dropna()), ["адыгэ", "уэркъ", "12"])
+
+    def test_parallel_same_as_sequential(self):
+        with mock.patch.object(lang_compare, "PARALLEL_MIN_PAGES", 1):
+            parallel_df = get_book_df(self.tsv_dir, use_cache=False, max_workers=2)
+
+        pd.testing.assert_frame_equal(parallel_df, get_book_df(self.tsv_dir, use_cache=False))
+
+    def test_cache(self):
+        book_df = get_book_df(self.tsv_dir)
+        cache_path = get_book_df_cache_path(self.tsv_dir)
+        self.assertTrue(os.path.exists(cache_path))
+
+        with mock.patch.object(lang_compare, "_read_page_tsv") as read_page_tsv:
+            pd.testing.assert_frame_equal(get_book_df(self.tsv_dir), book_df)
+            read_page_tsv.assert_not_called()
+
+        time.sleep(0.01)
+        write_page_tsv(self.tsv_dir, "page_003", [("тхылъ", 70)])
+        self.assertEqual(list(get_book_df(self.tsv_dir)["page"].cat.categories), ["page_001", "page_002", "page_003"])
+
+
+class TestCompareStats(unittest.TestCase):
+    def test_merge_books_same_as_separate_merges(self):
+        rng = np.random.default_rng(0)
+
+        def make_book_df(size):
+            return pd.DataFrame(
+                {
+                    "page": pd.Categorical(rng.choice(["page_001", "page_002"], size)),
+                    "text": rng.choice(["адыгэ", "уэркъ", "тхылъ", "12"], size),
+                    "level": 5,
+                    "page_num": 1,
+                    "block_num": rng.integers(0, 2, size),
+                    "par_num": 1,
+                    "line_num": rng.integers(0, 3, size),
+                    "conf": rng.uniform(0, 100, size).astype("float32"),
+                }
+            )
+
+        book_df_1, book_df_2 = make_book_df(200), make_book_df(150)
+        join_by = ["page", "text", "level", "page_num", "block_num", "par_num", "line_num"]
+        show_cols = ["page", "text", "conf_1", "conf_2"]
+        inner_df, left_df, right_df = _merge_books(book_df_1, book_df_2, join_by)
+
+        expected_inner_df = pd.merge(book_df_1, book_df_2, on=join_by, suffixes=("_1", "_2"))
+        expected_left_df = pd.merge(book_df_1, book_df_2, on=join_by, how="left", suffixes=("_1", "_2"))
+        expected_left_df = expected_left_df[expected_left_df["conf_2"].isna()]
+        expected_right_df = pd.merge(book_df_1, book_df_2, on=join_by, how="right", suffixes=("_1", "_2"))
+        expected_right_df = expected_right_df[expected_right_df["conf_1"].isna()]
+
+        for df, expected_df in [
+            (inner_df, expected_inner_df),
+            (left_df, expected_left_df),
+            (right_df, expected_right_df),
+        ]:
+            pd.testing.assert_frame_equal(
+                df[show_cols].astype({"page": str}),
+                expected_df[show_cols].astype({"page": str}),
+                check_dtype=False,
+            )
+
+    def test_conf_buckets(self):
+        buckets = get_conf_buckets(np.array([-1, 0, 30, 30.5, 60, 89.9, 90, 96], dtype="float32"))
+        self.assertEqual(list(buckets), [-1, 0, 0, 1, 1, 2, 2, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import os
+import tempfile
+import unittest
+
+from ..packed_corpus import INDEX_EXT, PackWriter, export_samples, iter_samples
+
+
+class TestPackedCorpus(unittest.TestCase):
+    def test_round_trip_and_export(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pack_dir = os.path.join(tmp_dir, "packed")
+            writer = PackWriter(pack_dir, max_shard_bytes=16)
+            writer.add("by_text/a/key_1", b"png-1", "текст 1")
+            writer.add("key_2", b"png-22", "текст 2")
+            writer.add("key_2", b"png-22", "текст 2")
+
+            index_files = [f for f in os.listdir(pack_dir) if f.endswith(INDEX_EXT)]
+            self.assertEqual(len(index_files), 3)
+
+            samples = list(iter_samples(pack_dir))
+            self.assertEqual(
+                sorted(samples), [("by_text/a/key_1", b"png-1", "текст 1"), ("key_2", b"png-22", "текст 2")]
+            )
+
+            ground_truth_dir = os.path.join(tmp_dir, "gt")
+            self.assertEqual(export_samples(pack_dir, ground_truth_dir), 2)
+            self.assertEqual(export_samples(pack_dir, ground_truth_dir), 0)
+            with open(os.path.join(ground_truth_dir, "by_text/a/key_1.gt.txt"), encoding="utf-8") as f:
+                self.assertEqual(f.read(), "текст 1")
+
+    def test_previous_shard_is_closed(self):
+        with tempfile.TemporaryDirectory() as pack_dir:
+            open_fds = len(os.listdir("/proc/self/fd"))
+            writer = PackWriter(pack_dir, max_shard_bytes=1)
+            for i in range(20):
+                writer.add(f"key_{i}", b"png", "текст")
+            self.assertEqual(len([f for f in os.listdir(pack_dir) if f.endswith(INDEX_EXT)]), 20)
+            self.assertEqual(len(os.listdir("/proc/self/fd")), open_fds + 2)
+
+            writer.close()
+            self.assertEqual(len(os.listdir("/proc/self/fd")), open_fds)
+            self.assertEqual(len(list(iter_samples(pack_dir))), 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+from multiprocessing import shared_memory
+
+import fitz
+
+from .. import pdf_raster
+
+
+def make_pdf(pdf_path, page_count):
+    doc = fitz.open()
+    for page_num in range(page_count):
+        page = doc.new_page(width=144, height=72)
+        page.insert_text((10, 40), f"page {page_num + 1}")
+    doc.save(pdf_path)
+    doc.close()
+
+
+class TestPdfRaster(unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.pdf_path = os.path.join(self._tmp_dir.name, "book.pdf")
+        make_pdf(self.pdf_path, 2)
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def test_page_names(self):
+        self.assertEqual(pdf_raster.get_page_names(9)[-1], "page-9")
+        self.assertEqual(pdf_raster.get_page_names(150)[:2], ["page-001", "page-002"])
+
+    def test_render_page(self):
+        image_dir = os.path.join(self._tmp_dir.name, "pngs")
+        pdf_raster.init_render_worker(self.pdf_path)
+        shm_name, shape = pdf_raster.render_page(1, dpi=72, image_path=pdf_raster.get_image_path(image_dir, "page-2"))
+        self.assertEqual(shape, (72, 144))
+
+        with pdf_raster.RenderedPage(shm_name, shape) as page:
+            self.assertEqual(bytes(page.pgm[:15]), b"P5\n144 72\n255\n\xff")
+            self.assertEqual(len(page.pgm), 14 + 72 * 144)
+            array = page.array
+            self.assertEqual(array.shape, shape)
+            self.assertLess(array.min(), 128)
+            self.assertEqual(fitz.Pixmap(os.path.join(image_dir, "page-2.png")).samples, array.tobytes())
+            del array
+
+        with self.assertRaises(FileNotFoundError):
+            shared_memory.SharedMemory(name=shm_name)
+
+    def test_release_with_live_view(self):
+        pdf_raster.init_render_worker(self.pdf_path)
+        shm_name, shape = pdf_raster.render_page(0, dpi=72)
+
+        with self.assertRaisesRegex(RuntimeError, "tesseract failed"):
+            with pdf_raster.RenderedPage(shm_name, shape) as page:
+                array = page.array  # noqa: F841
+                raise RuntimeError("tesseract failed")
+
+        with self.assertRaises(FileNotFoundError):
+            shared_memory.SharedMemory(name=shm_name)
+
+
+if __name__ == "__main__":
+    unittest.main()
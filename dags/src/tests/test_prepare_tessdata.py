@@ -0,0 +1,182 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from PIL import Image
+
+from .. import prepare_tessdata
+from ..prepare_tessdata import (
+    BATCH_DIR_NAME,
+    CACHE_STATE_FILE_NAME,
+    FAILED_FILE_NAME,
+    LstmfCache,
+    _prepare_dir_with_cache,
+    _run_prepare,
+    _run_prepare_batch,
+    generate_line_box,
+    read_image_size,
+    write_line_box,
+    write_lstmf_list,
+)
+
+
+def fake_lstm_train(input_path, output_base):
+    """Как tesseract со списком: падает целиком, если в списке есть "bad"-образец."""
+    with open(input_path, encoding="utf-8") as f:
+        if "bad" in f.read():
+            return "Error: cannot read image"
+    open(f"{output_base}.lstmf", "w").close()
+    return None
+
+
+class TestLineBox(unittest.TestCase):
+    def test_generate_line_box(self):
+        box = generate_line_box(100, 20, " Iэ\u0301 и\u0306 ")
+        expected_lines = [
+            "I 0 0 100 20 0",
+            "э\u0301 0 0 100 20 0",
+            "  0 0 100 20 0",
+            "й 0 0 100 20 0",
+            "\t 100 20 101 21 0",
+        ]
+        self.assertEqual(box, "".join(f"{line}\n" for line in expected_lines))
+
+    def test_empty_line(self):
+        self.assertEqual(generate_line_box(100, 20, "  "), "")
+
+    def test_write_line_box(self):
+        with tempfile.TemporaryDirectory() as ground_truth_dir:
+            Image.new("L", (37, 11), color=255).save(os.path.join(ground_truth_dir, "sample.png"))
+            Image.new("L", (41, 13), color=255).save(os.path.join(ground_truth_dir, "sample.jpg"))
+            with open(os.path.join(ground_truth_dir, "sample.gt.txt"), "w", encoding="utf-8") as f:
+                f.write("ди\n")
+
+            self.assertEqual(read_image_size(os.path.join(ground_truth_dir, "sample.jpg")), (41, 13))
+            write_line_box("sample", ground_truth_dir)
+            with open(os.path.join(ground_truth_dir, "sample.box"), encoding="utf-8") as f:
+                self.assertEqual(f.read(), "д 0 0 37 11 0\nи 0 0 37 11 0\n\t 37 11 38 12 0\n")
+
+    def test_multiline_gt_is_failed_sample(self):
+        with tempfile.TemporaryDirectory() as ground_truth_dir:
+            Image.new("L", (37, 11), color=255).save(os.path.join(ground_truth_dir, "sample.png"))
+            with open(os.path.join(ground_truth_dir, "sample.gt.txt"), "w", encoding="utf-8") as f:
+                f.write("ди\nди\n")
+
+            self.assertEqual(_run_prepare("sample", ground_truth_dir), ["sample"])
+            self.assertFalse(os.path.exists(os.path.join(ground_truth_dir, "sample.box")))
+
+
+def fake_lstm_train_sample(input_path, output_base):
+    """lstm.train для одного образца: .lstmf содержит текст gt, образцы с "bad" в имени падают."""
+    if "bad" in os.path.basename(output_base):
+        return "Error: cannot read image"
+    with open(f"{output_base}.gt.txt", encoding="utf-8") as f, open(f"{output_base}.lstmf", "w") as lstmf:
+        lstmf.write(f.read())
+    return None
+
+
+class TestLstmfCache(unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.ground_truth_dir = os.path.join(self._tmp_dir.name, "gt")
+        os.makedirs(self.ground_truth_dir)
+        for name in ("s1", "s2", "bad"):
+            Image.new("L", (37, 11), color=255).save(os.path.join(self.ground_truth_dir, f"{name}.png"))
+            self._write_gt(name, f"{name} текст")
+
+        with mock.patch.object(prepare_tessdata, "get_tesseract_version", return_value="tesseract 5.3.0"):
+            self.cache = LstmfCache(os.path.join(self._tmp_dir.name, "cache"))
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def _write_gt(self, name, text):
+        with open(os.path.join(self.ground_truth_dir, f"{name}.gt.txt"), "w", encoding="utf-8") as f:
+            f.write(f"{text}\n")
+
+    def _read_lstmf(self, name):
+        with open(os.path.join(self.ground_truth_dir, f"{name}.lstmf"), encoding="utf-8") as f:
+            return f.read().strip()
+
+    def _prepare(self):
+        with mock.patch.object(prepare_tessdata, "_lstm_train", side_effect=fake_lstm_train_sample) as lstm_train:
+            result = _prepare_dir_with_cache(self.ground_truth_dir, self.cache, par_factor=1)
+        return result, sorted(os.path.basename(call.args[1]) for call in lstm_train.call_args_list)
+
+    def test_miss_then_hit(self):
+        result, trained = self._prepare()
+        self.assertEqual(result, {"hits": 0, "misses": 3, "failed": 1})
+        self.assertEqual(trained, ["bad", "s1", "s2"])
+        with open(os.path.join(self.ground_truth_dir, FAILED_FILE_NAME)) as f:
+            self.assertEqual(f.read(), "bad\n")
+
+        # неудачный образец в состояние не попадает и пересобирается при следующем запуске
+        result, trained = self._prepare()
+        self.assertEqual(result, {"hits": 2, "misses": 1, "failed": 1})
+        self.assertEqual(trained, ["bad"])
+
+    def test_stale_gt_and_restore(self):
+        self._prepare()
+
+        self._write_gt("s1", "s1 исправленный текст")
+        result, trained = self._prepare()
+        self.assertEqual(trained, ["bad", "s1"])
+        self.assertEqual(self._read_lstmf("s1"), "s1 исправленный текст")
+
+        # возврат к прежнему тексту и удаленный .lstmf восстанавливаются из кэша без lstm.train
+        self._write_gt("s1", "s1 текст")
+        os.remove(os.path.join(self.ground_truth_dir, "s2.lstmf"))
+        result, trained = self._prepare()
+        self.assertEqual(result, {"hits": 2, "misses": 1, "failed": 1})
+        self.assertEqual(trained, ["bad"])
+        self.assertEqual(self._read_lstmf("s1"), "s1 текст")
+        self.assertEqual(self._read_lstmf("s2"), "s2 текст")
+
+    def test_seed_state_from_existing_lstmf(self):
+        for name in ("s1", "s2"):
+            fake_lstm_train_sample(None, os.path.join(self.ground_truth_dir, name))
+        self.assertFalse(os.path.exists(os.path.join(self.ground_truth_dir, CACHE_STATE_FILE_NAME)))
+
+        result, trained = self._prepare()
+        self.assertEqual(result, {"hits": 2, "misses": 1, "failed": 1})
+        self.assertEqual(trained, ["bad"])
+
+        # уже подготовленные .lstmf попали в кэш
+        os.remove(os.path.join(self.ground_truth_dir, "s1.lstmf"))
+        os.remove(os.path.join(self.ground_truth_dir, CACHE_STATE_FILE_NAME))
+        result, trained = self._prepare()
+        self.assertEqual(trained, ["bad"])
+        self.assertEqual(self._read_lstmf("s1"), "s1 текст")
+
+
+class TestLstmTrainBatch(unittest.TestCase):
+    def test_split_and_retry(self):
+        names = ["s1", "bad1", "s2", "s3", "multiline", "s4", "bad2"]
+        with tempfile.TemporaryDirectory() as ground_truth_dir:
+            for name in names:
+                Image.new("L", (37, 11), color=255).save(os.path.join(ground_truth_dir, f"{name}.png"))
+                with open(os.path.join(ground_truth_dir, f"{name}.gt.txt"), "w", encoding="utf-8") as f:
+                    f.write("ди\nди\n" if name == "multiline" else "ди\n")
+
+            with mock.patch.object(prepare_tessdata, "_lstm_train", side_effect=fake_lstm_train) as lstm_train:
+                failed = _run_prepare_batch(names, ground_truth_dir)
+
+            self.assertEqual(sorted(failed), ["bad1", "bad2", "multiline"])
+            # 6 образцов с box: [s1 bad1 s2 | s3 s4 bad2] -> s1, [bad1 s2] -> bad1, s2; s3, [s4 bad2] -> s4, bad2
+            self.assertEqual(lstm_train.call_count, 11)
+
+            batch_dir = os.path.join(ground_truth_dir, BATCH_DIR_NAME)
+            batched_names = set()
+            for list_name in (f for f in os.listdir(batch_dir) if f.endswith(".txt")):
+                self.assertTrue(os.path.exists(os.path.join(batch_dir, f"{list_name[:-4]}.lstmf")))
+                with open(os.path.join(batch_dir, list_name), encoding="utf-8") as f:
+                    batched_names.update(os.path.basename(line.strip())[: -len(".png")] for line in f)
+            self.assertEqual(batched_names, {"s1", "s2", "s3", "s4"})
+
+            list_path = os.path.join(ground_truth_dir, "all-lstmf")
+            self.assertEqual(write_lstmf_list(ground_truth_dir, list_path), len(os.listdir(batch_dir)) // 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
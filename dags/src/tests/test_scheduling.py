@@ -0,0 +1,46 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from ..scheduling import iter_bounded, iter_bounded_ordered
+
+
+class TestIterBounded(unittest.TestCase):
+    def test_in_flight_is_bounded(self):
+        lock = threading.Lock()
+        running = []
+        max_running = []
+
+        def work(item):
+            with lock:
+                running.append(item)
+                max_running.append(len(running))
+            time.sleep(0.001)
+            with lock:
+                running.remove(item)
+            return item * 2
+
+        results = []
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for item, future in iter_bounded(executor, work, iter(range(50)), max_in_flight=3):
+                results.append(future.result())
+
+        self.assertEqual(sorted(results), [i * 2 for i in range(50)])
+        self.assertLessEqual(max(max_running), 3)
+
+
+class TestIterBoundedOrdered(unittest.TestCase):
+    def test_results_in_input_order(self):
+        def work(item):
+            time.sleep(0.001 * (item % 3))
+            return item * 2
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(iter_bounded_ordered(executor, work, iter(range(30)), max_in_flight=4))
+
+        self.assertEqual(results, [i * 2 for i in range(30)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import os
+import stat
+import tempfile
+import unittest
+from unittest import mock
+
+from .. import tesseract_pages
+from ..tesseract_pages import MANIFEST_FILE_NAME, run_tesseract_pages, run_tesseract_pdf
+from .test_pdf_raster import make_pdf
+
+# пишет txt/hocr/tsv как tesseract и запоминает OMP_THREAD_LIMIT; страницы с "bad" в имени падают
+FAKE_TESSERACT = """#!/bin/sh
+case "$3" in *bad*) echo "Error: cannot read image" >&2; exit 1;; esac
+for ext in txt hocr tsv; do echo "$OMP_THREAD_LIMIT" > "$4.$ext"; done
+"""
+
+# читает PGM из stdin и пишет в txt его первую строку и --dpi
+FAKE_TESSERACT_STDIN = """#!/bin/sh
+[ "$5" = stdin ] || exit 1
+head -c 2 > "$6.txt"; echo " $4" >> "$6.txt"
+for ext in hocr tsv; do : > "$6.$ext"; done
+"""
+
+
+def write_script(path, text):
+    with open(path, "w") as f:
+        f.write(text)
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+
+
+class TestRunTesseractPages(unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        tmp_dir = self._tmp_dir.name
+        self.image_dir = os.path.join(tmp_dir, "jpgs")
+        self.txt_dir = os.path.join(tmp_dir, "txts")
+        self.hocr_dir = os.path.join(tmp_dir, "hocrs")
+        for d in (self.image_dir, self.txt_dir, self.hocr_dir):
+            os.makedirs(d)
+        for name in ("page-1.jpg", "page-2.jpg", "page-bad.jpg", "notes.md"):
+            open(os.path.join(self.image_dir, name), "w").close()
+
+        self.tesseract_cmd = os.path.join(tmp_dir, "tesseract")
+        write_script(self.tesseract_cmd, FAKE_TESSERACT)
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def _run(self):
+        with mock.patch.object(tesseract_pages, "TESSERACT_CMD", self.tesseract_cmd):
+            return run_tesseract_pages(
+                self.image_dir, self.txt_dir, "kbd", config="config", done_dirs=[self.hocr_dir], max_workers=2
+            )
+
+    def test_run_and_skip_done(self):
+        stats = self._run()
+        self.assertEqual((stats.total, stats.done, stats.skipped, stats.failed), (3, 2, 0, ["page-bad.jpg"]))
+        with open(os.path.join(self.txt_dir, "page-1.txt.txt")) as f:
+            self.assertEqual(f.read().strip(), "1")
+
+        # hocr уже перенесен, как это делает DAG после распознавания
+        os.replace(os.path.join(self.txt_dir, "page-1.txt.hocr"), os.path.join(self.hocr_dir, "page-1.txt.hocr"))
+        stats = self._run()
+        self.assertEqual((stats.done, stats.skipped, stats.failed), (0, 2, ["page-bad.jpg"]))
+
+        with open(os.path.join(self._tmp_dir.name, MANIFEST_FILE_NAME)) as f:
+            rows = [line.rstrip("\n").split("\t") for line in f]
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(sorted(row[1] for row in rows), ["failed", "failed", "ok", "ok", "skipped", "skipped"])
+        self.assertIn("cannot read image", [row for row in rows if row[0] == "page-bad.jpg"][0][3])
+
+
+class TestRunTesseractPdf(unittest.TestCase):
+    def test_pages_from_pdf(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pdf_path = os.path.join(tmp_dir, "book.pdf")
+            make_pdf(pdf_path, 3)
+            txt_dir = os.path.join(tmp_dir, "txts")
+            image_dir = os.path.join(tmp_dir, "pngs")
+            os.makedirs(txt_dir)
+            tesseract_cmd = os.path.join(tmp_dir, "tesseract")
+            write_script(tesseract_cmd, FAKE_TESSERACT_STDIN)
+
+            with mock.patch.object(tesseract_pages, "TESSERACT_CMD", tesseract_cmd):
+                stats = run_tesseract_pdf(pdf_path, txt_dir, "kbd", config="config", max_workers=2, dpi=72)
+                self.assertEqual((stats.total, stats.done, stats.failed), (3, 3, []))
+                with open(os.path.join(txt_dir, "page-3.txt.txt")) as f:
+                    self.assertEqual(f.read(), "P5 72\n")
+                self.assertFalse(os.path.exists(image_dir))
+
+                os.remove(os.path.join(txt_dir, "page-2.txt.tsv"))
+                stats = run_tesseract_pdf(pdf_path, txt_dir, "kbd", config="config", dpi=72, image_dir=image_dir)
+                self.assertEqual((stats.done, stats.skipped), (1, 2))
+                self.assertEqual(os.listdir(image_dir), ["page-2.png"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import random
+import re
+import unittest
+
+from .. import text_cleaner
+from ..text_cleaner import NOT_IN_WHITELIST_REGEX, clean_text
+
+ALPHABET = (
+    list("абвгдеёжзийклмнопрстуфхцчшщъыьэюяАБВГДЕЁЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯ")
+    + list("IiIIlcdABCxyz0123456789_")
+    + list(" .,:;!?-–…«»()№*×<>\"'#/")
+    + ["\n", "\n", "\t", "\r", "\x0b", "\x1c", "\xa0", "😀", "(cid:12)", "<b>", "...", ",,", "!!", ", , "]
+    + ["ГЛАВА", "ABCDE", "к ъ э ", "I I I", "абIIв", "ЯЯЯЯЯЯ"]
+)
+
+# исходные регулярные выражения шагов - эталон для переписанных
+LEGACY_STEPS = {
+    "remove_non_whitelisted_chars": (NOT_IN_WHITELIST_REGEX, ""),
+    "remove_html_tags": (r"<[^>]+>", ""),
+    "remove_emojis": (r"[\U00010000-\U0010ffff]", ""),
+    "clean_encoding": (r"\(cid:.*\)", ""),
+    "remove_spaced_letters": (r"\b(?:[А-Яа-яI]\s){2,}[А-Яа-яI]\b", ""),
+    "remove_uppercase_words": (r"\b[А-ЯЁA-Z]{5,}\b", ""),
+    "replace_many_newlines_with_one": (r"\n{2,}", "\n"),
+    "replace_spaces_before_punctuation": (r"\s+([.,!?;:])", r"\1"),
+    "remove_word_with_ii": (r"\b\w*II\w*\b", ""),
+    "add_space_after_comma": (r",(\S)", r", \1"),
+    "remove_many_spaces": (r"\s{2,}", " "),
+    "remove_many_dot": (r"\.{3,}", "."),
+    "remove_redundant_punctuation": (r"([,!?])\1+", r"\1"),
+}
+
+
+def remove_garbage_legacy(text):
+    def _clean(line):
+        line = re.sub(r"^[ I.,×«»()\-–!№\d?:;]*$", "", line)
+        line = re.sub(r"^[^АаБбВвГгДдЕеЁёЖжЗзИиЙйКкЛлМмНнОоПпРрСсТтУуФфХхЦцЧчШшЩщЪъЫыЬьЭэЮюЯя]*$", "", line)
+        line = re.sub(r"\, \, ", "", line)
+        return line
+
+    return "\n".join(_clean(line) for line in text.split("\n"))
+
+
+def clean_text_legacy(text):
+    for pattern, repl in LEGACY_STEPS.values():
+        text = re.sub(pattern, repl, text)
+    return remove_garbage_legacy(text)
+
+
+def random_texts(count, seed=0):
+    rnd = random.Random(seed)
+    for _ in range(count):
+        yield "".join(rnd.choice(ALPHABET) for _ in range(rnd.randint(0, 80)))
+
+
+class TestCleanText(unittest.TestCase):
+    def test_example(self):
+        text = "Строка один...\n\n, : I ? I I!\n\nСтрока <b>два</b>,три!!  ABC 😀\n; I I.\nтри\nI I, I. !\nгде"
+        self.assertEqual(clean_text(text), "Строка один., : I? I I!\nСтрока <>два<>, три!; I I.\nтри\n\nгде")
+
+    def test_steps_same_as_legacy(self):
+        for text in random_texts(1000):
+            for name, (pattern, repl) in LEGACY_STEPS.items():
+                self.assertEqual(getattr(text_cleaner, name)(text), re.sub(pattern, repl, text), (name, text))
+            self.assertEqual(text_cleaner.remove_garbage(text), remove_garbage_legacy(text), text)
+
+    def test_same_as_legacy(self):
+        for text in random_texts(3000, seed=1):
+            self.assertEqual(clean_text(text), clean_text_legacy(text), text)
+
+
+if __name__ == "__main__":
+    unittest.main()